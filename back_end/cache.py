@@ -0,0 +1,367 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event, inspect, select, union
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+import models
+
+
+# ====================================================
+# 🧠 GENERIC TTL CACHE
+# ====================================================
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries expire after `ttl` seconds.
+    Keeps hit/miss counters so the admin endpoints can report cache health.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}  # key -> lock held while one caller loads it
+
+    def get(self, key):
+        """Return the cached value, or None when missing/expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_or_load(self, key, load):
+        """
+        Cached value, else load() it and cache the result. Concurrent misses
+        on the same key wait for a single load instead of each running it.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            try:
+                value = load()
+                self.set(key, value)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop a single entry (no-op when absent)"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups > 0 else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+            }
+
+
+# ====================================================
+# 🔐 AUTHENTICATED-PRINCIPAL CACHE
+# ====================================================
+
+# Keyed by token subject (the user's email). Each worker process keeps its own
+# copy, so the TTL bounds how stale a principal can get on *other* workers.
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60")),
+)
+
+# Columns that affect authorisation decisions - a change evicts the principal
+PRINCIPAL_FIELDS = ("email", "role", "manager_id")
+
+
+def remember_principal(user: models.User):
+    """
+    Cache a detached copy of `user` holding only its column values.
+    The copy never belongs to a session, so request commits cannot expire it.
+    """
+    mapper = inspect(user).mapper
+    principal = models.User(**{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(principal)
+    principal_cache.set(user.email, principal)
+
+
+def load_principal(db: Session, email: str):
+    """
+    Return the cached principal attached to `db` (no SQL emitted), or None.
+    merge(load=False) gives each request its own instance, so lazy
+    relationships keep working and the shared copy is never mutated.
+    """
+    principal = principal_cache.get(email)
+    if principal is None:
+        return None
+    return db.merge(principal, load=False)
+
+
+def _pending_invalidations(session: Session) -> set:
+    return session.info.setdefault("principal_invalidations", set())
+
+
+@event.listens_for(models.User, "after_update")
+def _collect_changed_principal(mapper, connection, target):
+    """Remember which principals changed; they are evicted once the commit lands"""
+    state = inspect(target)
+    changed = [state.attrs[field].history for field in PRINCIPAL_FIELDS]
+    if not any(history.has_changes() for history in changed):
+        return
+
+    session = object_session(target)
+    if session is None:
+        principal_cache.invalidate(target.email)
+        return
+
+    emails = _pending_invalidations(session)
+    emails.add(target.email)
+    emails.update(state.attrs.email.history.deleted or ())
+
+
+@event.listens_for(models.User, "after_delete")
+def _collect_deleted_principal(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        principal_cache.invalidate(target.email)
+        return
+    _pending_invalidations(session).add(target.email)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_principals(session):
+    # Evicting after commit (not at flush) stops a concurrent request from
+    # re-caching the pre-commit row between our flush and commit.
+    for email in session.info.pop("principal_invalidations", ()):
+        principal_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session):
+    session.info.pop("principal_invalidations", None)
+
+
+# ====================================================
+# 📚 COURSE CATALOGUE CACHE
+# ====================================================
+
+# Serialised course list plus its encoded JSON body and a content digest
+CatalogueEntry = namedtuple("CatalogueEntry", "version courses body digest")
+
+
+def course_to_dict(c: models.Course) -> dict:
+    """Convert a course to the JSON shape served by /api/courses"""
+    return {
+        "id": c.id,
+        "title": c.title,
+        "description": c.description,
+        "category": c.category.value if hasattr(c.category, 'value') else str(c.category),
+        "difficulty": c.difficulty.value if hasattr(c.difficulty, 'value') else str(c.difficulty),
+        "duration": c.duration,
+        "modules": c.modules,
+        "thumbnail": c.thumbnail,
+        "expiry_days": c.expiry_days,
+        "assigned_roles": c.assigned_roles,
+        "video_url": c.video_url,
+        "delivery_type": c.delivery_type.value if hasattr(c.delivery_type, 'value') else str(c.delivery_type),
+        "meeting_url": c.meeting_url,
+        "meeting_platform": c.meeting_platform,
+    }
+
+
+def _catalogue_entry(version: int, courses: list) -> CatalogueEntry:
+    # Same encoding as Starlette's JSONResponse, so the body can be served as-is
+    body = json.dumps(courses, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+    return CatalogueEntry(version, courses, body, hashlib.sha256(body).hexdigest()[:32])
+
+
+class CatalogueCache:
+    """
+    Serialised course catalogue, one snapshot per role plus single courses
+    (for enrolled courses outside the user's role).
+    `version` is bumped after any committed Course write; the TTL makes other
+    worker processes converge on catalogue changes made elsewhere.
+    """
+
+    def __init__(self, ttl: float, max_courses: int):
+        self.version = 0
+        self.roles = TTLCache(maxsize=64, ttl=ttl)
+        self.courses = TTLCache(maxsize=max_courses, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+        self.roles.clear()
+        self.courses.clear()
+
+    def _current(self, cache: TTLCache, key):
+        entry = cache.get(key)
+        if entry is not None and entry.version == self.version:
+            return entry
+        return None
+
+    def for_role(self, db: Session, role: str) -> CatalogueEntry:
+        """Courses whose assigned_roles contain `role`, ordered by id"""
+        entry = self._current(self.roles, role)
+        if entry is None:
+            version = self.version
+            courses = (
+                db.query(models.Course)
+                .filter(models.Course.assigned_roles.contains([role]))
+                .order_by(models.Course.id)
+                .all()
+            )
+            entry = _catalogue_entry(version, [course_to_dict(c) for c in courses])
+            self.roles.set(role, entry)
+        return entry
+
+    def for_user(self, db: Session, role: str, user_id: int) -> tuple:
+        """
+        (role entry, single-course entries for enrolled courses outside the
+        role). A cold role snapshot is filled together with the extras from
+        one query: role courses (GIN index on assigned_roles) UNION enrolled
+        courses (index on enrollments.user_id).
+        """
+        entry = self._current(self.roles, role)
+        if entry is not None:
+            role_course_ids = {c["id"] for c in entry.courses}
+            enrolled_course_ids = set(db.scalars(
+                select(models.Enrollment.course_id).where(models.Enrollment.user_id == user_id)
+            ))
+            return entry, self.for_ids(db, sorted(enrolled_course_ids - role_course_ids))
+
+        version = self.version
+        visible_ids = union(
+            select(models.Course.id).where(models.Course.assigned_roles.contains([role])),
+            select(models.Enrollment.course_id).where(models.Enrollment.user_id == user_id),
+        ).subquery()
+        courses = db.scalars(
+            select(models.Course).join(visible_ids, models.Course.id == visible_ids.c.id).order_by(models.Course.id)
+        )
+
+        role_courses, extras = [], []
+        for course in courses:
+            if role in (course.assigned_roles or ()):
+                role_courses.append(course_to_dict(course))
+            else:
+                extra = _catalogue_entry(version, [course_to_dict(course)])
+                self.courses.set(course.id, extra)
+                extras.append(extra)
+        entry = _catalogue_entry(version, role_courses)
+        self.roles.set(role, entry)
+        return entry, extras
+
+    def for_ids(self, db: Session, course_ids) -> list:
+        """One single-course entry per existing id in `course_ids`, ordered by id"""
+        entries = []
+        missing = []
+        for course_id in course_ids:
+            entry = self._current(self.courses, course_id)
+            if entry is None:
+                missing.append(course_id)
+            else:
+                entries.append(entry)
+
+        if missing:
+            version = self.version
+            for course in db.query(models.Course).filter(models.Course.id.in_(missing)):
+                entry = _catalogue_entry(version, [course_to_dict(course)])
+                self.courses.set(course.id, entry)
+                entries.append(entry)
+
+        return sorted(entries, key=lambda e: e.courses[0]["id"])
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "roles": self.roles.stats(),
+            "courses": self.courses.stats(),
+        }
+
+
+catalogue_cache = CatalogueCache(
+    ttl=float(os.getenv("CATALOGUE_CACHE_TTL_SECONDS", "300")),
+    max_courses=int(os.getenv("CATALOGUE_CACHE_MAX_COURSES", "5000")),
+)
+
+
+@event.listens_for(models.Course, "after_insert")
+@event.listens_for(models.Course, "after_update")
+@event.listens_for(models.Course, "after_delete")
+def _mark_catalogue_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        catalogue_cache.bump()
+        return
+    session.info["catalogue_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_catalogue(session):
+    if session.info.pop("catalogue_dirty", False):
+        catalogue_cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalogue_dirty(session):
+    session.info.pop("catalogue_dirty", None)
+
+
+# ====================================================
+# 👑 ADMIN DASHBOARD CACHE
+# ====================================================
+
+# Short TTL so several admins refreshing the dashboard share one computation
+dashboard_cache = TTLCache(
+    maxsize=1,
+    ttl=float(os.getenv("DASHBOARD_STATS_TTL_SECONDS", "30")),
+)
+
+
+# Every cache exposed through /api/admin/cache-stats
+CACHES = {
+    "principal": principal_cache,
+    "catalogue": catalogue_cache,
+    "dashboard": dashboard_cache,
+}
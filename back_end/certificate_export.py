@@ -0,0 +1,267 @@
+import csv
+import io
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy.orm import Session, joinedload
+
+import models
+from certificate_pdf import certificate_fields, pdf_cache, render_certificate
+
+logger = logging.getLogger(__name__)
+
+# ====================================================
+# 📦 CERTIFICATE ZIP EXPORT CONFIG
+# ====================================================
+
+EXPORT_WORKERS = int(os.getenv("CERTIFICATE_EXPORT_WORKERS", str(os.cpu_count() or 2)))
+# Renders in flight at once - bounds memory however large the export is
+EXPORT_WINDOW = int(os.getenv("CERTIFICATE_EXPORT_WINDOW", str(EXPORT_WORKERS * 4)))
+# Finished exports kept for the progress endpoint
+EXPORT_HISTORY = 50
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def render_pool() -> ProcessPoolExecutor:
+    """
+    Shared render pool, started on first export.
+    Workers are spawned rather than forked: the API process is multithreaded
+    and a fork could inherit locks held by another thread.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# ====================================================
+# 📈 EXPORT PROGRESS
+# ====================================================
+
+class ExportProgress:
+    def __init__(self, total: int, filters: dict):
+        self.id = uuid.uuid4().hex
+        self.status = "running"
+        self.total = total
+        self.written = 0
+        self.rendered = 0
+        self.cache_hits = 0
+        self.bytes_sent = 0
+        self.filters = filters
+        self.error = None
+        self.started_at = datetime.utcnow()
+        self.finished_at = None
+
+    def finish(self, status: str, error: str = None):
+        self.status = status
+        self.error = error
+        self.finished_at = datetime.utcnow()
+
+    def to_dict(self) -> dict:
+        return {
+            "export_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "written": self.written,
+            "rendered": self.rendered,
+            "cache_hits": self.cache_hits,
+            "percent": round(self.written / self.total * 100, 1) if self.total > 0 else 100.0,
+            "bytes_sent": self.bytes_sent,
+            "filters": self.filters,
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+# Per worker process - poll progress through the worker serving the download
+_exports = OrderedDict()
+_exports_lock = threading.Lock()
+
+
+def register_export(total: int, filters: dict) -> ExportProgress:
+    progress = ExportProgress(total, filters)
+    with _exports_lock:
+        _exports[progress.id] = progress
+        finished = [key for key, p in _exports.items() if p.status != "running"]
+        for key in finished[:max(0, len(_exports) - EXPORT_HISTORY)]:
+            del _exports[key]
+    return progress
+
+
+def get_export(export_id: str):
+    with _exports_lock:
+        return _exports.get(export_id)
+
+
+# ====================================================
+# 🔎 SELECTION
+# ====================================================
+
+def export_certificates(db: Session, branch=None, course_id=None, issued_from=None, issued_to=None) -> list:
+    """Printed fields (plus zip metadata) of every certificate matching the filters"""
+    query = (
+        db.query(models.Certificate)
+        .join(models.User, models.User.id == models.Certificate.user_id)
+        .options(joinedload(models.Certificate.user), joinedload(models.Certificate.course))
+    )
+    if branch:
+        query = query.filter(models.User.branch == branch)
+    if course_id:
+        query = query.filter(models.Certificate.course_id == course_id)
+    if issued_from:
+        query = query.filter(models.Certificate.issue_date >= issued_from)
+    if issued_to:
+        query = query.filter(models.Certificate.issue_date < issued_to)
+
+    rows = []
+    for cert in query.order_by(models.Certificate.id):
+        rows.append({
+            "fields": certificate_fields(cert),
+            "email": cert.user.email,
+            "branch": cert.user.branch,
+        })
+    return rows
+
+
+# ====================================================
+# 🗜️ STREAMED ZIP
+# ====================================================
+
+class _ChunkWriter(io.RawIOBase):
+    """
+    Write-only, non-seekable sink for ZipFile. zipfile then writes local
+    headers with data descriptors, so nothing needs to be rewound and each
+    member can be handed to the client as soon as it is written.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _safe(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text).strip("_") or "certificate"
+
+
+def member_name(row: dict) -> str:
+    fields = row["fields"]
+    return f"{_safe(fields['name'])}/{_safe(fields['course_title'])}_{fields['certificate_id']}.pdf"
+
+
+def _pdfs(rows: list, progress: ExportProgress):
+    """
+    Yield (row, pdf_bytes) in order. Cached PDFs are served from disk; misses
+    go to the process pool with at most EXPORT_WINDOW renders in flight.
+    """
+    pool = None
+    pending = deque()
+    try:
+        for row in rows:
+            digest = pdf_cache.key(row["fields"])
+            content = pdf_cache.get(digest)
+            if content is not None:
+                progress.cache_hits += 1
+                pending.append((row, digest, content))
+            else:
+                pool = pool or render_pool()
+                pending.append((row, digest, pool.submit(render_certificate, row["fields"])))
+
+            while len(pending) > EXPORT_WINDOW or (pending and isinstance(pending[0][2], bytes)):
+                yield _resolve(pending.popleft(), progress)
+
+        while pending:
+            yield _resolve(pending.popleft(), progress)
+    finally:
+        for _, _, item in pending:
+            if not isinstance(item, bytes):
+                item.cancel()
+
+
+def _resolve(entry, progress: ExportProgress):
+    row, digest, item = entry
+    if isinstance(item, bytes):
+        return row, item
+    content = item.result()
+    pdf_cache.put(digest, content)
+    progress.rendered += 1
+    return row, content
+
+
+def _manifest(rows: list) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["file", "name", "email", "branch", "course", "certificate_id",
+                     "issue_date", "expiry_date", "score"])
+    for row in rows:
+        fields = row["fields"]
+        writer.writerow([member_name(row), fields["name"], row["email"], row["branch"],
+                         fields["course_title"], fields["certificate_id"],
+                         fields["issue_date"], fields["expiry_date"], fields["score"]])
+    return out.getvalue().encode("utf-8")
+
+
+def stream_zip(rows: list, progress: ExportProgress):
+    """Generator of ZIP bytes: one PDF per certificate plus manifest.csv"""
+    sink = _ChunkWriter()
+    started = time.perf_counter()
+    try:
+        # PDF page streams are already compressed - store them as-is
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            for row, content in _pdfs(rows, progress):
+                archive.writestr(member_name(row), content)
+                progress.written += 1
+                chunk = sink.drain()
+                progress.bytes_sent += len(chunk)
+                yield chunk
+
+            archive.writestr("manifest.csv", _manifest(rows), compress_type=zipfile.ZIP_DEFLATED)
+
+        chunk = sink.drain()
+        progress.bytes_sent += len(chunk)
+        yield chunk
+        progress.finish("completed")
+        logger.info("[EXPORT] %s: %s certificates (%s rendered) in %.1fs",
+                    progress.id, progress.written, progress.rendered, time.perf_counter() - started)
+    except GeneratorExit:
+        progress.finish("cancelled")
+        logger.warning("[EXPORT] %s: client disconnected after %s certificates", progress.id, progress.written)
+        raise
+    except Exception as e:
+        progress.finish("failed", str(e))
+        logger.exception("[EXPORT] %s: %s", progress.id, e)
+        raise
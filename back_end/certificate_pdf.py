@@ -0,0 +1,221 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+
+import models
+
+# ====================================================
+# 📄 CERTIFICATE TEMPLATE
+# ====================================================
+
+# Bump whenever the layout below changes - it is part of every cache key,
+# so PDFs rendered from an older template are never served again.
+TEMPLATE_VERSION = "1"
+
+WIDTH, HEIGHT = A4
+CENTRE = WIDTH / 2
+PRIMARY = colors.HexColor("#1e40af")
+ACCENT = colors.HexColor("#3b82f6")
+
+# Static layer, resolved once at import: (canvas method, args) in draw order.
+# reportlab cannot share a rendered layer between separate documents, so the
+# page furniture is kept as a flat list of pre-computed calls instead.
+STATIC_LAYER = (
+    # Border
+    ("setStrokeColor", (PRIMARY,)),
+    ("setLineWidth", (3,)),
+    ("rect", (0.5 * inch, 0.5 * inch, WIDTH - 1 * inch, HEIGHT - 1 * inch)),
+    # Title
+    ("setFont", ("Helvetica-Bold", 32)),
+    ("setFillColor", (PRIMARY,)),
+    ("drawCentredString", (CENTRE, HEIGHT - 2 * inch, "Certificate of Completion")),
+    # Decorative line
+    ("setStrokeColor", (ACCENT,)),
+    ("setLineWidth", (2,)),
+    ("line", (2 * inch, HEIGHT - 2.5 * inch, WIDTH - 2 * inch, HEIGHT - 2.5 * inch)),
+    # Body text
+    ("setFont", ("Helvetica", 16)),
+    ("setFillColor", (colors.black,)),
+    ("drawCentredString", (CENTRE, HEIGHT - 3.2 * inch, "This certifies that")),
+    ("drawCentredString", (CENTRE, HEIGHT - 4.7 * inch, "has successfully completed")),
+    # Footer
+    ("setFont", ("Helvetica-Bold", 14)),
+    ("setFillColor", (PRIMARY,)),
+    ("drawCentredString", (CENTRE, 1.5 * inch, "River Garden Training")),
+    ("setFont", ("Helvetica", 10)),
+    ("setFillColor", (colors.gray,)),
+    ("drawCentredString", (CENTRE, 1.2 * inch, "Professional Healthcare Training & Compliance")),
+)
+
+DETAILS_TOP = HEIGHT - 7 * inch
+DETAILS_STEP = 0.3 * inch
+
+
+def certificate_fields(certificate: models.Certificate) -> dict:
+    """Every value printed on the certificate - these decide the cache key"""
+    return {
+        "name": certificate.user.name,
+        "course_title": certificate.course.title,
+        "certificate_id": certificate.certificate_id,
+        "issue_date": certificate.issue_date.strftime('%B %d, %Y'),
+        "expiry_date": certificate.expiry_date.strftime('%B %d, %Y'),
+        "score": f"{certificate.score}",
+    }
+
+
+def render_certificate(fields: dict) -> bytes:
+    """Draw the static layer, then the per-certificate text, into a PDF"""
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setTitle(f"Certificate - {fields['course_title']}")
+
+    for method, args in STATIC_LAYER:
+        getattr(pdf, method)(*args)
+
+    # User name (larger)
+    pdf.setFont("Helvetica-Bold", 24)
+    pdf.setFillColor(PRIMARY)
+    pdf.drawCentredString(CENTRE, HEIGHT - 4 * inch, fields["name"])
+
+    # Course title
+    pdf.setFont("Helvetica-Bold", 20)
+    pdf.drawCentredString(CENTRE, HEIGHT - 5.5 * inch, fields["course_title"])
+
+    # Certificate details
+    pdf.setFont("Helvetica", 12)
+    pdf.setFillColor(colors.black)
+    details = [
+        f"Certificate ID: {fields['certificate_id']}",
+        f"Issue Date: {fields['issue_date']}",
+        f"Expiry Date: {fields['expiry_date']}",
+        f"Score: {fields['score']}%",
+    ]
+    for i, detail in enumerate(details):
+        pdf.drawCentredString(CENTRE, DETAILS_TOP - i * DETAILS_STEP, detail)
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+# ====================================================
+# 💾 RENDERED PDF CACHE
+# ====================================================
+
+class PDFDiskCache:
+    """
+    Content-addressed PDF store on local disk: <sha256 of fields>.pdf.
+    Least recently used files are deleted once the directory exceeds
+    `max_bytes`. Files are written atomically, so worker processes can
+    share one directory; each keeps its own LRU order and counters.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # digest -> size, least recent first
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        existing = []
+        for name in os.listdir(directory):
+            if name.endswith(".pdf"):
+                stat = os.stat(os.path.join(directory, name))
+                existing.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, digest, size in sorted(existing):
+            self._entries[digest] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def key(fields: dict) -> str:
+        raw = "\x1f".join([TEMPLATE_VERSION] + [f"{k}={fields[k]}" for k in sorted(fields)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.pdf")
+
+    def get(self, digest: str):
+        """Cached PDF bytes, or None"""
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)  # mtime doubles as LRU order across restarts
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+                if digest in self._entries:
+                    self.total_bytes -= self._entries.pop(digest)
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if digest not in self._entries:
+                self.total_bytes += len(content)
+            self._entries[digest] = len(content)
+            self._entries.move_to_end(digest)
+        return content
+
+    def put(self, digest: str, content: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, self._path(digest))
+
+        with self._lock:
+            self.total_bytes += len(content) - self._entries.pop(digest, 0)
+            self._entries[digest] = len(content)
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_digest, size = self._entries.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    os.remove(self._path(old_digest))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups > 0 else 0.0,
+                "size": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "template_version": TEMPLATE_VERSION,
+            }
+
+
+pdf_cache = PDFDiskCache(
+    directory=os.getenv("CERTIFICATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "river_garden_certificates")),
+    max_bytes=int(os.getenv("CERTIFICATE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+)
+
+
+def certificate_digest(certificate: models.Certificate) -> str:
+    """Cache key of a certificate's PDF - known without reading or rendering it"""
+    return pdf_cache.key(certificate_fields(certificate))
+
+
+def certificate_pdf(certificate: models.Certificate):
+    """Return (pdf_bytes, digest) for a certificate, rendering only on a cache miss"""
+    fields = certificate_fields(certificate)
+    digest = pdf_cache.key(fields)
+
+    content = pdf_cache.get(digest)
+    if content is None:
+        content = render_certificate(fields)
+        pdf_cache.put(digest, content)
+    return content, digest
@@ -1,3 +1,8 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Integer, and_, any_, bindparam, case, exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.orm import Session
 import models
 
@@ -86,6 +91,44 @@ def create_enrollment(db: Session, user_id: int, course_id: int, due_date=None,
     return db_enrollment
 
 
+def count_existing_users(db: Session, user_ids: list) -> int:
+    """Count how many of `user_ids` exist (one = ANY(:ids) query)"""
+    ids = bindparam("user_ids", user_ids, type_=ARRAY(Integer))
+    return db.query(func.count(models.User.id)).filter(models.User.id == any_(ids)).scalar()
+
+
+def bulk_enroll_users(db: Session, course_id: int, user_ids: list, assigned_by=None, due_date=None) -> list:
+    """
+    Enroll every existing user in `user_ids` in a course with one
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING. Unknown ids and existing
+    enrollments are skipped by the database; returns the ids of the users
+    actually enrolled.
+    """
+    enrollments = models.Enrollment.__table__
+    now = datetime.utcnow()
+    ids = bindparam("user_ids", user_ids, type_=ARRAY(Integer))
+
+    rows = select(
+        models.User.id,
+        literal(course_id),
+        literal(models.EnrollmentStatus.NOT_STARTED, enrollments.c.status.type),
+        literal(0),
+        literal(assigned_by, Integer),
+        literal(due_date, enrollments.c.due_date.type),
+        literal(now, enrollments.c.created_at.type),
+        literal(now, enrollments.c.updated_at.type),
+    ).where(models.User.id == any_(ids))
+
+    stmt = pg_insert(enrollments).from_select(
+        ["user_id", "course_id", "status", "progress", "assigned_by", "due_date", "created_at", "updated_at"],
+        rows,
+    ).on_conflict_do_nothing(index_elements=["user_id", "course_id"]).returning(enrollments.c.user_id)
+
+    enrolled = list(db.execute(stmt).scalars())
+    db.commit()
+    return enrolled
+
+
 def get_user_enrollments(db: Session, user_id: int):
     """Get all enrollments for a user"""
     return db.query(models.Enrollment).filter(models.Enrollment.user_id == user_id).all()
@@ -109,10 +152,82 @@ def update_enrollment(db: Session, enrollment_id: int, status=None, progress=Non
     return enrollment
 
 
+def record_progress(db: Session, user_id: int, course_id: int, progress: int):
+    """
+    Raise an enrollment's progress to `progress` in one conditional UPDATE
+    (progress never goes down) and complete it at 100%, issuing the
+    certificate in the same transaction. Concurrent calls cannot lose an
+    update or issue a second certificate. Returns the updated
+    (id, progress, status) row, or None when the user is not enrolled.
+    """
+    enrollments = models.Enrollment.__table__
+    now = datetime.utcnow()
+    new_progress = func.greatest(enrollments.c.progress, progress)
+    completed = enrollments.c.status == models.EnrollmentStatus.COMPLETED
+
+    def status(value):
+        return literal(value, enrollments.c.status.type)
+
+    stmt = (
+        update(enrollments)
+        .where(enrollments.c.user_id == user_id, enrollments.c.course_id == course_id)
+        .values(
+            progress=new_progress,
+            status=case(
+                (completed, enrollments.c.status),
+                (new_progress >= 100, status(models.EnrollmentStatus.COMPLETED)),
+                (and_(enrollments.c.status == models.EnrollmentStatus.NOT_STARTED, progress > 0),
+                 status(models.EnrollmentStatus.IN_PROGRESS)),
+                else_=enrollments.c.status,
+            ),
+            completed_date=case(
+                (completed, func.coalesce(enrollments.c.completed_date, now)),
+                (new_progress >= 100, now),
+                else_=enrollments.c.completed_date,
+            ),
+            updated_at=now,
+        )
+        .returning(enrollments.c.id, enrollments.c.progress, enrollments.c.status, enrollments.c.score)
+    )
+    enrollment = db.execute(stmt).first()
+    if enrollment is not None and enrollment.status == models.EnrollmentStatus.COMPLETED:
+        issue_certificate(db, user_id, course_id, enrollment.score or 100.0)
+    db.commit()
+    return enrollment
+
+
 # ====================================================
 # 🏆 CERTIFICATE OPERATIONS
 # ====================================================
 
+def issue_certificate(db: Session, user_id: int, course_id: int, score: float) -> bool:
+    """
+    Issue the user's certificate for a course unless they already hold one:
+    INSERT ... SELECT ... ON CONFLICT (user_id, course_id) DO NOTHING, with
+    the expiry taken from the course. Returns whether a certificate was
+    created. Does not commit.
+    """
+    certificates = models.Certificate.__table__
+    courses = models.Course.__table__
+    now = datetime.utcnow()
+
+    rows = select(
+        literal(str(uuid.uuid4())),
+        literal(user_id),
+        courses.c.id,
+        literal(now, certificates.c.issue_date.type),
+        literal(now, certificates.c.expiry_date.type)
+        + func.make_interval(0, 0, 0, func.coalesce(courses.c.expiry_days, 365)),
+        literal(score, certificates.c.score.type),
+        literal(now, certificates.c.created_at.type),
+    ).where(courses.c.id == course_id)
+
+    stmt = pg_insert(certificates).from_select(
+        ["certificate_id", "user_id", "course_id", "issue_date", "expiry_date", "score", "created_at"],
+        rows,
+    ).on_conflict_do_nothing(index_elements=["user_id", "course_id"])
+    return db.execute(stmt).rowcount > 0
+
 def create_certificate(db: Session, certificate_id: str, user_id: int, course_id: int, expiry_date, score: float,
                        qr_code: str = None):
     """Create a certificate"""
@@ -160,6 +275,17 @@ def get_user_notifications(db: Session, user_id: int, unread_only: bool = False)
         query = query.filter(models.Notification.read == False)
     return query.all()
 
+
+def mark_all_notifications_read(db: Session, user_id: int) -> int:
+    """Mark every unread notification of a user as read in one UPDATE; returns rows changed"""
+    result = db.execute(
+        update(models.Notification)
+        .where(models.Notification.user_id == user_id, models.Notification.read == False)
+        .values(read=True)
+    )
+    db.commit()
+    return result.rowcount
+
 def assign_supervisor(db: Session, supervisor_id: int, member_id: int):
     """Assign a supervisor to a team member"""
     existing = db.query(models.AssignedSupervisor).filter_by(
@@ -198,3 +324,13 @@ def get_team_for_supervisor(db: Session, supervisor_id: int):
     assignments = db.query(models.AssignedSupervisor).filter_by(supervisor_id=supervisor_id).all()
     member_ids = [a.member_id for a in assignments]
     return db.query(models.User).filter(models.User.id.in_(member_ids)).all()
+
+
+def is_supervisor_of(db: Session, supervisor_id: int, member_id: int) -> bool:
+    """Check a supervisor/member assignment exists (index-only lookup)"""
+    return db.query(
+        exists().where(
+            models.AssignedSupervisor.supervisor_id == supervisor_id,
+            models.AssignedSupervisor.member_id == member_id,
+        )
+    ).scalar()
@@ -1,16 +1,351 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
-Base = declarative_base()
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from sqlalchemy.orm import sessionmaker
+import logging
 import os
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# ====================================================
+# 🏊 CONNECTION POOL CONFIG
+# ====================================================
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# The async engine (read endpoints, SSE tickets, the events LISTEN
+# connection) has its own pool. Each worker can hold up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW
+# primary connections (30 with the defaults) - keep workers x that below
+# the server's max_connections. A replica gets its own DB_POOL_SIZE + DB_MAX_OVERFLOW.
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "5"))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "5"))
+# Seconds a request waits for a pooled connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Replace connections older than this (seconds) - outlives idle firewalls/proxies
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test connections on checkout so a Postgres restart does not surface as errors
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Server-side limits in milliseconds (0 disables): per statement, and for a
+# transaction left idle by a request that stopped mid-way
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = int(os.getenv("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", "60000"))
+
+
+def postgres_options() -> str:
+    """libpq `options` string carrying the session timeouts"""
+    return (
+        f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS} "
+        f"-c idle_in_transaction_session_timeout={DB_IDLE_IN_TRANSACTION_TIMEOUT_MS}"
+    )
+
+
+def engine_options(url: str) -> dict:
+    """create_engine() keyword arguments for `url` built from the DB_* settings"""
+    options = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if not url.startswith("sqlite"):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    if url.startswith("postgresql"):
+        options["connect_args"] = {"options": postgres_options()}
+    return options
+
+
+# ====================================================
+# ⏱️ POOL CHECKOUT WAIT
+# ====================================================
+
+class CheckoutTimer:
+    """Records how long requests wait for a pooled connection"""
+
+    def __init__(self, samples: int = 1000):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+        self._recent = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def failed(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record(self, waited: float):
+        with self._lock:
+            self.checkouts += 1
+            self.max_wait = max(self.max_wait, waited)
+            self._recent.append(waited)
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))] * 1000, 2) if recent else 0.0
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_p50_ms": pct(0.50),
+            "wait_p99_ms": pct(0.99),
+            "wait_max_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+checkout_timer = CheckoutTimer()
+async_checkout_timer = CheckoutTimer()
+replica_checkout_timer = CheckoutTimer()
+
+
+class TimedPoolMixin:
+    """
+    Records how long each checkout waits (including opening a new
+    connection). Connections are still checked out lazily, on a session's
+    first statement.
+    """
+
+    timer = checkout_timer
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except SQLAlchemyTimeoutError:
+            self.timer.failed()
+            raise
+        self.timer.record(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    timer = async_checkout_timer
+
+
+class TimedReplicaQueuePool(TimedPoolMixin, QueuePool):
+    timer = replica_checkout_timer
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+# ====================================================
+# ⚡ ASYNC ENGINE (asyncpg)
+# ====================================================
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL rewritten for the asyncpg driver (libpq's sslmode becomes ssl)"""
+    parsed = make_url(url)
+    if not parsed.drivername.startswith("postgresql"):
+        return url
+    query = dict(parsed.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
+
+def async_engine_options(url: str) -> dict:
+    """engine_options() for the async engine: its own pool size, asyncpg takes timeouts as server_settings"""
+    options = engine_options(url)
+    if "poolclass" in options:
+        options.update(
+            poolclass=TimedAsyncQueuePool,
+            pool_size=DB_ASYNC_POOL_SIZE,
+            max_overflow=DB_ASYNC_MAX_OVERFLOW,
+        )
+    if "connect_args" in options:
+        options["connect_args"] = {"server_settings": {
+            "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS),
+            "idle_in_transaction_session_timeout": str(DB_IDLE_IN_TRANSACTION_TIMEOUT_MS),
+        }}
+    return options
+
+
+# Separate pool from the sync engine, sized by DB_ASYNC_POOL_SIZE/DB_ASYNC_MAX_OVERFLOW.
+# Only read endpoints (and single-statement writes such as redeeming a
+# stream ticket) use it, so it runs in AUTOCOMMIT: asyncpg then skips the
+# BEGIN/ROLLBACK round trips per request and per pre-ping.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    isolation_level="AUTOCOMMIT",
+    **async_engine_options(ASYNC_DATABASE_URL),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def _pool_counters(pool) -> dict:
+    stats = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    if hasattr(pool, "_max_overflow"):
+        stats["max_overflow"] = pool._max_overflow
+    return stats
+
+
+def pool_stats() -> dict:
+    """Connection pool occupancy (QueuePool; other pools report what they can)"""
+    stats = _pool_counters(engine.pool)
+    stats["checkout_wait"] = checkout_timer.stats()
+    stats["async"] = {
+        **_pool_counters(async_engine.pool),
+        "checkout_wait": async_checkout_timer.stats(),
+    }
+    return stats
+
+
+# ====================================================
+# 📖 READ REPLICA ROUTING
+# ====================================================
+
+# Optional replica for reporting reads; any SQLAlchemy URL (a SQLite file
+# works as a local stand-in - it is treated as never lagging)
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+# Replica is skipped while its replay lag exceeds this many seconds
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30"))
+# How long a lag/health probe result is reused before probing again
+REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "5"))
+# Seconds to wait when opening a replica connection (libpq connect_timeout,
+# whole seconds) - an unreachable replica must fail fast, not hang requests
+REPLICA_CONNECT_TIMEOUT_SECONDS = int(os.getenv("REPLICA_CONNECT_TIMEOUT_SECONDS", "2"))
+
+# Replay lag; 0 when the replica has replayed everything it received (an idle
+# primary would otherwise make the last replay timestamp look old)
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def replica_engine_options(url: str) -> dict:
+    """engine_options() for the replica: its own checkout timer and a short connect timeout"""
+    options = engine_options(url)
+    if "poolclass" in options:
+        options["poolclass"] = TimedReplicaQueuePool
+    if url.startswith("postgresql"):
+        options["connect_args"] = {**options["connect_args"], "connect_timeout": REPLICA_CONNECT_TIMEOUT_SECONDS}
+    return options
+
+
+class ReplicaRouter:
+    """
+    Hands out sessions on the replica while it is reachable and fresh
+    enough, otherwise on the primary. The probe result is cached for
+    REPLICA_CHECK_INTERVAL_SECONDS so routing adds no query per request;
+    when it expires one caller re-probes while the others keep using the
+    cached result.
+    """
+
+    def __init__(self, replica_engine, max_lag: float, check_interval: float):
+        self.engine = replica_engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sessionmaker = (
+            sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else None
+        )
+        self.replica_sessions = 0
+        self.primary_fallbacks = 0
+        self.lag_seconds = None
+        self.last_error = None
+        self._healthy = False
+        self._checked_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _probe(self) -> tuple:
+        """(lag_seconds, error); error is None when the replica is usable"""
+        try:
+            with self.engine.connect() as connection:
+                if connection.dialect.name == "postgresql":
+                    lag = float(connection.execute(REPLICA_LAG_SQL).scalar())
+                else:
+                    connection.execute(text("SELECT 1"))
+                    lag = 0.0
+        except Exception as e:
+            return None, str(e)
+        return lag, None if lag <= self.max_lag else f"replica lag {lag:.1f}s exceeds {self.max_lag}s"
+
+    def replica_usable(self) -> bool:
+        if self.engine is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            due = self._checked_at is None or now - self._checked_at >= self.check_interval
+            if not due or self._probing:
+                return self._healthy
+            self._probing = True
+
+        # Probe without the lock: a slow or unreachable replica holds up
+        # this request only, not every request routing a read
+        lag, error = self._probe()
+        with self._lock:
+            self._probing = False
+            was_healthy = self._healthy
+            self.lag_seconds, self.last_error = lag, error
+            self._healthy = error is None
+            self._checked_at = time.monotonic()
+            if was_healthy and not self._healthy:
+                logger.warning("[REPLICA] Falling back to primary: %s", error)
+            return self._healthy
+
+    def replica_session(self):
+        """A replica session when the replica is usable, else None (caller uses the primary)"""
+        if self.replica_usable():
+            with self._lock:
+                self.replica_sessions += 1
+            return self.sessionmaker()
+        if self.engine is not None:
+            with self._lock:
+                self.primary_fallbacks += 1
+        return None
+
+    def session(self):
+        """A new session for read-only work: replica when usable, else primary"""
+        return self.replica_session() or SessionLocal()
+
+    def stats(self) -> dict:
+        with self._lock:
+            replica_sessions, primary_fallbacks = self.replica_sessions, self.primary_fallbacks
+        return {
+            "configured": self.engine is not None,
+            "healthy": self._healthy,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag,
+            "replica_sessions": replica_sessions,
+            "primary_fallbacks": primary_fallbacks,
+            "last_error": self.last_error,
+            "checkout_wait": replica_checkout_timer.stats(),
+        }
+
+
+replica_engine = (
+    create_engine(REPLICA_DATABASE_URL, **replica_engine_options(REPLICA_DATABASE_URL)) if REPLICA_DATABASE_URL else None
+)
+replica_router = ReplicaRouter(replica_engine, REPLICA_MAX_LAG_SECONDS, REPLICA_CHECK_INTERVAL_SECONDS)
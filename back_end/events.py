@@ -0,0 +1,375 @@
+"""
+Server-push channel: an in-process pub/sub feeding Server-Sent Event streams.
+
+ORM inserts of Notification rows, and of Enrollment rows assigned by
+someone, are published to the affected user once the transaction commits.
+Bulk Core inserts publish explicitly through event_broker.publish().
+
+With EVENTS_PG_NOTIFY=true events travel through Postgres LISTEN/NOTIFY,
+so a client connected to any worker receives events raised by any other.
+The NOTIFYs are sent in batches on the listener's own connection, never on
+a pooled one.
+
+Browsers authenticate a stream with a single-use ticket from
+POST /api/events/ticket, so the bearer token never appears in a URL.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import secrets
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.pool import NullPool
+
+import models
+from database import ASYNC_DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# ====================================================
+# 📡 EVENT CHANNEL CONFIG
+# ====================================================
+
+# Fan events out through Postgres so every worker process sees them
+EVENTS_PG_NOTIFY = os.getenv("EVENTS_PG_NOTIFY", "false").lower() == "true"
+EVENTS_PG_CHANNEL = os.getenv("EVENTS_PG_CHANNEL", "river_events")
+# Comment line sent on idle streams so proxies and load balancers keep them open
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# Events buffered per connection; a client that falls this far behind is disconnected
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+# Open streams per worker before new ones get a 503
+SSE_MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "10000"))
+# Browsers wait this long before reconnecting a dropped stream
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "5000"))
+# Seconds a stream ticket can be redeemed after it is issued
+SSE_TICKET_TTL_SECONDS = int(os.getenv("SSE_TICKET_TTL_SECONDS", "30"))
+# NOTIFY batches waiting for the listener connection; newer batches are dropped beyond this
+EVENTS_NOTIFY_QUEUE_SIZE = int(os.getenv("EVENTS_NOTIFY_QUEUE_SIZE", "10000"))
+
+# NOTIFY payloads are limited to 8000 bytes
+PG_NOTIFY_MAX_BYTES = 7900
+
+_PING = object()
+_CLOSE = object()
+
+
+class BrokerFull(Exception):
+    """Raised when a worker already holds SSE_MAX_CONNECTIONS streams"""
+
+
+class Subscription:
+    __slots__ = ("user_id", "queue")
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+
+
+# ====================================================
+# 📬 BROKER
+# ====================================================
+
+class EventBroker:
+    """
+    Per-user fan-out to open streams. publish() may be called from any
+    thread; delivery always happens on the event loop. A single heartbeat
+    task pings every stream, so idle connections cost no timers of their own.
+    """
+
+    def __init__(self, heartbeat: float, use_pg_notify: bool, channel: str):
+        self.heartbeat = heartbeat
+        self.use_pg_notify = use_pg_notify
+        self.channel = channel
+        self.published = 0
+        self.delivered = 0
+        self.disconnected_slow = 0
+        self.notify_dropped = 0
+        self._subscribers = defaultdict(set)
+        self._connections = 0
+        self._loop = None
+        self._tasks = []
+        self._outgoing = None
+
+    # ---------- lifecycle ----------
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._outgoing = asyncio.Queue(maxsize=EVENTS_NOTIFY_QUEUE_SIZE)
+        self._tasks.append(asyncio.create_task(self._heartbeat_loop()))
+        if self.use_pg_notify:
+            self._tasks.append(asyncio.create_task(self._listen_loop()))
+        logger.info("[EVENTS] Broker started (pg_notify=%s)", self.use_pg_notify)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        # End open streams so the server can finish its graceful shutdown
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                self._close(subscription)
+        self._loop = None
+
+    # ---------- subscribers ----------
+
+    def subscribe(self, user_id: int) -> Subscription:
+        if self._connections >= SSE_MAX_CONNECTIONS:
+            raise BrokerFull()
+        subscription = Subscription(user_id)
+        self._subscribers[user_id].add(subscription)
+        self._connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscribers.get(subscription.user_id)
+        if subscriptions and subscription in subscriptions:
+            subscriptions.discard(subscription)
+            self._connections -= 1
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+
+    def _close(self, subscription: Subscription):
+        queue = subscription.queue
+        while queue.full():
+            queue.get_nowait()
+        queue.put_nowait(_CLOSE)
+
+    # ---------- publishing ----------
+
+    def publish(self, user_ids, event_type: str, data: dict):
+        """Send an event to every open stream of each user in `user_ids`"""
+        self.publish_many([(user_ids, event_type, data)])
+
+    def publish_many(self, events):
+        """
+        Publish (user_ids, event_type, data) events together: one hand-off
+        to the event loop and, with pg_notify, one NOTIFY batch.
+        """
+        events = [(list(user_ids), event_type, data) for user_ids, event_type, data in events]
+        events = [e for e in events if e[0]]
+        if not events or self._loop is None:
+            return
+        self.published += len(events)
+        if self.use_pg_notify:
+            payloads = [payload for e in events for payload in self._payloads(*e)]
+            self._loop.call_soon_threadsafe(self._queue_notify, payloads)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch_many, events)
+
+    def _dispatch_many(self, events):
+        for user_ids, event_type, data in events:
+            self._dispatch(user_ids, event_type, data)
+
+    def _dispatch(self, user_ids, event_type: str, data: dict):
+        message = f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+        for user_id in user_ids:
+            for subscription in list(self._subscribers.get(user_id, ())):
+                try:
+                    subscription.queue.put_nowait(message)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    # The client re-fetches on reconnect, so nothing is lost for good
+                    self.disconnected_slow += 1
+                    self.unsubscribe(subscription)
+                    self._close(subscription)
+
+    @staticmethod
+    def _payloads(user_ids, event_type: str, data: dict) -> list:
+        payloads = []
+        for start in range(0, len(user_ids), 500):
+            payload = json.dumps({"u": user_ids[start:start + 500], "t": event_type, "d": data}, default=str)
+            if len(payload.encode()) > PG_NOTIFY_MAX_BYTES:
+                # Oversized body: send the reference only, the client fetches the rest
+                payload = json.dumps({"u": user_ids[start:start + 500], "t": event_type,
+                                      "d": {"id": data.get("id"), "truncated": True}})
+            payloads.append(payload)
+        return payloads
+
+    def _queue_notify(self, payloads: list):
+        try:
+            self._outgoing.put_nowait(payloads)
+        except asyncio.QueueFull:
+            self.notify_dropped += len(payloads)
+            logger.warning("[EVENTS] NOTIFY queue full, dropped %s payloads", len(payloads))
+
+    def _on_notify(self, connection, pid, channel, payload):
+        message = json.loads(payload)
+        self._dispatch(message["u"], message["t"], message["d"])
+
+    # ---------- background tasks ----------
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for subscriptions in list(self._subscribers.values()):
+                for subscription in subscriptions:
+                    if not subscription.queue.full():
+                        subscription.queue.put_nowait(_PING)
+
+    async def _listen_loop(self):
+        """
+        Hold one dedicated LISTEN connection, reconnecting after failures.
+        Queued NOTIFYs are sent on the same connection.
+        """
+        listen_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+        try:
+            while True:
+                try:
+                    async with listen_engine.connect() as connection:
+                        raw = (await connection.get_raw_connection()).driver_connection
+                        lost = asyncio.Event()
+                        raw.add_termination_listener(lambda _: lost.set())
+                        await raw.add_listener(self.channel, self._on_notify)
+                        logger.info("[EVENTS] Listening on channel %s", self.channel)
+                        sender = asyncio.create_task(self._send_loop(raw, lost))
+                        try:
+                            await lost.wait()
+                        finally:
+                            sender.cancel()
+                    logger.warning("[EVENTS] LISTEN connection lost, reconnecting")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("[EVENTS] LISTEN failed: %s", e)
+                await asyncio.sleep(2)
+        finally:
+            await listen_engine.dispose()
+
+    async def _send_loop(self, raw, lost: asyncio.Event):
+        """Send everything queued since the last round trip as one pipelined batch"""
+        while True:
+            payloads = list(await self._outgoing.get())
+            while not self._outgoing.empty():
+                payloads.extend(self._outgoing.get_nowait())
+            try:
+                await raw.executemany("SELECT pg_notify($1, $2)", [(self.channel, p) for p in payloads])
+            except Exception as e:
+                # Clients re-sync on reconnect, so a lost batch is not lost for good
+                self.notify_dropped += len(payloads)
+                logger.warning("[EVENTS] NOTIFY failed: %s", e)
+                lost.set()
+                return
+
+    # ---------- streaming ----------
+
+    async def stream(self, subscription: Subscription):
+        """SSE body for one subscription; unsubscribes when the client goes away"""
+        try:
+            yield f"retry: {SSE_RETRY_MS}\nevent: ready\ndata: {{}}\n\n"
+            while True:
+                item = await subscription.queue.get()
+                if item is _CLOSE:
+                    return
+                yield ": ping\n\n" if item is _PING else item
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "connections": self._connections,
+            "users": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "disconnected_slow": self.disconnected_slow,
+            "pg_notify": self.use_pg_notify,
+            "notify_queued": self._outgoing.qsize() if self._outgoing else 0,
+            "notify_dropped": self.notify_dropped,
+            "heartbeat_seconds": self.heartbeat,
+        }
+
+
+event_broker = EventBroker(SSE_HEARTBEAT_SECONDS, EVENTS_PG_NOTIFY, EVENTS_PG_CHANNEL)
+
+
+# ====================================================
+# 🎟️ STREAM TICKETS
+# ====================================================
+
+def _ticket_hash(ticket: str) -> str:
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+
+def issue_stream_ticket(db: Session, user_id: int) -> str:
+    """
+    Single-use ticket that opens one event stream for `user_id` within
+    SSE_TICKET_TTL_SECONDS. Only its hash is stored; expired tickets are
+    purged as new ones are issued. Kept in the database so any worker can
+    redeem it.
+    """
+    now = datetime.utcnow()
+    ticket = secrets.token_urlsafe(32)
+    db.execute(delete(models.StreamTicket).where(models.StreamTicket.expires_at < now))
+    db.add(models.StreamTicket(
+        ticket_hash=_ticket_hash(ticket),
+        user_id=user_id,
+        expires_at=now + timedelta(seconds=SSE_TICKET_TTL_SECONDS),
+    ))
+    db.commit()
+    return ticket
+
+
+async def redeem_stream_ticket(db: AsyncSession, ticket: str) -> Optional[int]:
+    """User ID for a valid ticket, else None; the DELETE makes each ticket usable once"""
+    tickets = models.StreamTicket.__table__
+    user_id = (await db.execute(
+        delete(tickets)
+        .where(tickets.c.ticket_hash == _ticket_hash(ticket), tickets.c.expires_at > datetime.utcnow())
+        .returning(tickets.c.user_id)
+    )).scalar()
+    await db.commit()
+    return user_id
+
+
+# ====================================================
+# 🪝 ORM HOOKS (publish after commit)
+# ====================================================
+
+def notification_payload(notification: models.Notification) -> dict:
+    """Same shape as an item of /api/notifications/me"""
+    return {
+        "id": notification.id,
+        "title": notification.title,
+        "message": notification.message,
+        "type": notification.type,
+        "read": bool(notification.read),
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def _pending(target) -> list:
+    return object_session(target).info.setdefault("pending_events", [])
+
+
+@event.listens_for(models.Notification, "after_insert")
+def _queue_notification(mapper, connection, target):
+    _pending(target).append(([target.user_id], "notification", notification_payload(target)))
+
+
+@event.listens_for(models.Enrollment, "after_insert")
+def _queue_assignment(mapper, connection, target):
+    # Role enrollments are created by the reconciler, not assigned by a person
+    if target.assigned_by is not None:
+        _pending(target).append(([target.user_id], "assignment", {
+            "enrollment_id": target.id,
+            "course_id": target.course_id,
+            "due_date": target.due_date,
+        }))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    # One batch per transaction; with pg_notify the listener connection sends it
+    event_broker.publish_many(session.info.pop("pending_events", ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop("pending_events", None)
@@ -0,0 +1,721 @@
+"""
+Load tests and micro-benchmarks for the River Garden API.
+
+Usage:
+    python loadtest.py bcrypt --rounds 10 12 --pool-sizes 1 2 4 8
+    python loadtest.py login --base-url http://localhost:8000 --email a@b.com --password secret
+    python loadtest.py pool --pool-sizes 5 10 20 40 --concurrency 64 --query-ms 20
+    python loadtest.py http --email a@b.com --password secret --concurrency 500 --paths /api/stats/me /api/courses
+    python loadtest.py logging --lines 8 --concurrency 64 --sink /tmp/bench.log
+    python loadtest.py sse --email a@b.com --password secret --connections 5000 --hold 60 --server-pid 1234
+    python loadtest.py progress --viewers 200 --heartbeat 1 --duration 30 --course-id 1
+    python loadtest.py race --threads 50 --rounds 20 --course-id 1
+    python loadtest.py smtp-sink --messages 10000 --latency-ms 5 --fail-rate 0.01
+    python loadtest.py smtp-sink --serve --port 2525    (SMTP stand-in for SMTP_HOST=localhost SMTP_PORT=2525)
+"""
+import argparse
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ====================================================
+# 📏 HELPERS
+# ====================================================
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def report(label: str, latencies, elapsed: float, extra: str = ""):
+    """Print throughput and latency percentiles (latencies in seconds)"""
+    count = len(latencies)
+    rps = count / elapsed if elapsed > 0 else 0.0
+    print(
+        f"{label:<32} {count:>7} req  {rps:>9.1f} req/s  "
+        f"p50={percentile(latencies, 50) * 1000:7.1f}ms  "
+        f"p99={percentile(latencies, 99) * 1000:7.1f}ms  "
+        f"mean={statistics.mean(latencies) * 1000 if latencies else 0:7.1f}ms {extra}"
+    )
+
+
+def run_concurrently(fn, total: int, concurrency: int):
+    """Call fn() `total` times from `concurrency` threads; return (latencies, results, elapsed)"""
+    def timed(_):
+        started = time.perf_counter()
+        result = fn()
+        return time.perf_counter() - started, result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, range(total)))
+    elapsed = time.perf_counter() - started
+    return [o[0] for o in outcomes], [o[1] for o in outcomes], elapsed
+
+
+# ====================================================
+# 🔐 BCRYPT COST x POOL SIZE (in-process)
+# ====================================================
+
+def bench_bcrypt(args):
+    """Measure bcrypt verify throughput as cost and pool size change"""
+    from passlib.context import CryptContext
+    from passwords import PasswordPool, PasswordPoolSaturated
+
+    for rounds in args.rounds:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        hashed = context.hash("benchmark-password")
+
+        for pool_size in args.pool_sizes:
+            pool = PasswordPool(pool_size, args.queue_depth, timeout=60)
+
+            def verify():
+                try:
+                    return pool.run(context.verify, "benchmark-password", hashed)
+                except PasswordPoolSaturated:
+                    return None
+
+            latencies, results, elapsed = run_concurrently(verify, args.requests, args.concurrency)
+            rejected = sum(1 for r in results if r is None)
+            report(f"rounds={rounds} pool={pool_size}", latencies, elapsed, f"rejected={rejected}")
+
+
+# ====================================================
+# 🔑 LOGIN THROUGHPUT (HTTP)
+# ====================================================
+
+def bench_login(args):
+    """Hammer /api/auth/login and report throughput, latency and 429s"""
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def login():
+        response = session.post(
+            f"{args.base_url}/api/auth/login",
+            data={"email": args.email, "password": args.password},
+        )
+        return response.status_code
+
+    latencies, codes, elapsed = run_concurrently(login, args.requests, args.concurrency)
+    summary = " ".join(f"{code}={codes.count(code)}" for code in sorted(set(codes)))
+    report("login", latencies, elapsed, summary)
+
+
+# ====================================================
+# 🏊 DB POOL SIZE x THROUGHPUT (in-process)
+# ====================================================
+
+def bench_pool(args):
+    """
+    Run a fixed-latency query from many threads against engines with
+    different pool sizes; report throughput and pool checkout wait.
+    Uses DATABASE_URL and the DB_* settings from database.py.
+    """
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
+    from database import DATABASE_URL, engine_options
+
+    query = text("SELECT pg_sleep(:seconds)")
+    for pool_size in args.pool_sizes:
+        options = engine_options(DATABASE_URL)
+        options.update(pool_size=pool_size, max_overflow=0, pool_timeout=args.pool_timeout)
+        engine = create_engine(DATABASE_URL, **options)
+        waits = []
+
+        def request():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    waits.append(time.perf_counter() - started)
+                    connection.execute(query, {"seconds": args.query_ms / 1000})
+                return True
+            except SQLAlchemyTimeoutError:
+                return False
+
+        # Open the pool's connections first so connect cost is not measured
+        run_concurrently(request, pool_size, pool_size)
+        waits.clear()
+
+        latencies, results, elapsed = run_concurrently(request, args.requests, args.concurrency)
+        report(
+            f"pool_size={pool_size}", latencies, elapsed,
+            f"wait_p50={percentile(waits, 50) * 1000:.1f}ms wait_p99={percentile(waits, 99) * 1000:.1f}ms "
+            f"timeouts={results.count(False)}",
+        )
+        engine.dispose()
+
+
+# ====================================================
+# ⚡ READ ENDPOINTS AT HIGH CONCURRENCY (HTTP, asyncio client)
+# ====================================================
+
+def bench_http(args):
+    """
+    Log in once, then GET each path with `concurrency` simultaneous
+    clients; report req/s and p99 per path. Uses an asyncio httpx client so
+    the load generator itself can hold hundreds of requests in flight.
+    """
+    import asyncio
+    import httpx
+
+    async def run():
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+            login = await client.post("/api/auth/login", data={"email": args.email, "password": args.password})
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            for path in args.paths:
+                latencies, codes = [], []
+                remaining = iter(range(args.requests))
+
+                async def worker():
+                    for _ in remaining:
+                        started = time.perf_counter()
+                        try:
+                            response = await client.get(path, headers=headers)
+                            codes.append(response.status_code)
+                        except httpx.HTTPError as e:
+                            codes.append(type(e).__name__)
+                        latencies.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+                elapsed = time.perf_counter() - started
+                summary = " ".join(f"{code}={codes.count(code)}" for code in sorted(set(codes), key=str))
+                report(path, latencies, elapsed, summary)
+
+    asyncio.run(run())
+
+
+# ====================================================
+# 📝 LOGGING OVERHEAD PER REQUEST (in-process)
+# ====================================================
+
+class SlowSink:
+    """File wrapper whose line writes block, like stdout piped to a busy log collector"""
+
+    def __init__(self, file, delay: float):
+        self.file = file
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        # One pipe: writers queue up behind each other
+        with self._lock:
+            if "\n" in data:
+                time.sleep(self.delay)
+            return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def bench_logging(args):
+    """
+    Emit `lines` log lines per simulated request from many threads and
+    compare print(), a synchronous StreamHandler, the queued handler from
+    logging_config, and DEBUG calls with DEBUG disabled (the default).
+    """
+    import logging
+    import logging.handlers
+    import queue
+    from logging_config import LOG_QUEUE_SIZE, DroppingQueueHandler, JsonFormatter, RequestIdFilter
+
+    sink = open(args.sink, "w", buffering=1)
+    if args.sink_delay_ms:
+        sink = SlowSink(sink, args.sink_delay_ms / 1000)
+    output = logging.StreamHandler(sink)
+    output.setFormatter(JsonFormatter())
+
+    def make_logger(name, handler, level=logging.INFO):
+        logger = logging.getLogger(f"loadtest.{name}")
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(level)
+        handler.addFilter(RequestIdFilter())
+        return logger
+
+    queued = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    listener = logging.handlers.QueueListener(queued.queue, output)
+    listener.start()
+
+    sync_logger = make_logger("sync", output)
+    queued_logger = make_logger("queued", queued)
+    gated_logger = make_logger("gated", logging.NullHandler())
+    email = "bench@example.com"
+
+    modes = {
+        "print": lambda i: print(f"✅ [BENCH] User verified: {email}, line {i}", file=sink),
+        "logging sync": lambda i: sync_logger.info("[BENCH] User verified: %s, line %s", email, i),
+        "logging queued": lambda i: queued_logger.info("[BENCH] User verified: %s, line %s", email, i),
+        "logging debug (disabled)": lambda i: gated_logger.debug("[BENCH] User verified: %s, line %s", email, i),
+    }
+    for label, emit in modes.items():
+        def request():
+            for i in range(args.lines):
+                emit(i)
+
+        latencies, _, elapsed = run_concurrently(request, args.requests, args.concurrency)
+        report(label, latencies, elapsed, f"({args.lines} lines/request)")
+
+    listener.stop()
+    sink.close()
+    print(f"dropped by queued handler: {queued.dropped}")
+
+
+# ====================================================
+# 📡 SSE SOAK: IDLE CONNECTIONS x SERVER MEMORY (HTTP)
+# ====================================================
+
+def rss_bytes(pid: int) -> int:
+    """Resident set size of a local process (Linux /proc)"""
+    with open(f"/proc/{pid}/status") as status_file:
+        for line in status_file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def bench_sse(args):
+    """
+    Open `connections` event streams, hold them idle for `hold` seconds and
+    report connect latency, heartbeats received, drops and - with
+    --server-pid - the server's resident memory per connection.
+    Needs a file descriptor limit above `connections` on both ends.
+    """
+    import asyncio
+    import httpx
+
+    async def run():
+        limits = httpx.Limits(max_connections=args.connections + 1, max_keepalive_connections=0)
+        timeout = httpx.Timeout(args.timeout, read=None)
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+            login = await client.post("/api/auth/login", data={"email": args.email, "password": args.password})
+            login.raise_for_status()
+            token = login.json()["access_token"]
+
+            baseline = rss_bytes(args.server_pid) if args.server_pid else 0
+            connect_latencies, pings, failures = [], [0], []
+            ready = asyncio.Semaphore(0)
+
+            async def connection():
+                started = time.perf_counter()
+                try:
+                    async with client.stream("GET", "/api/events/stream", headers={"Authorization": f"Bearer {token}"}) as response:
+                        if response.status_code != 200:
+                            failures.append(response.status_code)
+                            ready.release()
+                            return
+                        async for line in response.aiter_lines():
+                            if line == "event: ready":
+                                connect_latencies.append(time.perf_counter() - started)
+                                ready.release()
+                            elif line.startswith(":"):
+                                pings[0] += 1
+                        failures.append("closed by server")
+                except httpx.HTTPError as e:
+                    failures.append(type(e).__name__)
+                    ready.release()
+
+            tasks = []
+            started = time.perf_counter()
+            for i in range(args.connections):
+                tasks.append(asyncio.create_task(connection()))
+                if args.ramp and i % args.ramp == args.ramp - 1:
+                    await asyncio.sleep(1)
+            for _ in range(args.connections):
+                await ready.acquire()
+            elapsed = time.perf_counter() - started
+
+            report("connect", connect_latencies, elapsed, f"failures={len(failures)}")
+            connected = rss_bytes(args.server_pid) if args.server_pid else 0
+
+            await asyncio.sleep(args.hold)
+            held = rss_bytes(args.server_pid) if args.server_pid else 0
+            alive = sum(1 for t in tasks if not t.done())
+            print(f"held {args.hold:.0f}s: {alive} streams open, {pings[0]} heartbeats received, "
+                  f"failures={dict((str(f), failures.count(f)) for f in set(failures))}")
+            if args.server_pid and connect_latencies:
+                per_connection = (held - baseline) / len(connect_latencies)
+                print(f"server RSS: baseline {baseline / 2**20:.1f} MiB, connected {connected / 2**20:.1f} MiB, "
+                      f"after hold {held / 2**20:.1f} MiB -> {per_connection / 1024:.1f} KiB per idle connection")
+
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+
+
+# ====================================================
+# 🎞️ COURSE PLAYER HEARTBEATS x DATABASE COMMITS (HTTP)
+# ====================================================
+
+def database_counters() -> tuple:
+    """
+    (committed transactions, enrollment rows updated) so far in
+    DATABASE_URL's database. Commits include the autocommit SELECT 1 of
+    each pool pre-ping, i.e. every request that touches the database.
+    """
+    from sqlalchemy import text
+    from database import engine
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_stat_clear_snapshot()"))
+        return tuple(connection.execute(text(
+            "SELECT d.xact_commit, t.n_tup_upd FROM pg_stat_database d, pg_stat_user_tables t "
+            "WHERE d.datname = current_database() AND t.relname = 'enrollments'"
+        )).one())
+
+
+def bench_progress(args):
+    """
+    `viewers` synthetic users each post a progress heartbeat every
+    `heartbeat` seconds for `duration` seconds, like CoursePlayer.js does
+    while a video plays. Reports request latency and the database's
+    commits/sec - run once against a server with PROGRESS_COALESCE_ENABLED=false
+    and once with it on. Needs DATABASE_URL for the server's database.
+    """
+    import asyncio
+    import httpx
+
+    async def run():
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+            tokens = []
+            for i in range(args.viewers):
+                email, password = f"progress-bench-{i}@example.com", "bench-password"
+                await client.post("/api/auth/register", data={
+                    "name": f"Progress Bench {i}", "email": email, "password": password, "role": "Carer",
+                })
+                login = await client.post("/api/auth/login", data={"email": email, "password": password})
+                login.raise_for_status()
+                token = login.json()["access_token"]
+                await client.post("/api/enrollments/enroll", data={"course_id": args.course_id},
+                                  headers={"Authorization": f"Bearer {token}"})
+                tokens.append(token)
+
+            latencies, errors = [], []
+
+            async def viewer(token, offset):
+                headers = {"Authorization": f"Bearer {token}"}
+                await asyncio.sleep(offset)
+                deadline = time.perf_counter() + args.duration
+                position = 0
+                while time.perf_counter() < deadline:
+                    position = min(position + 1, 99)
+                    started = time.perf_counter()
+                    response = await client.post(f"/api/enrollments/{args.course_id}/progress",
+                                                 json={"progress": position}, headers=headers)
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+                    await asyncio.sleep(max(0.0, args.heartbeat - (time.perf_counter() - started)))
+
+            commits_before, updates_before = database_counters()
+            started = time.perf_counter()
+            # Spread the viewers over one heartbeat, as real players would be
+            await asyncio.gather(*(viewer(token, args.heartbeat * i / args.viewers) for i, token in enumerate(tokens)))
+            elapsed = time.perf_counter() - started
+            # Let the server's last flush land before reading the counter
+            await asyncio.sleep(args.settle)
+            commits, updates = database_counters()
+            commits, updates = commits - commits_before, updates - updates_before
+
+            report("progress heartbeats", latencies, elapsed, f"errors={len(errors)}")
+            print(f"database commits: {commits} in {elapsed:.1f}s -> {commits / elapsed:.1f} commits/s "
+                  f"({len(latencies) / max(commits, 1):.1f} heartbeats per commit); enrollment rows updated: {updates}")
+
+    asyncio.run(run())
+
+
+# ====================================================
+# 🏁 CONCURRENT PROGRESS / COMPLETION ON ONE ENROLLMENT (in-process)
+# ====================================================
+
+def bench_race(args):
+    """
+    Reset one enrollment, then release `threads` threads at once, each
+    calling crud.record_progress with a random progress or 100 (as two
+    tabs and client retries would). After every round the enrollment must
+    be complete at 100% with exactly one certificate. Needs DATABASE_URL.
+    """
+    import models
+    import crud
+    from database import SessionLocal
+
+    db = SessionLocal()
+    email = "race-bench@example.com"
+    user = db.query(models.User).filter_by(email=email).first()
+    if user is None:
+        user = models.User(name="Race Bench", email=email, password_hash="!", role=models.UserRole.CARER)
+        db.add(user)
+        db.commit()
+    user_id = user.id
+    if db.query(models.Enrollment).filter_by(user_id=user_id, course_id=args.course_id).first() is None:
+        crud.create_enrollment(db, user_id, args.course_id)
+
+    failures = 0
+    latencies = []
+    started = time.perf_counter()
+    for round_number in range(args.rounds):
+        db.query(models.Certificate).filter_by(user_id=user_id, course_id=args.course_id).delete()
+        db.query(models.Enrollment).filter_by(user_id=user_id, course_id=args.course_id).update({
+            "progress": 0, "status": models.EnrollmentStatus.NOT_STARTED, "completed_date": None,
+        })
+        db.commit()
+
+        barrier = threading.Barrier(args.threads)
+        sent = [random.choice([random.randint(1, 99), 100]) for _ in range(args.threads)]
+
+        def hammer(value):
+            session = SessionLocal()
+            try:
+                barrier.wait()
+                began = time.perf_counter()
+                crud.record_progress(session, user_id, args.course_id, value)
+                latencies.append(time.perf_counter() - began)
+            finally:
+                session.close()
+
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(hammer, sent))
+
+        db.expire_all()
+        enrollment = db.query(models.Enrollment).filter_by(user_id=user_id, course_id=args.course_id).one()
+        certificates = db.query(models.Certificate).filter_by(user_id=user_id, course_id=args.course_id).count()
+        expected_status = models.EnrollmentStatus.COMPLETED if max(sent) >= 100 else models.EnrollmentStatus.IN_PROGRESS
+        ok = (enrollment.progress == max(sent) and enrollment.status == expected_status
+              and certificates == (1 if max(sent) >= 100 else 0))
+        if not ok:
+            failures += 1
+            print(f"round {round_number}: progress={enrollment.progress} (max sent {max(sent)}) "
+                  f"status={enrollment.status.value} certificates={certificates}")
+
+    report("record_progress", latencies, time.perf_counter() - started,
+           f"{args.rounds} rounds x {args.threads} threads, {failures} rounds failed")
+    db.close()
+
+
+# ====================================================
+# ✉️ SMTP STAND-IN x REMINDER OUTBOX (in-process)
+# ====================================================
+
+class SMTPSink:
+    """
+    Minimal SMTP server that accepts and counts messages. `latency` is
+    added per message (a remote relay); `fail_rate` of messages get a
+    451 so the outbox retries them.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.received = 0
+        self.rejected = 0
+        self.sessions = 0
+
+    async def handle(self, reader, writer):
+        import asyncio
+
+        self.sessions += 1
+        writer.write(b"220 sink ESMTP\r\n")
+        try:
+            while line := await reader.readline():
+                command = line[:4].upper()
+                if command == b"EHLO":
+                    writer.write(b"250-sink\r\n250 8BITMIME\r\n")
+                elif command == b"DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await writer.drain()
+                    while await reader.readline() not in (b".\r\n", b""):
+                        pass
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    if random.random() < self.fail_rate:
+                        self.rejected += 1
+                        writer.write(b"451 Try again later\r\n")
+                    else:
+                        self.received += 1
+                        writer.write(b"250 Queued\r\n")
+                elif command == b"QUIT":
+                    writer.write(b"221 Bye\r\n")
+                    break
+                elif command in (b"HELO", b"MAIL", b"RCPT", b"RSET", b"NOOP"):
+                    writer.write(b"250 OK\r\n")
+                else:
+                    writer.write(b"502 Not implemented\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def serve_in_thread(self, host: str, port: int):
+        """Run the sink on its own event loop in a daemon thread"""
+        import asyncio
+
+        started = threading.Event()
+
+        async def serve():
+            server = await asyncio.start_server(self.handle, host, port)
+            started.set()
+            async with server:
+                await server.serve_forever()
+
+        threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+        started.wait(5)
+
+
+def bench_smtp(args):
+    """
+    Push `messages` reminder emails through mailer.SMTPOutbox into the local
+    SMTP stand-in and report sustained messages/minute, retries and SMTP
+    sessions opened. With --serve, only run the stand-in (for a live server).
+    """
+    from mailer import SMTPOutbox
+
+    sink = SMTPSink(args.latency_ms / 1000, args.fail_rate)
+    sink.serve_in_thread(args.host, args.port)
+    if args.serve:
+        print(f"SMTP sink listening on {args.host}:{args.port} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(10)
+                print(f"received={sink.received} rejected={sink.rejected} sessions={sink.sessions}")
+        except KeyboardInterrupt:
+            return
+
+    outbox = SMTPOutbox(
+        args.host, args.port, args.pool_size, args.messages_per_connection, args.rate_per_minute,
+        max_retries=3, retry_backoff=0.5, queue_size=args.messages,
+    )
+    body = "Hi Alex,\n\nYou have outstanding training:\n  - Fire Safety\n  - Manual Handling\n"
+    started = time.perf_counter()
+    for i in range(args.messages):
+        outbox.enqueue(f"user{i}@example.com", "Training reminder: 2 outstanding courses", body)
+    enqueued = time.perf_counter() - started
+    outbox.stop(drain_seconds=args.timeout)
+    elapsed = time.perf_counter() - started
+
+    stats = outbox.stats()
+    print(f"enqueued {args.messages} in {enqueued * 1000:.0f}ms; delivered {sink.received} in {elapsed:.1f}s "
+          f"-> {sink.received / elapsed * 60:,.0f} msgs/min "
+          f"(pool={args.pool_size}, rate limit={args.rate_per_minute or 'off'}/min)")
+    print(f"retried={stats['retried']} failed={stats['failed']} smtp sessions={stats['connections_opened']} "
+          f"unsent={stats['pending']}")
+
+
+# ====================================================
+# 🚀 CLI
+# ====================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="River Garden load tests")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    bcrypt_parser = subcommands.add_parser("bcrypt", help="bcrypt cost vs password pool size")
+    bcrypt_parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12])
+    bcrypt_parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    bcrypt_parser.add_argument("--queue-depth", type=int, default=32)
+    bcrypt_parser.add_argument("--requests", type=int, default=200)
+    bcrypt_parser.add_argument("--concurrency", type=int, default=32)
+    bcrypt_parser.set_defaults(handler=bench_bcrypt)
+
+    login_parser = subcommands.add_parser("login", help="HTTP login throughput")
+    login_parser.add_argument("--base-url", default="http://localhost:8000")
+    login_parser.add_argument("--email", required=True)
+    login_parser.add_argument("--password", required=True)
+    login_parser.add_argument("--requests", type=int, default=500)
+    login_parser.add_argument("--concurrency", type=int, default=50)
+    login_parser.set_defaults(handler=bench_login)
+
+    pool_parser = subcommands.add_parser("pool", help="DB pool size vs query throughput")
+    pool_parser.add_argument("--pool-sizes", type=int, nargs="+", default=[5, 10, 20, 40])
+    pool_parser.add_argument("--query-ms", type=float, default=20)
+    pool_parser.add_argument("--pool-timeout", type=float, default=30)
+    pool_parser.add_argument("--requests", type=int, default=2000)
+    pool_parser.add_argument("--concurrency", type=int, default=64)
+    pool_parser.set_defaults(handler=bench_pool)
+
+    http_parser = subcommands.add_parser("http", help="read endpoint req/s and p99 at high concurrency")
+    http_parser.add_argument("--base-url", default="http://localhost:8000")
+    http_parser.add_argument("--email", required=True)
+    http_parser.add_argument("--password", required=True)
+    http_parser.add_argument("--paths", nargs="+", default=[
+        "/api/courses", "/api/enrollments", "/api/stats/me", "/api/notifications/me", "/api/certificates/me",
+    ])
+    http_parser.add_argument("--requests", type=int, default=5000)
+    http_parser.add_argument("--concurrency", type=int, default=500)
+    http_parser.add_argument("--timeout", type=float, default=60)
+    http_parser.set_defaults(handler=bench_http)
+
+    logging_parser = subcommands.add_parser("logging", help="per-request cost of print vs queued logging")
+    logging_parser.add_argument("--lines", type=int, default=8)
+    logging_parser.add_argument("--requests", type=int, default=20000)
+    logging_parser.add_argument("--concurrency", type=int, default=64)
+    logging_parser.add_argument("--sink", default=os.devnull, help="file the log lines are written to")
+    logging_parser.add_argument("--sink-delay-ms", type=float, default=0, help="simulate a slow stdout consumer")
+    logging_parser.set_defaults(handler=bench_logging)
+
+    sse_parser = subcommands.add_parser("sse", help="idle event-stream connections vs server memory")
+    sse_parser.add_argument("--base-url", default="http://localhost:8000")
+    sse_parser.add_argument("--email", required=True)
+    sse_parser.add_argument("--password", required=True)
+    sse_parser.add_argument("--connections", type=int, default=5000)
+    sse_parser.add_argument("--ramp", type=int, default=500, help="new connections per second (0 = all at once)")
+    sse_parser.add_argument("--hold", type=float, default=60, help="seconds to keep the streams idle")
+    sse_parser.add_argument("--server-pid", type=int, help="local server process to sample VmRSS from")
+    sse_parser.add_argument("--timeout", type=float, default=60)
+    sse_parser.set_defaults(handler=bench_sse)
+
+    progress_parser = subcommands.add_parser("progress", help="course player heartbeats vs database commits/sec")
+    progress_parser.add_argument("--base-url", default="http://localhost:8000")
+    progress_parser.add_argument("--course-id", type=int, required=True)
+    progress_parser.add_argument("--viewers", type=int, default=200)
+    progress_parser.add_argument("--heartbeat", type=float, default=1, help="seconds between heartbeats per viewer")
+    progress_parser.add_argument("--duration", type=float, default=30)
+    progress_parser.add_argument("--settle", type=float, default=3, help="seconds to wait for the last flush")
+    progress_parser.add_argument("--timeout", type=float, default=30)
+    progress_parser.set_defaults(handler=bench_progress)
+
+    race_parser = subcommands.add_parser("race", help="concurrent progress/completion on one enrollment")
+    race_parser.add_argument("--course-id", type=int, required=True)
+    race_parser.add_argument("--threads", type=int, default=50)
+    race_parser.add_argument("--rounds", type=int, default=20)
+    race_parser.set_defaults(handler=bench_race)
+
+    smtp_parser = subcommands.add_parser("smtp-sink", help="reminder email throughput into a local SMTP stand-in")
+    smtp_parser.add_argument("--host", default="127.0.0.1")
+    smtp_parser.add_argument("--port", type=int, default=2525)
+    smtp_parser.add_argument("--serve", action="store_true", help="only run the stand-in server")
+    smtp_parser.add_argument("--messages", type=int, default=10000)
+    smtp_parser.add_argument("--pool-size", type=int, default=4)
+    smtp_parser.add_argument("--messages-per-connection", type=int, default=100)
+    smtp_parser.add_argument("--rate-per-minute", type=int, default=0, help="0 = unthrottled")
+    smtp_parser.add_argument("--latency-ms", type=float, default=0, help="per-message delay at the stand-in")
+    smtp_parser.add_argument("--fail-rate", type=float, default=0, help="fraction of messages answered 451")
+    smtp_parser.add_argument("--timeout", type=float, default=120)
+    smtp_parser.set_defaults(handler=bench_smtp)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
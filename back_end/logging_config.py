@@ -0,0 +1,216 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+# ====================================================
+# 📝 LOGGING CONFIG
+# ====================================================
+
+# Default level for every logger; per-request traces are DEBUG, so off by default
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-module overrides, e.g. "main=DEBUG,sweeper=WARNING,sqlalchemy.engine=INFO"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# "json" (one object per line, for log shippers) or "text" (local development)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Records buffered for the writer thread; beyond this they are dropped, not waited on
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Applied before LOG_LEVELS. SQLAlchemy names pool loggers after the pool
+# class, so the pools defined in database.py are outside the "sqlalchemy"
+# logger it quiets itself, and would log every dispose/recreate at INFO.
+DEFAULT_LEVELS = {
+    "database.TimedQueuePool": "WARNING",
+    "database.TimedAsyncQueuePool": "WARNING",
+    "httpx": "WARNING",
+}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s"
+
+# Set per request by RequestIdMiddleware; "-" outside a request
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has - anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
+def parse_levels(spec: str) -> dict:
+    """{"main": "DEBUG", ...} from "main=DEBUG,sweeper=WARNING" (bad entries are skipped)"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip().upper() in logging.getLevelNamesMapping():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+# ====================================================
+# 🧾 FORMATTING
+# ====================================================
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request ID on each record, on the thread that logged it"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are included as top-level keys"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+# ====================================================
+# 📬 QUEUE HANDLER (non-blocking)
+# ====================================================
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without blocking the caller.
+    When the queue is full the record is dropped and counted rather than
+    stalling a request behind stdout.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Only resolve the message and traceback here; the JSON/text
+        # formatting happens on the writer thread. The record is updated in
+        # place rather than copied - this is the root logger's only handler.
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_queue_handler = None
+_lock = threading.Lock()
+
+
+def make_formatter() -> logging.Formatter:
+    if LOG_FORMAT == "text":
+        return logging.Formatter(TEXT_FORMAT)
+    return JsonFormatter()
+
+
+def configure_logging(stream=None):
+    """
+    Route the root logger through a bounded queue to a single writer
+    thread, and apply LOG_LEVEL / LOG_LEVELS. Safe to call more than once.
+    """
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            return
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(make_formatter())
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _queue_handler = DroppingQueueHandler(log_queue)
+        _queue_handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        root.handlers = [_queue_handler]
+        root.setLevel(LOG_LEVEL)
+        for name, level in {**DEFAULT_LEVELS, **parse_levels(LOG_LEVELS)}.items():
+            logging.getLogger(name).setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        if _queue_handler.dropped:
+            print(f"⚠️  [LOGGING] Dropped {_queue_handler.dropped} records (queue full)", file=sys.stderr)
+
+
+def logging_stats() -> dict:
+    return {
+        "level": LOG_LEVEL,
+        "overrides": parse_levels(LOG_LEVELS),
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+    }
+
+
+# ====================================================
+# 🪪 REQUEST ID MIDDLEWARE
+# ====================================================
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware: takes X-Request-ID from the client (or generates
+    one), exposes it to log records and echoes it on the response.
+    """
+
+    header = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == self.header:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (self.header, request_id.encode("latin-1"))]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,288 @@
+import heapq
+import itertools
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+
+logger = logging.getLogger(__name__)
+
+# ====================================================
+# ✉️ SMTP OUTBOX CONFIG
+# ====================================================
+
+# Outbound email is off unless SMTP_HOST is set (notifications are still created)
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_FROM = os.getenv("SMTP_FROM", "training@rivergarden.local")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+# Sender threads, each holding one SMTP connection
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+# Messages sent over one SMTP session before it is closed and reopened
+SMTP_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MESSAGES_PER_CONNECTION", "100"))
+# Across all sender threads; 0 disables pacing
+SMTP_RATE_PER_MINUTE = int(os.getenv("SMTP_RATE_PER_MINUTE", "12000"))
+# Attempts after the first for transient failures (4xx, dropped connections)
+SMTP_MAX_RETRIES = int(os.getenv("SMTP_MAX_RETRIES", "3"))
+SMTP_RETRY_BACKOFF_SECONDS = float(os.getenv("SMTP_RETRY_BACKOFF_SECONDS", "5"))
+SMTP_QUEUE_SIZE = int(os.getenv("SMTP_QUEUE_SIZE", "100000"))
+# Idle sender threads close their connection after this long
+SMTP_IDLE_SECONDS = 10
+
+
+def build_message(to: str, subject: str, body: str, sender: str = SMTP_FROM) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = to
+    message["Subject"] = subject
+    message["Date"] = formatdate(localtime=False)
+    # Explicit domain - make_msgid() would otherwise resolve the host's FQDN per message
+    message["Message-ID"] = make_msgid(domain=sender.rpartition("@")[2] or "localhost")
+    message.set_content(body)
+    return message
+
+
+# ====================================================
+# ⏱️ RATE LIMIT
+# ====================================================
+
+class RateLimiter:
+    """Spaces calls evenly to at most `per_minute`, shared by every thread"""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ====================================================
+# 📮 OUTBOX
+# ====================================================
+
+class _Outgoing:
+    __slots__ = ("to", "subject", "body", "attempts")
+
+    def __init__(self, to: str, subject: str, body: str):
+        self.to = to
+        self.subject = subject
+        self.body = body
+        self.attempts = 0
+
+
+class SMTPOutbox:
+    """
+    In-memory queue drained by a small pool of sender threads. Each thread
+    keeps its SMTP session open across messages (up to
+    messages_per_connection), so connect/EHLO/STARTTLS/AUTH is paid once
+    per batch rather than per email. Transient failures are retried with
+    linear backoff; permanent (5xx) rejections are counted and dropped.
+    Queued mail does not survive a restart - the Notification rows do.
+    """
+
+    def __init__(self, host, port, pool_size, messages_per_connection, rate_per_minute,
+                 max_retries, retry_backoff, queue_size, username=None, password=None, starttls=False):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.messages_per_connection = messages_per_connection
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.rate = RateLimiter(rate_per_minute)
+        self.rate_per_minute = rate_per_minute
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._retries = []  # heap of (due, seq, item)
+        self._retry_seq = itertools.count()
+        self._retry_lock = threading.Lock()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._in_flight = 0
+        self._counter_lock = threading.Lock()
+
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected_full = 0
+        self.connections = 0
+
+    def _count(self, name: str):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.host)
+
+    # ---------- producer side ----------
+
+    def enqueue(self, to: str, subject: str, body: str) -> bool:
+        """
+        Queue one plain-text email; False when the outbox is disabled or
+        full. The MIME message is built on the sender thread, off the
+        request path.
+        """
+        if not self.enabled:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(_Outgoing(to, subject, body))
+        except queue.Full:
+            self._count("rejected_full")
+            return False
+        self._count("queued")
+        return True
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._threads or self._stopping.is_set():
+                return
+            for i in range(self.pool_size):
+                thread = threading.Thread(target=self._worker, name=f"smtp-sender-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, drain_seconds: float = 10):
+        """Give queued mail up to `drain_seconds` to go out, then stop the senders"""
+        deadline = time.monotonic() + drain_seconds
+        while self.pending() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout=SMTP_TIMEOUT)
+        self._threads.clear()
+        if self.pending():
+            logger.warning("[SMTP] Stopped with %s messages unsent", self.pending())
+
+    def pending(self) -> int:
+        with self._retry_lock:
+            retries = len(self._retries)
+        return self._queue.qsize() + retries + self._in_flight
+
+    # ---------- sender threads ----------
+
+    def _take(self, timeout: float):
+        """Next due retry, else the next queued message, else None after `timeout`"""
+        with self._retry_lock:
+            if self._retries and self._retries[0][0] <= time.monotonic():
+                return heapq.heappop(self._retries)[2]
+            if self._retries:
+                timeout = min(timeout, self._retries[0][0] - time.monotonic())
+        try:
+            return self._queue.get(timeout=max(timeout, 0.01))
+        except queue.Empty:
+            return None
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        if self.starttls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        self._count("connections")
+        return smtp
+
+    def _worker(self):
+        smtp, sent_on_connection, idle_since = None, 0, time.monotonic()
+        while not self._stopping.is_set():
+            item = self._take(timeout=1.0)
+            if item is None:
+                if smtp and time.monotonic() - idle_since > SMTP_IDLE_SECONDS:
+                    smtp = self._close(smtp)
+                continue
+
+            with self._counter_lock:
+                self._in_flight += 1
+            try:
+                self.rate.wait()
+                if smtp is None:
+                    smtp, sent_on_connection = self._connect(), 0
+                smtp.send_message(build_message(item.to, item.subject, item.body))
+                self._count("sent")
+                sent_on_connection += 1
+                if sent_on_connection >= self.messages_per_connection:
+                    smtp = self._close(smtp)
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                if self._is_transient(e):
+                    self._retry(item, e)
+                else:
+                    self._count("failed")
+                    logger.warning("[SMTP] Rejected %s: %s", item.to, e)
+            except (smtplib.SMTPException, OSError) as e:
+                # Connection-level trouble: drop the session and retry on a fresh one
+                smtp = self._close(smtp)
+                self._retry(item, e)
+            finally:
+                with self._counter_lock:
+                    self._in_flight -= 1
+                idle_since = time.monotonic()
+        self._close(smtp)
+
+    @staticmethod
+    def _is_transient(error) -> bool:
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(400 <= code < 500 for code, _ in error.recipients.values())
+        return 400 <= getattr(error, "smtp_code", 500) < 500
+
+    def _retry(self, item: _Outgoing, error):
+        item.attempts += 1
+        if item.attempts > self.max_retries:
+            self._count("failed")
+            logger.warning("[SMTP] Giving up on %s after %s attempts: %s",
+                           item.to, item.attempts, error)
+            return
+        self._count("retried")
+        due = time.monotonic() + self.retry_backoff * item.attempts
+        with self._retry_lock:
+            heapq.heappush(self._retries, (due, next(self._retry_seq), item))
+
+    @staticmethod
+    def _close(smtp):
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queued": self.queued,
+            "pending": self.pending(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "rejected_queue_full": self.rejected_full,
+            "connections_opened": self.connections,
+            "senders": len(self._threads),
+            "rate_per_minute": self.rate_per_minute,
+        }
+
+
+smtp_outbox = SMTPOutbox(
+    SMTP_HOST, SMTP_PORT, SMTP_POOL_SIZE, SMTP_MESSAGES_PER_CONNECTION, SMTP_RATE_PER_MINUTE,
+    SMTP_MAX_RETRIES, SMTP_RETRY_BACKOFF_SECONDS, SMTP_QUEUE_SIZE,
+    username=SMTP_USERNAME, password=SMTP_PASSWORD, starttls=SMTP_STARTTLS,
+)
@@ -1,24 +1,47 @@
+import asyncio
+import hashlib
+import json
+import logging
 import os
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException, status, Form
+from fastapi import FastAPI, Body, Depends, HTTPException, status, File, Form, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from fastapi.middleware.cors import CORSMiddleware
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from seed_data import seed_courses
-from database import SessionLocal, engine
+from database import AsyncSessionLocal, SessionLocal, async_engine, engine, replica_router
 import models
 import crud
-from fastapi import FastAPI, Depends, HTTPException, status, Form, Body
-from datetime import datetime, timedelta
-import uuid
-
+import reconciler
+import reminders
+import reports
+import certificate_export
+from certificate_pdf import certificate_digest, certificate_pdf, pdf_cache
+from cache import CACHES, catalogue_cache, dashboard_cache, load_principal, remember_principal
+from passwords import PasswordPoolSaturated, hash_password_async, verify_and_update_password_async
+from sweeper import OVERDUE_SWEEP_ENABLED, overdue_sweeper
+from events import SSE_TICKET_TTL_SECONDS, BrokerFull, event_broker, issue_stream_ticket, redeem_stream_ticket
+from mailer import smtp_outbox
+from progress_buffer import (
+    PROGRESS_COALESCE_ENABLED, PROGRESS_FLUSH_INTERVAL_SECONDS, ProgressBacklogFull, buffered_status, enrollment_status,
+    known_enrollments, progress_buffer,
+)
+from startup import initial_reconcile, readiness, startup_state, warm_up
 from schemas import UserStats, ComplianceData, CertificateResponse, EnrollmentResponse
+from logging_config import RequestIdMiddleware, configure_logging, logging_stats
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # ====================================================
 # 🔐 SECURITY CONFIG
@@ -28,14 +51,17 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 3000
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# The event stream also accepts a ?ticket= (see POST /api/events/ticket)
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
 # ====================================================
 # 📦 DATABASE SETUP
 # ====================================================
 
 models.Base.metadata.create_all(bind=engine)
+models.remove_duplicates_for_unique_indexes(engine)
+models.create_missing_indexes(engine)
 
 
 def get_db():
@@ -46,31 +72,40 @@ def get_db():
         db.close()
 
 
+def get_read_db(db: Session = Depends(get_db)):
+    """
+    Session for reporting reads: the replica when configured and within
+    REPLICA_MAX_LAG_SECONDS, otherwise the request's own get_db session -
+    a second primary session would hold two pooled connections per request.
+    Authenticate with get_db.
+    """
+    read_db = replica_router.replica_session()
+    if read_db is None:
+        yield db
+        return
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+
+async def get_async_db():
+    """AsyncSession on the asyncpg engine, for `async def` read endpoints"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # ====================================================
 # 🔐 SECURITY FUNCTIONS
 # ====================================================
 
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt"""
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Verify plain password against hashed password
-    ✅ HANDLES BOTH bcrypt hashes AND plain text (for migration)
-    """
-    try:
-        # Try bcrypt verification first
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception as e:
-        # If bcrypt fails, try plain text comparison (for old data)
-        print(f"⚠️  Bcrypt verification failed: {e}")
-        print(f"⚠️  Attempting plain text comparison...")
-        is_match = plain_password == hashed_password
-        if is_match:
-            print(f"✅ Plain text password matched (old data)")
-        return is_match
+def password_pool_busy() -> HTTPException:
+    """429 returned when the bcrypt pool cannot admit more work"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many sign-in requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -92,26 +127,68 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("🚀 FastAPI server starting...")
+    logger.info("FastAPI server starting...")
 
     # Seed courses on startup
     db = SessionLocal()
     try:
-        print("📚 Seeding courses into database...")
+        logger.info("Seeding courses into database...")
         seed_courses(db)
-        print("✅ Database seeding completed")
+        logger.info("Database seeding completed")
+        startup_state["seeded"] = True
     except Exception as e:
-        print(f"⚠️  Error during seeding: {e}")
+        logger.exception("Error during seeding: %s", e)
+    finally:
+        db.close()
+
+    # Pay one-off import/compile costs here rather than on the first requests
+    db = SessionLocal()
+    try:
+        warm_up(db)
     finally:
         db.close()
 
+    if OVERDUE_SWEEP_ENABLED:
+        overdue_sweeper.start()
+    if PROGRESS_COALESCE_ENABLED:
+        progress_buffer.start()
+    await event_broker.start()
+    # Full sweep catches role enrollments missed while the app was down
+    reconcile_task = asyncio.create_task(initial_reconcile())
+
     yield
 
-    print("🛑 FastAPI server shutting down...")
+    logger.info("FastAPI server shutting down...")
+    reconcile_task.cancel()
+    await event_broker.stop()
+    await overdue_sweeper.stop()
+    # Write heartbeats still buffered in memory
+    await progress_buffer.stop()
+    # Let queued reminder emails go out before the process exits
+    await asyncio.to_thread(smtp_outbox.stop)
+    certificate_export.shutdown_pool()
+    await async_engine.dispose()
 
 
 app = FastAPI(title="River Garden API", lifespan=lifespan)
 
+
+def database_busy_error() -> HTTPException:
+    """503 returned when no pooled connection frees up within DB_POOL_TIMEOUT"""
+    logger.warning("[DB] Timed out waiting for a pooled connection")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Database busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(SQLAlchemyTimeoutError)
+async def database_busy(request: Request, exc: SQLAlchemyTimeoutError):
+    """Pool timeouts that escape a handler also become a retryable 503"""
+    error = database_busy_error()
+    return JSONResponse(status_code=error.status_code, content={"detail": error.detail}, headers=error.headers)
+
 # ✅ CORS MIDDLEWARE
 app.add_middleware(
     CORSMiddleware,
@@ -126,8 +203,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Export-Id", "X-Request-ID"],
 )
 
+# Outermost, so every log line of a request (and its response) carries the ID
+app.add_middleware(RequestIdMiddleware)
+
 
 def verify_token(token: str, db: Session):
     """
@@ -140,35 +221,44 @@ def verify_token(token: str, db: Session):
         email: str = payload.get("sub")
 
         if email is None:
-            print(f"❌ [TOKEN] No email in token payload")
+            logger.debug("[TOKEN] No email in token payload")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        print(f"✅ [TOKEN] Token decoded successfully, email: {email}")
+        logger.debug("[TOKEN] Token decoded successfully, email: %s", email)
 
     except JWTError as e:
-        print(f"❌ [TOKEN] JWT decode error: {str(e)}")
+        logger.debug("[TOKEN] JWT decode error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Get user from database
-    user = crud.get_user_by_email(db, email=email)
+    # Serve the principal from the in-process cache when possible
+    user = load_principal(db, email)
+    if user is not None:
+        return user
+
+    # Cache miss - get user from database (usually a request's first checkout)
+    try:
+        user = crud.get_user_by_email(db, email=email)
+    except SQLAlchemyTimeoutError:
+        raise database_busy_error()
 
     if user is None:
-        print(f"❌ [TOKEN] User not found: {email}")
+        logger.debug("[TOKEN] User not found: %s", email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    print(f"✅ [TOKEN] User verified: {user.email}, Role: {user.role}")
+    remember_principal(user)
+    logger.debug("[TOKEN] User verified: %s, Role: %s", user.email, user.role)
     return user
 
 
@@ -181,8 +271,18 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     return verify_token(token, db)
 
 
+async def verify_token_async(token: str, db: AsyncSession):
+    """verify_token() on an AsyncSession - same principal cache and checks"""
+    return await db.run_sync(lambda session: verify_token(token, session))
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """Return the currently authenticated user (async endpoints)."""
+    return await verify_token_async(token, db)
+
+
 @app.post("/api/auth/register")
-def register(
+async def register(
         name: str = Form(...),
         email: str = Form(...),
         password: str = Form(...),
@@ -194,36 +294,45 @@ def register(
     Register a new user
     """
 
-    print(f"📝 [REGISTER] Received request: name={name}, email={email}, role={role}")
+    logger.debug("[REGISTER] Received request: name=%s, email=%s, role=%s", name, email, role)
 
     try:
         # ✅ Check if user already exists
-        existing_user = crud.get_user_by_email(db, email=email)
+        # Database work runs on the threadpool; bcrypt is awaited on the
+        # password pool, so no request thread is held while hashing
+        existing_user = await run_in_threadpool(crud.get_user_by_email, db, email=email)
         if existing_user:
-            print(f"❌ [REGISTER] Email already exists: {email}")
+            logger.debug("[REGISTER] Email already exists: %s", email)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
 
         # ✅ Hash password with bcrypt
-        hashed_password = hash_password(password)
-        print(f"✅ [REGISTER] Password hashed successfully")
+        try:
+            hashed_password = await hash_password_async(password)
+        except PasswordPoolSaturated:
+            logger.warning("[REGISTER] Password pool saturated, rejecting: %s", email)
+            raise password_pool_busy()
+        logger.debug("[REGISTER] Password hashed successfully")
 
         # ✅ Create new user
-        new_user = models.User(
-            name=name,
-            email=email,
-            password_hash=hashed_password,
-            role=role,
-            branch=branch
-        )
+        def create_user():
+            user = models.User(
+                name=name,
+                email=email,
+                password_hash=hashed_password,
+                role=role,
+                branch=branch
+            )
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+            return user
 
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        new_user = await run_in_threadpool(create_user)
 
-        print(f"✅ [REGISTER] User created successfully: ID={new_user.id}, Email={new_user.email}")
+        logger.info("[REGISTER] User created successfully: ID=%s, Email=%s", new_user.id, new_user.email)
 
         response = {
             "message": "✅ User registered successfully",
@@ -235,14 +344,14 @@ def register(
             }
         }
 
-        print(f"✅ [REGISTER] Sending response: {response}")
+        logger.debug("[REGISTER] Sending response: %s", response)
         return response
 
     except HTTPException as e:
-        print(f"❌ [REGISTER] HTTP Exception: {e.detail}")
+        logger.debug("[REGISTER] HTTP Exception: %s", e.detail)
         raise e
     except Exception as e:
-        print(f"❌ [REGISTER] Unexpected error: {str(e)}")
+        logger.exception("[REGISTER] Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Server error: {str(e)}"
@@ -254,7 +363,7 @@ def register(
 # ====================================================
 
 @app.post("/api/auth/login")
-def login(
+async def login(
         email: str = Form(...),
         password: str = Form(...),
         db: Session = Depends(get_db)
@@ -262,16 +371,19 @@ def login(
     """
     Login user and return JWT token
     ✅ Handles both new bcrypt passwords and old plain text passwords
+    ✅ Re-hashes legacy/outdated hashes on successful login
     """
 
-    print(f"🔑 [LOGIN] Received request: email={email}")
+    logger.debug("[LOGIN] Received request: email=%s", email)
 
     try:
         # ✅ Find user by email
-        db_user = crud.get_user_by_email(db, email=email)
+        # Database work runs on the threadpool; bcrypt is awaited on the
+        # password pool, so no request thread is held while verifying
+        db_user = await run_in_threadpool(crud.get_user_by_email, db, email=email)
 
         if not db_user:
-            print(f"❌ [LOGIN] User not found: {email}")
+            logger.warning("[LOGIN] User not found: %s", email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password",
@@ -279,20 +391,36 @@ def login(
             )
 
         # ✅ Verify password (handles both bcrypt and plain text)
-        if not verify_password(password, db_user.password_hash):
-            print(f"❌ [LOGIN] Password incorrect for: {email}")
+        try:
+            password_ok, upgraded_hash = await verify_and_update_password_async(password, db_user.password_hash)
+        except PasswordPoolSaturated:
+            logger.warning("[LOGIN] Password pool saturated, rejecting: %s", email)
+            raise password_pool_busy()
+
+        if not password_ok:
+            logger.warning("[LOGIN] Password incorrect for: %s", email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        print(f"✅ [LOGIN] Password verified for: {email}")
+        logger.debug("[LOGIN] Password verified for: %s", email)
 
-        # ✅ Update last login time
-        db_user.last_login = datetime.utcnow()
-        db.commit()
-        print(f"✅ [LOGIN] Last login time updated")
+        def record_login():
+            # ✅ Upgrade plain-text or outdated bcrypt hashes in place
+            if upgraded_hash:
+                db_user.password_hash = upgraded_hash
+                logger.info("[LOGIN] Password hash upgraded for: %s", email)
+
+            # ✅ Update last login time
+            db_user.last_login = datetime.utcnow()
+            db.commit()
+            # Reload the expired attributes here, not on the event loop
+            db.refresh(db_user)
+            logger.debug("[LOGIN] Last login time updated")
+
+        await run_in_threadpool(record_login)
 
         # ✅ Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -312,14 +440,14 @@ def login(
             }
         }
 
-        print(f"✅ [LOGIN] Token created and sending response")
+        logger.debug("[LOGIN] Token created and sending response")
         return response
 
     except HTTPException as e:
-        print(f"❌ [LOGIN] HTTP Exception: {e.detail}")
+        logger.debug("[LOGIN] HTTP Exception: %s", e.detail)
         raise e
     except Exception as e:
-        print(f"❌ [LOGIN] Unexpected error: {str(e)}")
+        logger.exception("[LOGIN] Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Server error: {str(e)}"
@@ -330,79 +458,67 @@ def login(
 # 📚 GET COURSES FILTERED BY USER ROLE + ENROLLMENTS
 # ====================================================
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header matches `etag`"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
 @app.get("/api/courses")
-def get_courses(
+async def get_courses(
+        request: Request,
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get courses assigned to the user's role + courses specifically assigned via enrollment
     - Returns courses where user's role is in assigned_roles
     - PLUS courses where user has an enrollment (supervisor-assigned)
+    - Served from the catalogue cache with a strong ETag; answers If-None-Match with 304
     """
     try:
-        print("📚 [COURSES] Fetching courses for user...")
+        logger.debug("[COURSES] Fetching courses for user...")
 
-        user = verify_token(token, db)
-        print(f"✅ [COURSES] User verified: {user.email}, Role: {user.role}")
+        user = await verify_token_async(token, db)
+        logger.debug("[COURSES] User verified: %s, Role: %s", user.email, user.role)
 
-        # Get all courses
-        all_courses = db.query(models.Course).all()
-        print(f"📚 [COURSES] Total courses in database: {len(all_courses)}")
+        role = user.role.value if hasattr(user.role, 'value') else str(user.role)
 
-        # Get user's enrollments to find specifically assigned courses
-        user_enrollments = db.query(models.Enrollment).filter(
-            models.Enrollment.user_id == user.id
-        ).all()
-        enrolled_course_ids = [e.course_id for e in user_enrollments]
-        print(f"📚 [COURSES] User has {len(enrolled_course_ids)} enrollments")
-
-        # Filter courses: role-based OR specifically enrolled
-        user_courses = []
-        seen_ids = set()
-
-        for course in all_courses:
-            # Check if user's role is in assigned_roles OR user is enrolled
-            if user.role in course.assigned_roles or course.id in enrolled_course_ids:
-                if course.id not in seen_ids:  # Avoid duplicates
-                    user_courses.append(course)
-                    seen_ids.add(course.id)
-                    reason = "role-based" if user.role in course.assigned_roles else "enrolled"
-                    print(f"✅ [COURSES] Adding course '{course.title}' ({reason})")
-
-        print(f"✅ [COURSES] User has {len(user_courses)} total courses")
-
-        # Convert to dict for JSON response
-        courses_data = [
-            {
-                "id": c.id,
-                "title": c.title,
-                "description": c.description,
-                "category": c.category.value if hasattr(c.category, 'value') else str(c.category),
-                "difficulty": c.difficulty.value if hasattr(c.difficulty, 'value') else str(c.difficulty),
-                "duration": c.duration,
-                "modules": c.modules,
-                "thumbnail": c.thumbnail,
-                "expiry_days": c.expiry_days,
-                "assigned_roles": c.assigned_roles,
-                "video_url": c.video_url,
-                "delivery_type": c.delivery_type.value if hasattr(c.delivery_type, 'value') else str(c.delivery_type),
-                "meeting_url": c.meeting_url,
-                "meeting_platform": c.meeting_platform,
-            }
-            for c in user_courses
-        ]
+        # Role-based courses come from the cached per-role snapshot, plus
+        # specifically enrolled courses outside the role (one query on a miss)
+        catalogue, extras = await db.run_sync(catalogue_cache.for_user, role, user.id)
+
+        # Strong ETag derived from the content of every snapshot served
+        if extras:
+            combined = catalogue.digest + "".join(e.digest for e in extras)
+            etag = f'"{hashlib.sha256(combined.encode()).hexdigest()[:32]}"'
+        else:
+            etag = f'"{catalogue.digest}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            logger.debug("[COURSES] Not modified (%s)", etag)
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if not extras:
+            logger.debug("[COURSES] Returning %s courses", len(catalogue.courses))
+            return Response(content=catalogue.body, media_type="application/json", headers=headers)
 
-        print(f"✅ [COURSES] Returning {len(courses_data)} courses")
-        return courses_data
+        courses_data = sorted(
+            catalogue.courses + [e.courses[0] for e in extras],
+            key=lambda c: c["id"]
+        )
+
+        logger.debug("[COURSES] Returning %s courses", len(courses_data))
+        return JSONResponse(content=courses_data, headers=headers)
 
     except HTTPException as e:
-        print(f"❌ [COURSES] Auth error: {e.detail}")
+        logger.debug("[COURSES] Auth error: %s", e.detail)
         raise e
     except Exception as e:
-        print(f"❌ [COURSES] Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[COURSES] Error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching courses: {str(e)}"
@@ -423,27 +539,27 @@ def get_team_members(
     Only Team Leaders and Care Managers can see their team
     """
     try:
-        print("👥 [TEAM] Fetching team members...")
+        logger.debug("[TEAM] Fetching team members...")
 
         user = verify_token(token, db)
 
         # Check if user is a manager/supervisor
         allowed_roles = ["Team Leader", "Care Manager", "Admin", "Director"]
         if user.role not in allowed_roles:
-            print(f"❌ [TEAM] Unauthorized: {user.role} cannot view team")
+            logger.debug("[TEAM] Unauthorized: %s cannot view team", user.role)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only managers can view team members"
             )
 
-        print(f"✅ [TEAM] User authorized: {user.role}")
+        logger.debug("[TEAM] User authorized: %s", user.role)
 
         # Get team members (users managed by this person)
         team_members = db.query(models.User).filter(
             models.User.manager_id == user.id
         ).all()
 
-        print(f"✅ [TEAM] Found {len(team_members)} team members")
+        logger.debug("[TEAM] Found %s team members", len(team_members))
 
         members_data = [
             {
@@ -461,10 +577,10 @@ def get_team_members(
         return members_data
 
     except HTTPException as e:
-        print(f"❌ [TEAM] Error: {e.detail}")
+        logger.debug("[TEAM] Error: %s", e.detail)
         raise e
     except Exception as e:
-        print(f"❌ [TEAM] Error: {str(e)}")
+        logger.exception("[TEAM] Error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching team members: {str(e)}"
@@ -483,7 +599,7 @@ def get_team_member(
 ):
     """Get details of a specific team member"""
     try:
-        print(f"👥 [TEAM] Fetching member {member_id}...")
+        logger.debug("[TEAM] Fetching member %s...", member_id)
 
         user = verify_token(token, db)
 
@@ -527,12 +643,17 @@ def get_team_member(
 
 @app.get("/api/stats/team")
 def get_team_stats(
+        breakdown: bool = False,
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        read_db: Session = Depends(get_read_db)
 ):
-    """Get team statistics for managers"""
+    """
+    Get team statistics for managers
+    - breakdown=true adds per-member and per-course-category figures
+    """
     try:
-        print("📊 [TEAM STATS] Fetching team stats...")
+        logger.debug("[TEAM STATS] Fetching team stats...")
 
         user = verify_token(token, db)
 
@@ -543,45 +664,16 @@ def get_team_stats(
                 detail="Only managers can view team stats"
             )
 
-        # Get team members
-        team_members = db.query(models.User).filter(
-            models.User.manager_id == user.id
-        ).all()
-
-        team_size = len(team_members)
-
-        # Calculate compliance stats
-        total_enrollments = 0
-        completed_enrollments = 0
-        overdue_enrollments = 0
-        total_hours = 0
+        # One aggregate over users LEFT JOIN enrollments (no per-member queries)
+        stats = reports.team_stats(read_db, user.id, breakdown=breakdown)
 
-        for member in team_members:
-            enrollments = db.query(models.Enrollment).filter(
-                models.Enrollment.user_id == member.id
-            ).all()
-
-            total_enrollments += len(enrollments)
-            completed_enrollments += len([e for e in enrollments if e.status == models.EnrollmentStatus.COMPLETED])
-            overdue_enrollments += len([e for e in enrollments if e.status == models.EnrollmentStatus.OVERDUE])
-            total_hours += len([e for e in enrollments if e.status == models.EnrollmentStatus.COMPLETED])
-
-        avg_compliance = (completed_enrollments / total_enrollments * 100) if total_enrollments > 0 else 0
-
-        stats = {
-            "team_size": team_size,
-            "avg_compliance": round(avg_compliance),
-            "total_hours": total_hours,
-            "overdue_count": overdue_enrollments,
-        }
-
-        print(f"✅ [TEAM STATS] Stats: {stats}")
+        logger.debug("[TEAM STATS] Stats: %s", stats)
         return stats
 
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [TEAM STATS] Error: {str(e)}")
+        logger.exception("[TEAM STATS] Error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching team stats: {str(e)}"
@@ -600,7 +692,7 @@ def get_member_enrollments(
 ):
     """Get enrollments for a specific team member"""
     try:
-        print(f"📝 [TEAM] Fetching enrollments for member {member_id}...")
+        logger.debug("[TEAM] Fetching enrollments for member %s...", member_id)
 
         user = verify_token(token, db)
 
@@ -650,7 +742,7 @@ def assign_course_to_member(
 ):
     """Assign a course to a team member"""
     try:
-        print(f"🎓 [ASSIGN] Assigning course {course_id} to member {member_id}...")
+        logger.debug("[ASSIGN] Assigning course %s to member %s...", course_id, member_id)
 
         user = verify_token(token, db)
 
@@ -684,7 +776,7 @@ def assign_course_to_member(
         ).first()
 
         if existing:
-            print(f"⚠️  [ASSIGN] Already enrolled")
+            logger.warning("[ASSIGN] Already enrolled")
             return {"message": "Member already enrolled in this course"}
 
         # Create enrollment
@@ -699,13 +791,13 @@ def assign_course_to_member(
         db.commit()
         db.refresh(enrollment)
 
-        print(f"✅ [ASSIGN] Course assigned successfully")
+        logger.info("[ASSIGN] Course assigned successfully")
         return {"message": "Course assigned successfully", "enrollment_id": enrollment.id}
 
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [ASSIGN] Error: {str(e)}")
+        logger.exception("[ASSIGN] Error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error assigning course: {str(e)}"
@@ -718,13 +810,18 @@ def assign_course_to_member(
 
 @app.post("/api/team/send-reminders")
 def send_team_reminders(
-        member_ids: list = [],
+        member_ids: List[int] = Body(default=[], embed=True),
+        all_overdue: bool = Body(default=False, embed=True),
         token: str = Depends(oauth2_scheme),
         db: Session = Depends(get_db)
 ):
-    """Send training reminders to team members"""
+    """
+    Send training reminders to team members: those in `member_ids`, or with
+    `all_overdue` every member of the caller's team with an overdue course.
+    Each gets an in-app notification now and an email via the SMTP outbox.
+    """
     try:
-        print(f"📢 [REMINDERS] Sending reminders...")
+        logger.debug("[REMINDERS] Sending reminders...")
 
         user = verify_token(token, db)
 
@@ -735,16 +832,26 @@ def send_team_reminders(
                 detail="Only managers can send reminders"
             )
 
-        # TODO: Implement email/SMS reminder logic here
-        # For now, just return success
+        if not member_ids and not all_overdue:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Provide member_ids or set all_overdue"
+            )
+
+        result = reminders.send_reminders(db, user, member_ids=member_ids, all_overdue=all_overdue)
 
-        print(f"✅ [REMINDERS] Reminders sent to {len(member_ids)} members")
-        return {"message": "Reminders sent successfully", "count": len(member_ids)}
+        return {
+            "message": "Reminders sent successfully",
+            "count": result["notified"],
+            "emails_queued": result["emails_queued"],
+            # Requested members who are not on the caller's team or have nothing outstanding
+            "skipped": 0 if all_overdue else len(set(member_ids)) - result["notified"],
+        }
 
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [REMINDERS] Error: {str(e)}")
+        logger.exception("[REMINDERS] Error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error sending reminders: {str(e)}"
@@ -843,23 +950,22 @@ def get_supervisor_member_enrollments(
             )
 
         # Verify the member is assigned to this supervisor
-        team = crud.get_team_for_supervisor(db, user.id)
-        member_ids = [m.id for m in team]
-
-        if member_id not in member_ids:
+        if not crud.is_supervisor_of(db, user.id, member_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="This member is not assigned to you"
             )
 
-        # Get member's enrollments
-        enrollments = db.query(models.Enrollment).filter(
+        # Get member's enrollments with their courses in one query
+        enrollments = db.query(models.Enrollment).options(
+            joinedload(models.Enrollment.course)
+        ).filter(
             models.Enrollment.user_id == member_id
         ).all()
 
         enrollments_data = []
         for e in enrollments:
-            course = db.query(models.Course).filter(models.Course.id == e.course_id).first()
+            course = e.course
             enrollments_data.append({
                 "id": e.id,
                 "course_id": e.course_id,
@@ -879,7 +985,7 @@ def get_supervisor_member_enrollments(
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [SUPERVISOR] Error fetching member enrollments: {str(e)}")
+        logger.exception("[SUPERVISOR] Error fetching member enrollments: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching member enrollments: {str(e)}"
@@ -905,10 +1011,7 @@ def supervisor_assign_course(
             )
 
         # Verify the member is assigned to this supervisor
-        team = crud.get_team_for_supervisor(db, user.id)
-        member_ids = [m.id for m in team]
-
-        if member_id not in member_ids:
+        if not crud.is_supervisor_of(db, user.id, member_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="This member is not assigned to you"
@@ -952,13 +1055,13 @@ def supervisor_assign_course(
         db.commit()
         db.refresh(enrollment)
 
-        print(f"✅ [SUPERVISOR] Course {course_id} assigned to member {member_id}")
+        logger.info("[SUPERVISOR] Course %s assigned to member %s", course_id, member_id)
         return {"message": "Course assigned successfully", "enrollment_id": enrollment.id}
 
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [SUPERVISOR] Error assigning course: {str(e)}")
+        logger.exception("[SUPERVISOR] Error assigning course: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error assigning course: {str(e)}"
@@ -994,10 +1097,7 @@ def supervisor_remove_course(
             )
 
         # Verify the member is assigned to this supervisor
-        team = crud.get_team_for_supervisor(db, user.id)
-        member_ids = [m.id for m in team]
-
-        if enrollment.user_id not in member_ids:
+        if not crud.is_supervisor_of(db, user.id, enrollment.user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="This member is not assigned to you"
@@ -1007,13 +1107,13 @@ def supervisor_remove_course(
         db.delete(enrollment)
         db.commit()
 
-        print(f"✅ [SUPERVISOR] Enrollment {enrollment_id} removed")
+        logger.info("[SUPERVISOR] Enrollment %s removed", enrollment_id)
         return {"message": "Course removed successfully"}
 
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [SUPERVISOR] Error removing course: {str(e)}")
+        logger.exception("[SUPERVISOR] Error removing course: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error removing course: {str(e)}"
@@ -1023,7 +1123,8 @@ def supervisor_remove_course(
 @app.get("/api/supervisor/stats")
 def get_supervisor_stats(
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        read_db: Session = Depends(get_read_db)
 ):
     """Get statistics for supervisor's team"""
     try:
@@ -1037,11 +1138,11 @@ def get_supervisor_stats(
             )
 
         # Get team members
-        team = crud.get_team_for_supervisor(db, user.id)
+        team = crud.get_team_for_supervisor(read_db, user.id)
         team_member_ids = [m.id for m in team]
 
         # Get all enrollments for team members
-        all_enrollments = db.query(models.Enrollment).filter(
+        all_enrollments = read_db.query(models.Enrollment).filter(
             models.Enrollment.user_id.in_(team_member_ids)
         ).all()
 
@@ -1061,13 +1162,13 @@ def get_supervisor_stats(
             "completed_courses": completed_courses
         }
 
-        print(f"✅ [SUPERVISOR] Stats calculated: {stats}")
+        logger.debug("[SUPERVISOR] Stats calculated: %s", stats)
         return stats
 
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [SUPERVISOR] Error fetching stats: {str(e)}")
+        logger.exception("[SUPERVISOR] Error fetching stats: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching stats: {str(e)}"
@@ -1078,16 +1179,42 @@ def get_supervisor_stats(
 # 👑 ADMIN: BULK COURSE ASSIGNMENT
 # ====================================================
 
+def parse_user_ids(raw: str) -> list:
+    """
+    Parse user IDs from a JSON array ("[1, 2, 3]") or comma/newline
+    separated text such as a CSV upload. A non-numeric first token is
+    treated as a CSV header and skipped.
+    """
+    raw = raw.strip()
+    if raw.startswith("["):
+        try:
+            return [int(uid) for uid in json.loads(raw)]
+        except (ValueError, TypeError):
+            raise ValueError("user_ids must be a JSON array of integers")
+
+    tokens = [token.strip() for token in raw.replace("\r", "\n").replace("\n", ",").split(",")]
+    tokens = [token for token in tokens if token]
+    if tokens and not tokens[0].isdigit():
+        tokens = tokens[1:]
+    try:
+        return [int(token) for token in tokens]
+    except ValueError:
+        raise ValueError("user_ids must contain only integer IDs")
+
+
 @app.post("/api/admin/assign-course-bulk")
 def admin_bulk_assign_course(
         course_id: int = Form(...),
-        user_ids: str = Form(...),  # Comma-separated user IDs
+        user_ids: Optional[str] = Form(None),  # "1,2,3,5,7" or "[1, 2, 3]"
+        user_ids_file: Optional[UploadFile] = File(None),  # CSV of user IDs
         token: str = Depends(oauth2_scheme),
         db: Session = Depends(get_db)
 ):
     """
     Admin assigns a course to multiple users at once
-    user_ids: comma-separated string like "1,2,3,5,7"
+    user_ids: comma-separated string like "1,2,3,5,7" or a JSON array
+    user_ids_file: CSV upload with one user ID per line/cell (optional header)
+    IDs are validated with one query and inserted with one INSERT ... ON CONFLICT DO NOTHING
     """
     try:
         user = verify_token(token, db)
@@ -1100,7 +1227,15 @@ def admin_bulk_assign_course(
             )
 
         # Parse user IDs
-        user_id_list = [int(uid.strip()) for uid in user_ids.split(",") if uid.strip()]
+        try:
+            user_id_list = parse_user_ids(user_ids or "")
+            if user_ids_file is not None:
+                user_id_list += parse_user_ids(user_ids_file.file.read().decode("utf-8-sig"))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
 
         if not user_id_list:
             raise HTTPException(
@@ -1116,53 +1251,37 @@ def admin_bulk_assign_course(
                 detail="Course not found"
             )
 
-        # Assign course to each user
-        enrolled_count = 0
-        skipped_count = 0
-
-        for uid in user_id_list:
-            # Check if user exists
-            target_user = db.query(models.User).filter(models.User.id == uid).first()
-            if not target_user:
-                skipped_count += 1
-                continue
-
-            # Check if already enrolled
-            existing = db.query(models.Enrollment).filter(
-                models.Enrollment.user_id == uid,
-                models.Enrollment.course_id == course_id
-            ).first()
-
-            if existing:
-                skipped_count += 1
-                continue
-
-            # Create enrollment
-            enrollment = models.Enrollment(
-                user_id=uid,
-                course_id=course_id,
-                status=models.EnrollmentStatus.NOT_STARTED,
-                assigned_by=user.id,
-                due_date=datetime.utcnow() + timedelta(days=course.expiry_days)
-            )
-            db.add(enrollment)
-            enrolled_count += 1
+        unique_ids = list(set(user_id_list))
+        existing_count = crud.count_existing_users(db, unique_ids)
 
-        db.commit()
+        due_date = datetime.utcnow() + timedelta(days=course.expiry_days)
+        enrolled_ids = crud.bulk_enroll_users(
+            db,
+            course_id=course_id,
+            user_ids=unique_ids,
+            assigned_by=user.id,
+            due_date=due_date
+        )
+        enrolled_count = len(enrolled_ids)
+
+        # Core INSERT - the ORM hook does not see these rows, so publish here
+        event_broker.publish(enrolled_ids, "assignment", {"course_id": course_id, "due_date": due_date})
+        skipped_count = len(user_id_list) - enrolled_count
 
-        print(f"✅ [ADMIN] Bulk assigned course {course_id} to {enrolled_count} users, skipped {skipped_count}")
+        logger.info("[ADMIN] Bulk assigned course %s to %s users, skipped %s", course_id, enrolled_count, skipped_count)
 
         return {
             "message": "Bulk assignment completed",
             "enrolled_count": enrolled_count,
             "skipped_count": skipped_count,
+            "invalid_count": len(unique_ids) - existing_count,
             "total_requested": len(user_id_list)
         }
 
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [ADMIN] Error in bulk assignment: {str(e)}")
+        logger.exception("[ADMIN] Error in bulk assignment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error during bulk assignment: {str(e)}"
@@ -1175,11 +1294,26 @@ def admin_bulk_assign_course(
 
 @app.get("/api/admin/users-training-status")
 def get_users_training_status(
+        response: Response,
+        limit: Optional[int] = Query(None, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        order: str = "asc",
+        branch: Optional[str] = None,
+        role: Optional[str] = None,
+        compliance_band: Optional[str] = None,
+        stream: bool = False,
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        read_db: Session = Depends(get_read_db)
 ):
     """
     Admin gets all users with their training status, login times, compliance
+    - Filters: branch, role, compliance_band (low <50, medium 50-80, high >=80)
+    - Sorting: sort=id|name|email|last_login|compliance_rate|total_courses|overdue_courses, order=asc|desc
+    - Keyset pagination: pass limit, then follow the X-Next-Cursor header via ?cursor=
+    - stream=true streams the matching rows as NDJSON (for full exports);
+      cursor and limit still apply, but no X-Next-Cursor is sent
     """
     try:
         user = verify_token(token, db)
@@ -1191,52 +1325,74 @@ def get_users_training_status(
                 detail="Only Admins can access this endpoint"
             )
 
-        # Get all users
-        all_users = db.query(models.User).all()
-
-        users_data = []
-        for u in all_users:
-            # Get enrollments for this user
-            enrollments = db.query(models.Enrollment).filter(
-                models.Enrollment.user_id == u.id
-            ).all()
-
-            total_courses = len(enrollments)
-            completed = len([e for e in enrollments if e.status == models.EnrollmentStatus.COMPLETED])
-            in_progress = len([e for e in enrollments if e.status == models.EnrollmentStatus.IN_PROGRESS])
-            overdue = len([e for e in enrollments if e.status == models.EnrollmentStatus.OVERDUE])
-
-            compliance_rate = round((completed / total_courses * 100), 1) if total_courses > 0 else 0.0
-
-            users_data.append({
-                "id": u.id,
-                "name": u.name,
-                "email": u.email,
-                "role": u.role,
-                "branch": u.branch,
-                "last_login": u.last_login.isoformat() if u.last_login else None,
-                "join_date": u.join_date.isoformat() if u.join_date else None,
-                "total_courses": total_courses,
-                "completed_courses": completed,
-                "in_progress_courses": in_progress,
-                "overdue_courses": overdue,
-                "compliance_rate": compliance_rate,
-                "avatar": u.avatar
-            })
+        if compliance_band and compliance_band not in reports.COMPLIANCE_BANDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"compliance_band must be one of: {', '.join(reports.COMPLIANCE_BANDS)}"
+            )
+        if order not in ("asc", "desc"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="order must be 'asc' or 'desc'"
+            )
+        if role and role not in reports.ROLES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"role must be one of: {', '.join(reports.ROLES)}"
+            )
 
-        print(f"✅ [ADMIN] Retrieved training status for {len(users_data)} users")
+        # Single GROUP BY over enrollments joined to users (no per-user queries)
+        stmt, sort_columns = reports.training_status_query(branch, role, compliance_band)
+        if sort not in sort_columns:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"sort must be one of: {', '.join(sort_columns)}"
+            )
+
+        try:
+            stmt = reports.apply_keyset(
+                stmt, sort_columns[sort], order == "desc", cursor, limit, reports.SORT_VALUE_TYPES[sort]
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        if stream:
+            logger.debug("[ADMIN] Streaming user training status export")
+            return StreamingResponse(stream_training_status(stmt), media_type="application/x-ndjson")
+
+        rows = read_db.execute(stmt).all()
+        users_data = [reports.training_status_row(row) for row in rows]
+
+        if limit and len(rows) == limit:
+            response.headers["X-Next-Cursor"] = reports.encode_cursor(rows[-1].sort_key, rows[-1].id)
+
+        logger.debug("[ADMIN] Retrieved training status for %s users", len(users_data))
         return users_data
 
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [ADMIN] Error fetching user training status: {str(e)}")
+        logger.exception("[ADMIN] Error fetching user training status: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching user training status: {str(e)}"
         )
 
 
+def stream_training_status(stmt):
+    """
+    Yield NDJSON lines using a server-side cursor.
+    Uses its own (replica-routed) session - the request session is closed
+    before streaming ends.
+    """
+    db = replica_router.session()
+    try:
+        for row in db.execute(stmt.execution_options(yield_per=1000)):
+            yield json.dumps(reports.training_status_row(row)) + "\n"
+    finally:
+        db.close()
+
+
 # ====================================================
 # 👑 ADMIN: DASHBOARD STATS (AUDITING & COMPLIANCE)
 # ====================================================
@@ -1244,7 +1400,8 @@ def get_users_training_status(
 @app.get("/api/admin/dashboard-stats")
 def get_admin_dashboard_stats(
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        read_db: Session = Depends(get_read_db)
 ):
     """
     Admin gets comprehensive dashboard statistics for auditing and compliance
@@ -1259,88 +1416,109 @@ def get_admin_dashboard_stats(
                 detail="Only Admins can access this endpoint"
             )
 
-        # Get all users
-        all_users = db.query(models.User).all()
-        total_users = len(all_users)
+        # Aggregated in SQL (one round trip), shared across admins for a short TTL
+        # Admins arriving during a recompute wait for it rather than start their own
+        stats = dashboard_cache.get_or_load("stats", lambda: reports.dashboard_stats(read_db))
 
-        # Count by role
-        role_distribution = {}
-        for u in all_users:
-            role_str = u.role.value if hasattr(u.role, 'value') else str(u.role)
-            role_distribution[role_str] = role_distribution.get(role_str, 0) + 1
+        logger.debug("[ADMIN] Dashboard stats calculated: %s", stats)
+        return stats
 
-        # Get all enrollments
-        all_enrollments = db.query(models.Enrollment).all()
-        total_enrollments = len(all_enrollments)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.exception("[ADMIN] Error fetching dashboard stats: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching dashboard stats: {str(e)}"
+        )
 
-        # Calculate statuses
-        completed_enrollments = len([e for e in all_enrollments if e.status == models.EnrollmentStatus.COMPLETED])
-        in_progress_enrollments = len([e for e in all_enrollments if e.status == models.EnrollmentStatus.IN_PROGRESS])
-        overdue_enrollments = len([e for e in all_enrollments if e.status == models.EnrollmentStatus.OVERDUE])
-        not_started_enrollments = len([e for e in all_enrollments if e.status == models.EnrollmentStatus.NOT_STARTED])
 
-        # Overall compliance rate
-        overall_compliance = round((completed_enrollments / total_enrollments * 100),
-                                   1) if total_enrollments > 0 else 0.0
+# ====================================================
+# 👑 ADMIN: ROLE ENROLLMENT RECONCILIATION
+# ====================================================
 
-        # Get all courses
-        all_courses = db.query(models.Course).all()
-        total_courses = len(all_courses)
+@app.post("/api/admin/reconcile-enrollments")
+def reconcile_role_enrollments(
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db)
+):
+    """Admin runs a full sweep creating missing role-mandated enrollments"""
+    user = verify_token(token, db)
 
-        # Get all certificates
-        all_certificates = db.query(models.Certificate).all()
-        total_certificates = len(all_certificates)
+    if user.role != "Admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only Admins can access this endpoint"
+        )
 
-        # Users who logged in recently (last 7 days)
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        active_users = len([u for u in all_users if u.last_login and u.last_login > seven_days_ago])
+    return reconciler.reconcile_all(db)
 
-        # Users who never logged in
-        never_logged_in = len([u for u in all_users if not u.last_login])
 
-        stats = {
-            "total_users": total_users,
-            "active_users_7_days": active_users,
-            "never_logged_in": never_logged_in,
-            "total_courses": total_courses,
-            "total_enrollments": total_enrollments,
-            "completed_enrollments": completed_enrollments,
-            "in_progress_enrollments": in_progress_enrollments,
-            "overdue_enrollments": overdue_enrollments,
-            "not_started_enrollments": not_started_enrollments,
-            "overall_compliance_rate": overall_compliance,
-            "total_certificates": total_certificates,
-            "role_distribution": role_distribution,
-            "avg_courses_per_user": round(total_enrollments / total_users, 1) if total_users > 0 else 0.0
-        }
+# ====================================================
+# 👑 ADMIN: CACHE STATS
+# ====================================================
 
-        print(f"✅ [ADMIN] Dashboard stats calculated: {stats}")
-        return stats
+@app.get("/api/admin/cache-stats")
+def get_cache_stats(
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db)
+):
+    """Admin gets hit/miss counters for the in-process caches"""
+    user = verify_token(token, db)
 
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        print(f"❌ [ADMIN] Error fetching dashboard stats: {str(e)}")
+    if user.role != "Admin":
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching dashboard stats: {str(e)}"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only Admins can access this endpoint"
         )
 
+    return {
+        **{name: cache.stats() for name, cache in CACHES.items()},
+        "certificate_pdf": pdf_cache.stats(),
+    }
+
+
+# ====================================================
+# 👑 ADMIN: BACKGROUND JOBS
+# ====================================================
+
+@app.get("/api/admin/background-jobs")
+def get_background_jobs(
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db)
+):
+    """Admin gets per-run figures (rows touched, runtime) for background jobs"""
+    user = verify_token(token, db)
+
+    if user.role != "Admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only Admins can access this endpoint"
+        )
+
+    return {
+        "overdue_sweeper": overdue_sweeper.stats(),
+        "log_writer": logging_stats(),
+        "event_streams": event_broker.stats(),
+        "smtp_outbox": smtp_outbox.stats(),
+        "progress_buffer": progress_buffer.stats(),
+    }
+
 
 # ====================================================
 # 📚 USER ENROLLMENTS
 # ====================================================
 
 @app.get("/api/enrollments")
-def get_my_enrollments(
-        current_user: models.User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+async def get_my_enrollments(
+        current_user: models.User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """Return all enrollments for the logged-in user."""
-    enrollments = db.query(models.Enrollment).filter(
-        models.Enrollment.user_id == current_user.id
-    ).all()
-    return enrollments
+    enrollments = await db.scalars(
+        select(models.Enrollment).where(models.Enrollment.user_id == current_user.id)
+    )
+    return enrollments.all()
 
 
 @app.post("/api/enrollments/enroll")
@@ -1391,46 +1569,38 @@ def update_progress(
     """
     progress = int(payload.get("progress", 0))
 
-    enrollment = db.query(models.Enrollment).filter(
-        models.Enrollment.user_id == current_user.id,
-        models.Enrollment.course_id == course_id
-    ).first()
+    # Heartbeats below 100% are coalesced in memory and written in batches
+    # (when the flush task is running); reaching 100% is always written and
+    # committed before responding
+    if PROGRESS_COALESCE_ENABLED and progress < 100 and progress_buffer.running:
+        known_status = enrollment_status(db, current_user.id, course_id)
+        if known_status is None:
+            raise HTTPException(status_code=404, detail="Enrollment not found")
+        if known_status == models.EnrollmentStatus.COMPLETED:
+            # Completion is final - same answer the synchronous write would give
+            return {"message": "Progress updated", "progress": 100, "status": known_status.value}
+        try:
+            progress = progress_buffer.record(current_user.id, course_id, progress)
+        except ProgressBacklogFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Progress updates are backed up, please retry shortly",
+                headers={"Retry-After": str(max(1, round(PROGRESS_FLUSH_INTERVAL_SECONDS)))},
+            )
+        return {
+            "message": "Progress recorded",
+            "progress": progress,
+            "status": buffered_status(known_status, progress).value,
+            "buffered": True,
+        }
+
+    progress_buffer.discard(current_user.id, course_id)
+    enrollment = crud.record_progress(db, current_user.id, course_id, progress)
 
     if not enrollment:
         raise HTTPException(status_code=404, detail="Enrollment not found")
+    known_enrollments.set((current_user.id, course_id), enrollment.status)
 
-    # Update status/progress
-    if enrollment.status == models.EnrollmentStatus.NOT_STARTED and progress > 0:
-        enrollment.status = models.EnrollmentStatus.IN_PROGRESS
-
-    enrollment.progress = max(enrollment.progress, progress)
-    enrollment.updated_at = datetime.utcnow()
-
-    # Auto-complete when 100%
-    if enrollment.progress >= 100 and enrollment.status != models.EnrollmentStatus.COMPLETED:
-        enrollment.status = models.EnrollmentStatus.COMPLETED
-        enrollment.completed_date = datetime.utcnow()
-
-        # Create certificate if not exists
-        existing_cert = db.query(models.Certificate).filter(
-            models.Certificate.user_id == current_user.id,
-            models.Certificate.course_id == course_id
-        ).first()
-
-        if not existing_cert:
-            course = enrollment.course
-            expiry_date = datetime.utcnow() + timedelta(days=course.expiry_days)
-            cert = models.Certificate(
-                certificate_id=str(uuid.uuid4()),
-                user_id=current_user.id,
-                course_id=course_id,
-                score=enrollment.score or 100.0,
-                expiry_date=expiry_date,
-                qr_code=None,
-            )
-            db.add(cert)
-
-    db.commit()
     return {"message": "Progress updated", "progress": enrollment.progress, "status": enrollment.status.value}
 
 
@@ -1441,39 +1611,13 @@ def mark_course_complete(
         db: Session = Depends(get_db)
 ):
     """Force-complete a course and create certificate (if needed)."""
-    enrollment = db.query(models.Enrollment).filter(
-        models.Enrollment.user_id == current_user.id,
-        models.Enrollment.course_id == course_id
-    ).first()
+    progress_buffer.discard(current_user.id, course_id)
+    enrollment = crud.record_progress(db, current_user.id, course_id, 100)
 
     if not enrollment:
         raise HTTPException(status_code=404, detail="Enrollment not found")
+    known_enrollments.set((current_user.id, course_id), enrollment.status)
 
-    course = enrollment.course
-
-    enrollment.status = models.EnrollmentStatus.COMPLETED
-    enrollment.progress = 100
-    enrollment.completed_date = datetime.utcnow()
-    enrollment.updated_at = datetime.utcnow()
-
-    existing_cert = db.query(models.Certificate).filter(
-        models.Certificate.user_id == current_user.id,
-        models.Certificate.course_id == course_id
-    ).first()
-
-    if not existing_cert:
-        expiry_date = datetime.utcnow() + timedelta(days=course.expiry_days)
-        cert = models.Certificate(
-            certificate_id=str(uuid.uuid4()),
-            user_id=current_user.id,
-            course_id=course_id,
-            score=enrollment.score or 100.0,
-            expiry_date=expiry_date,
-            qr_code=None,
-        )
-        db.add(cert)
-
-    db.commit()
     return {"message": "Course marked complete"}
 
 
@@ -1482,13 +1626,16 @@ def mark_course_complete(
 # ====================================================
 
 @app.get("/api/certificates/me")
-def get_my_certificates(
-        current_user: models.User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+async def get_my_certificates(
+        current_user: models.User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    certificates = db.query(models.Certificate).filter(
-        models.Certificate.user_id == current_user.id
-    ).all()
+    # Courses are loaded up front - lazy loading is not available on AsyncSession
+    certificates = await db.scalars(
+        select(models.Certificate)
+        .options(selectinload(models.Certificate.course))
+        .where(models.Certificate.user_id == current_user.id)
+    )
 
     # Attach human-friendly course/user names
     result = []
@@ -1505,50 +1652,51 @@ def get_my_certificates(
 # 📊 USER STATS & COMPLIANCE
 # ====================================================
 
-@app.get("/api/stats/me")
-def get_user_stats(
-        current_user: models.User = Depends(get_current_user),
-        db: Session = Depends(get_db)
-):
-    enrollments = db.query(models.Enrollment).filter(
-        models.Enrollment.user_id == current_user.id
-    ).all()
-
-    total_courses = len(enrollments)
-    completed = len([e for e in enrollments if e.status == models.EnrollmentStatus.COMPLETED])
-    in_progress = len([e for e in enrollments if e.status == models.EnrollmentStatus.IN_PROGRESS])
-    overdue = len([e for e in enrollments if e.status == models.EnrollmentStatus.OVERDUE])
-
-    compliance_rate = (completed / total_courses * 100) if total_courses > 0 else 0.0
-
-    # For MVP: each completed enrollment = 1h
-    total_hours = completed
-
-    # Avg score
-    scores = [e.score for e in enrollments if e.score is not None]
-    avg_score = sum(scores) / len(scores) if scores else 0.0
+async def user_stats(db: AsyncSession, user_id: int) -> UserStats:
+    """Personal enrollment figures from one aggregate query"""
+    row = (await db.execute(
+        select(
+            func.count().label("total_courses"),
+            reports.count_status(reports.COMPLETED).label("completed"),
+            reports.count_status(reports.IN_PROGRESS).label("in_progress"),
+            reports.count_status(reports.OVERDUE).label("overdue"),
+            func.avg(models.Enrollment.score).label("avg_score"),
+        ).where(models.Enrollment.user_id == user_id)
+    )).one()
+
+    total_courses = row.total_courses
+    compliance_rate = (row.completed / total_courses * 100) if total_courses > 0 else 0.0
 
     return UserStats(
         total_courses=total_courses,
-        completed_courses=completed,
-        in_progress=in_progress,
-        overdue=overdue,
+        completed_courses=row.completed,
+        in_progress=row.in_progress,
+        overdue=row.overdue,
         compliance_rate=round(compliance_rate, 1),
-        avg_score=round(avg_score, 1),
-        total_hours=total_hours,
+        avg_score=round(float(row.avg_score or 0.0), 1),
+        # For MVP: each completed enrollment = 1h
+        total_hours=row.completed,
     )
 
 
+@app.get("/api/stats/me")
+async def get_user_stats(
+        current_user: models.User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
+):
+    return await user_stats(db, current_user.id)
+
+
 @app.get("/api/stats/compliance-trend")
-def get_compliance_trend(
-        current_user: models.User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+async def get_compliance_trend(
+        current_user: models.User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Simple 6-month trend. For now we just generate dummy data based
     on current compliance.
     """
-    stats = get_user_stats(current_user=current_user, db=db)
+    stats = await user_stats(db, current_user.id)
 
     data = []
     now = datetime.utcnow()
@@ -1568,15 +1716,37 @@ def get_compliance_trend(
 # ====================================================
 
 @app.get("/api/notifications/me")
-def get_my_notifications(
-        current_user: models.User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+async def get_my_notifications(
+        response: Response,
+        limit: int = Query(50, ge=1, le=200),
+        cursor: Optional[str] = None,
+        unread_only: bool = False,
+        current_user: models.User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all notifications for the current user"""
+    """
+    Get the current user's notifications, newest first
+    - Keyset pagination: follow the X-Next-Cursor header via ?cursor=
+    - unread_only=true returns only unread notifications
+    """
     try:
-        notifications = db.query(models.Notification).filter(
-            models.Notification.user_id == current_user.id
-        ).order_by(models.Notification.created_at.desc()).all()
+        stmt = select(models.Notification).where(models.Notification.user_id == current_user.id)
+        if unread_only:
+            stmt = stmt.where(models.Notification.read == False)
+        if cursor:
+            try:
+                after = reports.decode_cursor(cursor, datetime)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            stmt = stmt.where(tuple_(models.Notification.created_at, models.Notification.id) < tuple_(*after))
+
+        notifications = (await db.scalars(
+            stmt.order_by(models.Notification.created_at.desc(), models.Notification.id.desc()).limit(limit)
+        )).all()
+
+        if len(notifications) == limit:
+            last = notifications[-1]
+            response.headers["X-Next-Cursor"] = reports.encode_cursor(last.created_at, last.id)
 
         return [
             {
@@ -1589,14 +1759,54 @@ def get_my_notifications(
             }
             for n in notifications
         ]
+    except HTTPException as e:
+        raise e
     except Exception as e:
-        print(f"❌ [NOTIFICATIONS] Error: {str(e)}")
+        logger.exception("[NOTIFICATIONS] Error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching notifications: {str(e)}"
         )
 
 
+@app.get("/api/notifications/me/unread-count")
+async def get_my_unread_count(
+        current_user: models.User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Unread notification count for the header badge (index-only count)"""
+    try:
+        unread = await db.scalar(
+            select(func.count())
+            .select_from(models.Notification)
+            .where(models.Notification.user_id == current_user.id, models.Notification.read == False)
+        )
+        return {"unread_count": unread}
+    except Exception as e:
+        logger.exception("[NOTIFICATIONS] Error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error counting notifications: {str(e)}"
+        )
+
+
+@app.post("/api/notifications/me/mark-all-read")
+def mark_all_notifications_read(
+        current_user: models.User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Mark all of the current user's notifications as read (one UPDATE)"""
+    try:
+        updated = crud.mark_all_notifications_read(db, current_user.id)
+        return {"message": "All notifications marked as read", "updated": updated}
+    except Exception as e:
+        logger.exception("[NOTIFICATIONS] Error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error marking notifications as read: {str(e)}"
+        )
+
+
 @app.post("/api/notifications/{notification_id}/mark-read")
 def mark_notification_read(
         notification_id: int,
@@ -1623,13 +1833,77 @@ def mark_notification_read(
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [NOTIFICATIONS] Error: {str(e)}")
+        logger.exception("[NOTIFICATIONS] Error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error marking notification as read: {str(e)}"
         )
 
 
+# ====================================================
+# 📡 EVENT STREAM (SERVER-SENT EVENTS)
+# ====================================================
+
+@app.post("/api/events/ticket")
+def create_event_stream_ticket(
+        user: models.User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Exchange the bearer token for a single-use ticket that opens one event
+    stream (EventSource cannot set headers, and a JWT in the URL would end
+    up in access logs and browser history)
+    """
+    return {"ticket": issue_stream_ticket(db, user.id), "expires_in": SSE_TICKET_TTL_SECONDS}
+
+
+@app.get("/api/events/stream")
+async def event_stream(
+        ticket: Optional[str] = None,
+        header_token: Optional[str] = Depends(optional_oauth2_scheme)
+):
+    """
+    Push channel for the current user: `notification` and `assignment`
+    events, a `ready` event on (re)connect and a comment ping every
+    SSE_HEARTBEAT_SECONDS. Authenticate with the Authorization header or
+    ?ticket= from POST /api/events/ticket; a ticket opens one stream, so
+    reconnects need a new one.
+    """
+    if not (header_token or ticket):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Short-lived session: the stream must not hold a pooled connection open
+    async with AsyncSessionLocal() as db:
+        if header_token:
+            user_id = (await verify_token_async(header_token, db)).id
+        else:
+            user_id = await redeem_stream_ticket(db, ticket)
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired stream ticket",
+        )
+
+    try:
+        subscription = event_broker.subscribe(user_id)
+    except BrokerFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+
+    return StreamingResponse(
+        event_broker.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ====================================================
 # 📄 CERTIFICATE PDF DOWNLOAD
 # ====================================================
@@ -1637,20 +1911,21 @@ def mark_notification_read(
 @app.get("/api/certificates/{certificate_id}/download")
 def download_certificate_pdf(
         certificate_id: int,
+        request: Request,
         current_user: models.User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
-    """Generate and download certificate as PDF"""
-    from fastapi.responses import Response
-    from io import BytesIO
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.units import inch
-    from reportlab.pdfgen import canvas
-    from reportlab.lib import colors
-
+    """
+    Download certificate as PDF
+    - Rendered once per distinct certificate content, then served from the disk cache
+    - The content digest doubles as a strong ETag; If-None-Match answers 304
+    """
     try:
-        # Get certificate
-        certificate = db.query(models.Certificate).filter(
+        # Get certificate with its course and user in one query
+        certificate = db.query(models.Certificate).options(
+            joinedload(models.Certificate.course),
+            joinedload(models.Certificate.user)
+        ).filter(
             models.Certificate.id == certificate_id,
             models.Certificate.user_id == current_user.id
         ).first()
@@ -1661,92 +1936,22 @@ def download_certificate_pdf(
                 detail="Certificate not found"
             )
 
-        # Get course and user details
-        course = certificate.course
-        user = certificate.user
-
-        # Create PDF in memory
-        buffer = BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-
-        # Set up fonts and styling
-        pdf.setTitle(f"Certificate - {course.title}")
-
-        # Draw border
-        pdf.setStrokeColor(colors.HexColor("#1e40af"))
-        pdf.setLineWidth(3)
-        pdf.rect(0.5 * inch, 0.5 * inch, width - 1 * inch, height - 1 * inch)
-
-        # Title
-        pdf.setFont("Helvetica-Bold", 32)
-        pdf.setFillColor(colors.HexColor("#1e40af"))
-        pdf.drawCentredString(width / 2, height - 2 * inch, "Certificate of Completion")
-
-        # Decorative line
-        pdf.setStrokeColor(colors.HexColor("#3b82f6"))
-        pdf.setLineWidth(2)
-        pdf.line(2 * inch, height - 2.5 * inch, width - 2 * inch, height - 2.5 * inch)
-
-        # Body text
-        pdf.setFont("Helvetica", 16)
-        pdf.setFillColor(colors.black)
-        pdf.drawCentredString(width / 2, height - 3.2 * inch, "This certifies that")
-
-        # User name (larger)
-        pdf.setFont("Helvetica-Bold", 24)
-        pdf.setFillColor(colors.HexColor("#1e40af"))
-        pdf.drawCentredString(width / 2, height - 4 * inch, user.name)
-
-        # Completion text
-        pdf.setFont("Helvetica", 16)
-        pdf.setFillColor(colors.black)
-        pdf.drawCentredString(width / 2, height - 4.7 * inch, "has successfully completed")
-
-        # Course title
-        pdf.setFont("Helvetica-Bold", 20)
-        pdf.setFillColor(colors.HexColor("#1e40af"))
-        pdf.drawCentredString(width / 2, height - 5.5 * inch, course.title)
-
-        # Certificate details (left aligned)
-        pdf.setFont("Helvetica", 12)
-        pdf.setFillColor(colors.black)
-        y_position = height - 7 * inch
-
-        details = [
-            f"Certificate ID: {certificate.certificate_id}",
-            f"Issue Date: {certificate.issue_date.strftime('%B %d, %Y')}",
-            f"Expiry Date: {certificate.expiry_date.strftime('%B %d, %Y')}",
-            f"Score: {certificate.score}%"
-        ]
+        # The digest comes from the certificate fields alone, so a
+        # revalidation is answered before the PDF is read or rendered
+        etag = f'"{certificate_digest(certificate)[:32]}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-        for detail in details:
-            pdf.drawCentredString(width / 2, y_position, detail)
-            y_position -= 0.3 * inch
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-        # Footer
-        pdf.setFont("Helvetica-Bold", 14)
-        pdf.setFillColor(colors.HexColor("#1e40af"))
-        pdf.drawCentredString(width / 2, 1.5 * inch, "River Garden Training")
-
-        pdf.setFont("Helvetica", 10)
-        pdf.setFillColor(colors.gray)
-        pdf.drawCentredString(width / 2, 1.2 * inch, "Professional Healthcare Training & Compliance")
-
-        # Finalize PDF
-        pdf.showPage()
-        pdf.save()
-
-        # Get PDF content
-        buffer.seek(0)
-        pdf_content = buffer.getvalue()
-        buffer.close()
+        pdf_content, _ = certificate_pdf(certificate)
 
         # Return PDF
         return Response(
             content=pdf_content,
             media_type="application/pdf",
             headers={
+                **headers,
                 "Content-Disposition": f"attachment; filename=certificate_{certificate.certificate_id}.pdf"
             }
         )
@@ -1754,22 +1959,131 @@ def download_certificate_pdf(
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ [CERTIFICATE] Error generating PDF: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[CERTIFICATE] Error generating PDF: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating certificate: {str(e)}"
         )
 
 
+# ====================================================
+# 👑 ADMIN: BULK CERTIFICATE EXPORT (ZIP)
+# ====================================================
+
+@app.get("/api/admin/certificates/export")
+def export_certificates_zip(
+        branch: Optional[str] = None,
+        course_id: Optional[int] = None,
+        issued_from: Optional[date] = None,
+        issued_to: Optional[date] = None,
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db)
+):
+    """
+    Admin downloads every matching certificate as one ZIP (plus manifest.csv)
+    - Filters: branch, course_id, issued_from / issued_to (inclusive dates)
+    - PDFs are rendered in a process pool and streamed into the archive as they finish
+    - Progress: follow the X-Export-Id header via /api/admin/certificates/export/{export_id}
+    """
+    try:
+        user = verify_token(token, db)
+
+        if user.role != "Admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only Admins can access this endpoint"
+            )
+
+        rows = certificate_export.export_certificates(
+            db,
+            branch=branch,
+            course_id=course_id,
+            issued_from=issued_from,
+            issued_to=issued_to + timedelta(days=1) if issued_to else None,
+        )
+        filters = {
+            "branch": branch,
+            "course_id": course_id,
+            "issued_from": issued_from.isoformat() if issued_from else None,
+            "issued_to": issued_to.isoformat() if issued_to else None,
+        }
+        progress = certificate_export.register_export(len(rows), filters)
+
+        filename = f"certificates_{branch or 'all'}_{datetime.utcnow().strftime('%Y%m%d')}.zip"
+        logger.info("[EXPORT] %s: exporting %s certificates", progress.id, len(rows))
+        return StreamingResponse(
+            certificate_export.stream_zip(rows, progress),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                "X-Export-Id": progress.id,
+            }
+        )
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.exception("[EXPORT] Error starting certificate export: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error exporting certificates: {str(e)}"
+        )
+
+
+@app.get("/api/admin/certificates/export/{export_id}")
+def get_certificate_export_progress(
+        export_id: str,
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db)
+):
+    """Admin polls the progress of a certificate export"""
+    user = verify_token(token, db)
+
+    if user.role != "Admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only Admins can access this endpoint"
+        )
+
+    progress = certificate_export.get_export(export_id)
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found"
+        )
+    return progress.to_dict()
+
+
+# ====================================================
+# 🩺 LIVENESS & READINESS
+# ====================================================
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving (no database access)"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness: the DB pool hands out a working connection quickly.
+    503 tells the load balancer to skip this worker.
+    """
+    ready, report = readiness()
+    if not ready:
+        logger.warning("[READYZ] Not ready: %s", report)
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=report)
+    return report
+
+
 # ====================================================
 # ✅ ROOT CHECK
 # ====================================================
 
 @app.get("/")
 def root():
-    print("✅ [ROOT] Health check")
+    logger.debug("[ROOT] Health check")
     return {
         "message": "✅ River Garden API running with PostgreSQL",
         "version": "1.0",
@@ -0,0 +1,102 @@
+"""
+One-shot migration: re-hash legacy plain-text User.password_hash values.
+
+Usage:
+    python migrate_passwords.py [--batch-size 500] [--workers 4] [--dry-run]
+
+Safe to re-run; already-hashed rows are skipped, and a row is only
+overwritten if its stored value is unchanged since it was read (a user who
+logged in meanwhile has already been upgraded by /api/auth/login).
+
+--dry-run only counts: no bcrypt work is done. It also reports hashes that
+pwd_context.needs_update() flags (e.g. fewer rounds than BCRYPT_ROUNDS);
+those need the plain password and are upgraded at the user's next login.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import bindparam, select, update
+
+import models
+from database import SessionLocal
+from passwords import pwd_context
+
+
+def legacy_rows(rows):
+    """Rows whose password_hash is not a recognised passlib hash"""
+    return [row for row in rows if pwd_context.identify(row.password_hash) is None]
+
+
+def migrate(batch_size: int, workers: int, dry_run: bool) -> int:
+    users = models.User.__table__
+    upgrade = (
+        update(users)
+        .where(users.c.id == bindparam("user_id"))
+        .where(users.c.password_hash == bindparam("old_hash"))
+        .values(password_hash=bindparam("new_hash"))
+    )
+
+    migrated = 0
+    outdated = 0
+    last_id = 0
+    started = time.perf_counter()
+    db = SessionLocal()
+
+    try:
+        # bcrypt releases the GIL, so threads hash in parallel
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                rows = db.execute(
+                    select(users.c.id, users.c.password_hash)
+                    .where(users.c.id > last_id)
+                    .order_by(users.c.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                pending = legacy_rows(rows)
+                if dry_run:
+                    legacy_ids = {row.id for row in pending}
+                    outdated += sum(
+                        1 for row in rows
+                        if row.id not in legacy_ids and pwd_context.needs_update(row.password_hash)
+                    )
+                    migrated += len(pending)
+                    continue
+                if not pending:
+                    continue
+
+                new_hashes = list(executor.map(pwd_context.hash, [row.password_hash for row in pending]))
+                params = [
+                    {"user_id": row.id, "old_hash": row.password_hash, "new_hash": new_hash}
+                    for row, new_hash in zip(pending, new_hashes)
+                ]
+
+                db.connection().execute(upgrade, params)
+                db.commit()
+
+                migrated += len(params)
+                print(f"🔁 [MIGRATE] Re-hashed {migrated} passwords (up to user id {last_id})")
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    if dry_run:
+        print(f"✅ [MIGRATE] Would re-hash {migrated} legacy passwords; "
+              f"{outdated} outdated hashes will be upgraded at next login ({elapsed:.1f}s)")
+        return migrated
+    print(f"✅ [MIGRATE] Re-hashed {migrated} legacy passwords in {elapsed:.1f}s")
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-hash legacy plain-text passwords")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    migrate(args.batch_size, args.workers, args.dry_run)
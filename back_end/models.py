@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean, Enum as SQLEnum, ARRAY
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean, Enum as SQLEnum, Index
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import logging
 import enum
 from database import Base
 
+logger = logging.getLogger(__name__)
+
 
 class UserRole(str, enum.Enum):
     CARER = "Carer"
@@ -39,6 +44,10 @@ class EnrollmentStatus(str, enum.Enum):
     OVERDUE = "overdue"
 
 
+# Statuses an enrollment can still go overdue from
+OPEN_ENROLLMENT_STATUSES = (EnrollmentStatus.NOT_STARTED, EnrollmentStatus.IN_PROGRESS)
+
+
 # User Model
 class User(Base):
     __tablename__ = "users"
@@ -73,6 +82,11 @@ class AssignedSupervisor(Base):
     supervisor = relationship("User", foreign_keys=[supervisor_id])
     member = relationship("User", foreign_keys=[member_id])
 
+    __table_args__ = (
+        # Backs the "is this member assigned to me?" existence check
+        Index("ix_assigned_supervisors_supervisor_member", "supervisor_id", "member_id"),
+    )
+
 # Course Model - NOW WITH ASSIGNED ROLES
 class Course(Base):
     __tablename__ = "courses"
@@ -103,13 +117,18 @@ class Course(Base):
     enrollments = relationship("Enrollment", back_populates="course")
     certificates = relationship("Certificate", back_populates="course")
 
+    __table_args__ = (
+        # GIN index so "assigned_roles @> ARRAY[role]" doesn't scan the catalogue
+        Index("ix_courses_assigned_roles", "assigned_roles", postgresql_using="gin"),
+    )
+
 
 # Enrollment Model
 class Enrollment(Base):
     __tablename__ = "enrollments"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
     course_id = Column(Integer, ForeignKey('courses.id'), nullable=False)
     status = Column(SQLEnum(EnrollmentStatus), default=EnrollmentStatus.NOT_STARTED)
     progress = Column(Integer, default=0)  # 0-100
@@ -125,6 +144,16 @@ class Enrollment(Base):
     user = relationship("User", back_populates="enrollments", foreign_keys=[user_id])
     course = relationship("Course", back_populates="enrollments")
 
+    __table_args__ = (
+        # One enrollment per user and course - the ON CONFLICT target for bulk inserts
+        Index("uq_enrollments_user_course", "user_id", "course_id", unique=True),
+        # Only open enrollments are scanned by the overdue sweeper
+        Index(
+            "ix_enrollments_open_due_date", "due_date",
+            postgresql_where=status.in_(OPEN_ENROLLMENT_STATUSES),
+        ),
+    )
+
 
 # Certificate Model
 class Certificate(Base):
@@ -144,6 +173,11 @@ class Certificate(Base):
     user = relationship("User", back_populates="certificates")
     course = relationship("Course", back_populates="certificates")
 
+    __table_args__ = (
+        # One certificate per user and course - the ON CONFLICT target for issuance
+        Index("uq_certificates_user_course", "user_id", "course_id", unique=True),
+    )
+
 
 # Notification Model
 class Notification(Base):
@@ -155,4 +189,77 @@ class Notification(Base):
     message = Column(Text, nullable=False)
     type = Column(String, nullable=False)
     read = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Newest-first feed pages: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_notifications_user_created", "user_id", "created_at", "id"),
+        # Unread badge count and mark-all-read touch only the unread slice (index-only count)
+        Index("ix_notifications_user_read_created", "user_id", "read", "created_at"),
+    )
+
+
+# Single-use tickets that authenticate one event stream (see events.py)
+class StreamTicket(Base):
+    __tablename__ = "stream_tickets"
+
+    ticket_hash = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+# Unique indexes added to tables that may already hold duplicate keys
+# (written by earlier check-then-insert code). Before such an index is
+# built, only the first row per key in this order is kept.
+KEEP_FIRST_BEFORE_UNIQUE_INDEX = {
+    # The furthest-along enrollment wins, so completions are never lost
+    "uq_enrollments_user_course": "(status::text = 'COMPLETED') DESC, progress DESC NULLS LAST, id",
+    # The first certificate issued
+    "uq_certificates_user_course": "id",
+}
+
+
+def remove_duplicates_for_unique_indexes(bind):
+    """
+    Delete duplicate keys from tables whose unique index in
+    KEEP_FIRST_BEFORE_UNIQUE_INDEX does not exist yet, so that
+    create_missing_indexes() can build it. No-op once the index exists.
+    """
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            order = KEEP_FIRST_BEFORE_UNIQUE_INDEX.get(index.name)
+            if order is None or index.name in existing:
+                continue
+            key = ", ".join(column.name for column in index.columns)
+            with bind.begin() as connection:
+                removed = connection.execute(text(
+                    f"DELETE FROM {table.name} WHERE id IN ("
+                    f"SELECT id FROM (SELECT id, row_number() OVER (PARTITION BY {key} ORDER BY {order}) AS position "
+                    f"FROM {table.name}) ranked WHERE position > 1)"
+                )).rowcount
+            if removed:
+                logger.warning("Removed %s duplicate rows from %s before adding %s", removed, table.name, index.name)
+
+
+def create_missing_indexes(bind):
+    """
+    create_all() only creates indexes together with new tables.
+    Add any index declared above that an existing database is missing.
+    A unique index that cannot be built is fatal; run
+    remove_duplicates_for_unique_indexes() first.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=bind, checkfirst=True)
+            except Exception as e:
+                if index.unique:
+                    # ON CONFLICT targets depend on these - running without one fails at request time
+                    logger.critical("Could not create unique index %s: %s", index.name, e)
+                    raise
+                logger.warning("Could not create index %s: %s", index.name, e)
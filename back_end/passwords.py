@@ -0,0 +1,134 @@
+import asyncio
+import hmac
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# ====================================================
+# 🔐 PASSWORD HASHING CONFIG
+# ====================================================
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", str(os.cpu_count() or 2)))
+PASSWORD_QUEUE_DEPTH = int(os.getenv("PASSWORD_QUEUE_DEPTH", "32"))
+PASSWORD_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_TIMEOUT_SECONDS", "10"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when the password pool has no free worker or queue slot"""
+
+
+# ====================================================
+# 🧵 BOUNDED PASSWORD WORKER POOL
+# ====================================================
+
+class PasswordPool:
+    """
+    Dedicated executor for bcrypt work.
+    At most `workers + queue_depth` jobs are admitted; anything beyond that is
+    rejected immediately instead of tying up request threads behind bcrypt.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, timeout: float):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _submit(self, fn, *args):
+        """Admit `fn(*args)` onto the pool, or raise PasswordPoolSaturated"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolSaturated("Password pool is saturated")
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def run(self, fn, *args):
+        """Run `fn(*args)` on the pool and block until the result (scripts, sync code)"""
+        try:
+            return self._submit(fn, *args).result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise PasswordPoolSaturated("Password pool did not answer in time")
+
+    async def run_async(self, fn, *args):
+        """
+        Run `fn(*args)` on the pool and await the result. The caller's event
+        loop stays free and no request thread is held while bcrypt runs.
+        """
+        future = self._submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise PasswordPoolSaturated("Password pool did not answer in time")
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self._in_flight,
+                "rejected": self.rejected,
+            }
+
+
+password_pool = PasswordPool(PASSWORD_POOL_SIZE, PASSWORD_QUEUE_DEPTH, PASSWORD_TIMEOUT_SECONDS)
+
+
+# ====================================================
+# 🔐 SECURITY FUNCTIONS
+# ====================================================
+
+async def hash_password_async(password: str) -> str:
+    """Hash password using bcrypt (on the password pool)"""
+    return await password_pool.run_async(pwd_context.hash, password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str):
+    if not hashed_password:
+        # No password set - passlib would raise on a NULL/empty hash
+        return False, None
+    if pwd_context.identify(hashed_password) is None:
+        # Legacy plain-text password - compare directly, no bcrypt parse needed
+        is_match = hmac.compare_digest(plain_password.encode(), hashed_password.encode())
+        return is_match, pwd_context.hash(plain_password) if is_match else None
+
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except ValueError as e:
+        logger.warning("Malformed password hash: %s", e)
+        return False, None
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str):
+    """
+    Verify a password and return (is_valid, new_hash) - on the password pool.
+    new_hash is set when the stored value is plain text or uses outdated
+    bcrypt settings (e.g. fewer rounds than BCRYPT_ROUNDS); callers should
+    persist it. Handles both bcrypt hashes and legacy plain text.
+    """
+    return await password_pool.run_async(_verify_and_update, plain_password, hashed_password)
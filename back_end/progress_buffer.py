@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, and_, bindparam, case, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+import models
+from cache import TTLCache
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# ====================================================
+# 🎞️ PROGRESS COALESCING CONFIG
+# ====================================================
+
+# Off: every heartbeat is written and committed by the request, as before
+PROGRESS_COALESCE_ENABLED = os.getenv("PROGRESS_COALESCE_ENABLED", "true").lower() == "true"
+# Longest a heartbeat waits in memory before it is written
+PROGRESS_FLUSH_INTERVAL_SECONDS = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", "2"))
+# Rows per UPDATE statement within one flush
+PROGRESS_FLUSH_BATCH_SIZE = int(os.getenv("PROGRESS_FLUSH_BATCH_SIZE", "1000"))
+# Buffered (user, course) pairs; from half this the flusher is woken early, and
+# at the limit heartbeats for new pairs wait for it (backpressure)
+PROGRESS_MAX_PENDING = int(os.getenv("PROGRESS_MAX_PENDING", "50000"))
+# Longest a heartbeat waits for room before the request is turned away (503)
+PROGRESS_BACKPRESSURE_SECONDS = float(os.getenv("PROGRESS_BACKPRESSURE_SECONDS", "1"))
+
+# (user_id, course_id) -> last known enrollment status, so heartbeats skip the lookup
+known_enrollments = TTLCache(maxsize=50000, ttl=300)
+
+
+def enrollment_status(db, user_id: int, course_id: int):
+    """The enrollment's status (cached), or None when the user is not enrolled"""
+    key = (user_id, course_id)
+    cached = known_enrollments.get(key)
+    if cached is not None:
+        return cached
+    found = db.execute(
+        select(models.Enrollment.status).where(
+            models.Enrollment.user_id == user_id,
+            models.Enrollment.course_id == course_id,
+        )
+    ).scalar()
+    if found is not None:
+        known_enrollments.set(key, found)
+    return found
+
+
+def buffered_status(known_status, progress: int):
+    """Status a buffered heartbeat leads to once flushed (flushes never complete or reopen)"""
+    if known_status == models.EnrollmentStatus.NOT_STARTED and progress > 0:
+        return models.EnrollmentStatus.IN_PROGRESS
+    return known_status
+
+
+class ProgressBacklogFull(Exception):
+    """Raised when the buffer stays full for PROGRESS_BACKPRESSURE_SECONDS"""
+
+
+class ProgressBuffer:
+    """
+    Keeps the highest progress seen per (user, course) and writes the lot
+    every `interval` seconds. Each batch is one UPDATE ... FROM unnest()
+    that takes GREATEST(stored, buffered), so flushes from several workers
+    (or a late flush after a completion) can never move progress backwards.
+    Heartbeats still in memory when a process dies are lost; completions
+    never pass through here (see update_progress).
+
+    Requests never write: a filling buffer wakes the flush task early, and
+    a full one makes heartbeats for new pairs wait (up to `max_wait`) for
+    that flush to make room.
+
+    Buffering needs the flush task, which lifespan starts. Check `running`
+    first: without it (no lifespan, e.g. a bare TestClient or
+    --lifespan off) callers must write synchronously instead.
+    """
+
+    def __init__(self, interval: float, batch_size: int, max_pending: int, max_wait: float):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_wait = max_wait
+        self.recorded = 0
+        self.rejected = 0
+        self.history = deque(maxlen=20)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._flush_requested = False
+        self._wake = None
+        self._loop = None
+        self._task = None
+
+    def record(self, user_id: int, course_id: int, progress: int) -> int:
+        """
+        Buffer a heartbeat; returns the highest progress buffered for the
+        pair. Raises ProgressBacklogFull when there is still no room after
+        `max_wait` seconds.
+        """
+        key = (user_id, course_id)
+        deadline = None
+        with self._lock:
+            # Pairs already buffered are merged in place and never wait
+            while key not in self._pending and len(self._pending) >= self.max_pending:
+                self._request_flush()
+                if deadline is None:
+                    deadline = time.monotonic() + self.max_wait
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += 1
+                    raise ProgressBacklogFull()
+                self._drained.wait(remaining)
+
+            entry = self._pending.get(key)
+            best = max(progress, entry[0]) if entry else progress
+            self._pending[key] = (best, datetime.utcnow())
+            self.recorded += 1
+            if len(self._pending) >= self.max_pending // 2:
+                self._request_flush()
+        return best
+
+    def _request_flush(self):
+        """Wake the flush task ahead of its interval (caller holds _lock)"""
+        if self._flush_requested or self._loop is None:
+            return
+        self._flush_requested = True
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    def discard(self, user_id: int, course_id: int):
+        with self._lock:
+            self._pending.pop((user_id, course_id), None)
+
+    def flush(self) -> dict:
+        """Write everything buffered so far; failed rows are put back for the next flush"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._flush_requested = False
+                self._drained.notify_all()
+            if not pending:
+                return {"rows": 0}
+
+            started = time.perf_counter()
+            items = list(pending.items())
+            rows_updated = 0
+            db = SessionLocal()
+            try:
+                for start in range(0, len(items), self.batch_size):
+                    rows_updated += db.execute(self._statement(), self._params(items[start:start + self.batch_size])).rowcount
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._restore(pending)
+                raise
+            finally:
+                db.close()
+
+            result = {
+                "flushed_at": datetime.utcnow().isoformat(),
+                "rows": len(items),
+                "rows_updated": rows_updated,
+                "statements": -(-len(items) // self.batch_size),
+                "duration_seconds": round(time.perf_counter() - started, 3),
+            }
+            self.history.append(result)
+            logger.debug("[PROGRESS] Flushed %s heartbeats in %ss", len(items), result["duration_seconds"])
+            return result
+
+    def _restore(self, pending: dict):
+        with self._lock:
+            for key, (progress, seen_at) in pending.items():
+                entry = self._pending.get(key)
+                if entry is None or entry[0] < progress:
+                    self._pending[key] = (progress, seen_at)
+
+    @staticmethod
+    def _params(items) -> dict:
+        return {
+            "user_ids": [user_id for (user_id, _), _ in items],
+            "course_ids": [course_id for (_, course_id), _ in items],
+            "progress": [progress for _, (progress, _) in items],
+            "seen_at": [seen_at for _, (_, seen_at) in items],
+        }
+
+    @staticmethod
+    def _statement():
+        enrollments = models.Enrollment.__table__
+        heartbeats = func.unnest(
+            bindparam("user_ids", type_=ARRAY(Integer)),
+            bindparam("course_ids", type_=ARRAY(Integer)),
+            bindparam("progress", type_=ARRAY(Integer)),
+            bindparam("seen_at", type_=ARRAY(DateTime)),
+        ).table_valued("user_id", "course_id", "progress", "seen_at").render_derived().alias("heartbeats")
+        return (
+            update(enrollments)
+            .where(
+                enrollments.c.user_id == heartbeats.c.user_id,
+                enrollments.c.course_id == heartbeats.c.course_id,
+                # Completion is written synchronously and is final
+                enrollments.c.status != models.EnrollmentStatus.COMPLETED,
+            )
+            .values(
+                progress=func.greatest(enrollments.c.progress, heartbeats.c.progress),
+                status=case(
+                    (and_(enrollments.c.status == models.EnrollmentStatus.NOT_STARTED, heartbeats.c.progress > 0),
+                     literal(models.EnrollmentStatus.IN_PROGRESS, enrollments.c.status.type)),
+                    else_=enrollments.c.status,
+                ),
+                updated_at=heartbeats.c.seen_at,
+            )
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.exception("[PROGRESS] Flush failed: %s", e)
+
+    def start(self):
+        """Start flushing on the running event loop (called from lifespan)"""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush task and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+        await asyncio.to_thread(self.flush)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": PROGRESS_COALESCE_ENABLED,
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "heartbeats_recorded": self.recorded,
+            "heartbeats_rejected": self.rejected,
+            "last_flush": self.history[-1] if self.history else None,
+        }
+
+
+progress_buffer = ProgressBuffer(
+    PROGRESS_FLUSH_INTERVAL_SECONDS, PROGRESS_FLUSH_BATCH_SIZE, PROGRESS_MAX_PENDING, PROGRESS_BACKPRESSURE_SECONDS,
+)
@@ -0,0 +1,128 @@
+"""
+Role-driven auto-enrollment.
+
+Every user is enrolled in each course whose assigned_roles contain the
+user's role. The reconciler diffs (users x matching courses) against
+existing enrollments and inserts only the missing rows, in one statement.
+
+Usage (full sweep):
+    python reconciler.py
+"""
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import (
+    Integer, String, and_, any_, bindparam, case, event, exists, func, inspect, literal, select, type_coerce
+)
+from sqlalchemy.dialects.postgresql import ARRAY, array, insert as pg_insert
+
+import models
+
+logger = logging.getLogger(__name__)
+
+users = models.User.__table__
+courses = models.Course.__table__
+enrollments = models.Enrollment.__table__
+
+# users.role stores the enum *name* ("CARER"); assigned_roles holds values ("Carer")
+_stored_role = type_coerce(users.c.role, String)
+ROLE_VALUE = case(
+    {role.name: role.value for role in models.UserRole},
+    value=_stored_role,
+    else_=_stored_role,
+)
+
+
+def missing_enrollments_statement(user_ids=None, course_ids=None):
+    """
+    INSERT the role-mandated enrollments that do not exist yet, optionally
+    restricted to some users and/or courses. Due dates come from expiry_days.
+    """
+    now = datetime.utcnow()
+
+    candidates = (
+        select(
+            users.c.id,
+            courses.c.id,
+            literal(models.EnrollmentStatus.NOT_STARTED, enrollments.c.status.type),
+            literal(0),
+            literal(now, enrollments.c.due_date.type) + func.make_interval(0, 0, 0, courses.c.expiry_days),
+            literal(now, enrollments.c.created_at.type),
+            literal(now, enrollments.c.updated_at.type),
+        )
+        .select_from(users.join(courses, courses.c.assigned_roles.contains(array([ROLE_VALUE]))))
+        .where(~exists().where(and_(
+            enrollments.c.user_id == users.c.id,
+            enrollments.c.course_id == courses.c.id,
+        )))
+    )
+    if user_ids is not None:
+        candidates = candidates.where(users.c.id == any_(bindparam("user_ids", list(user_ids), type_=ARRAY(Integer))))
+    if course_ids is not None:
+        candidates = candidates.where(
+            courses.c.id == any_(bindparam("course_ids", list(course_ids), type_=ARRAY(Integer)))
+        )
+
+    # ON CONFLICT covers enrollments created concurrently after the NOT EXISTS
+    # check. No conflict target: inferring one needs uq_enrollments_user_course
+    # to exist, and these hooks run inside register and seeding.
+    return pg_insert(enrollments).from_select(
+        ["user_id", "course_id", "status", "progress", "due_date", "created_at", "updated_at"],
+        candidates,
+    ).on_conflict_do_nothing()
+
+
+def reconcile(connection, user_ids=None, course_ids=None) -> int:
+    """Insert missing role enrollments on `connection`; returns rows inserted"""
+    return connection.execute(missing_enrollments_statement(user_ids, course_ids)).rowcount
+
+
+def reconcile_all(db) -> dict:
+    """Full sweep over every user and course; commits and reports timing"""
+    started = time.perf_counter()
+    inserted = reconcile(db.connection())
+    db.commit()
+    elapsed = time.perf_counter() - started
+    logger.info("[RECONCILE] Created %s role enrollments in %.2fs", inserted, elapsed)
+    return {"enrolled_count": inserted, "duration_seconds": round(elapsed, 3)}
+
+
+# ====================================================
+# 🔁 INCREMENTAL RECONCILIATION
+# ====================================================
+# Runs inside the flush, on the same connection/transaction as the change.
+
+@event.listens_for(models.User, "after_insert")
+def _enroll_new_user(mapper, connection, target):
+    reconcile(connection, user_ids=[target.id])
+
+
+@event.listens_for(models.User, "after_update")
+def _enroll_after_role_change(mapper, connection, target):
+    if inspect(target).attrs.role.history.has_changes():
+        reconcile(connection, user_ids=[target.id])
+
+
+@event.listens_for(models.Course, "after_insert")
+def _enroll_for_new_course(mapper, connection, target):
+    reconcile(connection, course_ids=[target.id])
+
+
+@event.listens_for(models.Course, "after_update")
+def _enroll_after_course_roles_change(mapper, connection, target):
+    if inspect(target).attrs.assigned_roles.history.has_changes():
+        reconcile(connection, course_ids=[target.id])
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+    from logging_config import configure_logging
+
+    configure_logging()
+
+    session = SessionLocal()
+    try:
+        reconcile_all(session)
+    finally:
+        session.close()
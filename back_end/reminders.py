@@ -0,0 +1,165 @@
+"""
+Training reminder fan-out.
+
+Recipients are resolved with one aggregate query over their outstanding
+enrollments, all Notification rows go in with one INSERT ... SELECT FROM
+unnest(), and emails are handed to the SMTP outbox, which sends them in
+the background. Returns as soon as the notifications are committed.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import Integer, Text, and_, any_, bindparam, func, insert, literal, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.orm import Session
+
+import models
+from events import event_broker
+from mailer import smtp_outbox
+
+logger = logging.getLogger(__name__)
+
+REMINDER_TITLE = "Training reminder"
+REMINDER_TYPE = "reminder"
+# Course titles listed in the notification text; the email lists them all
+MAX_LISTED_COURSES = 5
+
+# Roles that may remind anyone, not just the users reporting to them
+UNRESTRICTED_ROLES = ("Admin", "Director")
+
+OVERDUE = models.EnrollmentStatus.OVERDUE
+
+
+def outstanding_enrollments(now: datetime):
+    """Per user: open enrollments (soonest due first) and how many are overdue"""
+    enrollment = models.Enrollment
+    is_overdue = or_(
+        enrollment.status == OVERDUE,
+        and_(enrollment.status.in_(models.OPEN_ENROLLMENT_STATUSES), enrollment.due_date < now),
+    )
+    return (
+        select(
+            enrollment.user_id,
+            func.count().filter(is_overdue).label("overdue"),
+            func.array_agg(aggregate_order_by(
+                models.Course.title, enrollment.due_date.asc().nulls_last(), enrollment.id
+            )).label("courses"),
+        )
+        .join(models.Course, models.Course.id == enrollment.course_id)
+        .where(enrollment.status != models.EnrollmentStatus.COMPLETED)
+        .group_by(enrollment.user_id)
+        .subquery("outstanding")
+    )
+
+
+def find_recipients(db: Session, sender: models.User, member_ids=None, all_overdue: bool = False) -> list:
+    """
+    Users to remind: `member_ids`, or with `all_overdue` every member of the
+    sender's team with an overdue course. Members are limited to the
+    sender's direct reports unless the sender is an Admin or Director, and
+    users with nothing outstanding are left out.
+    """
+    outstanding = outstanding_enrollments(datetime.utcnow())
+    stmt = (
+        select(
+            models.User.id,
+            models.User.name,
+            models.User.email,
+            outstanding.c.overdue,
+            outstanding.c.courses,
+        )
+        .join(outstanding, outstanding.c.user_id == models.User.id)
+        .order_by(models.User.id)
+    )
+    if all_overdue:
+        stmt = stmt.where(models.User.manager_id == sender.id, outstanding.c.overdue > 0)
+    else:
+        stmt = stmt.where(models.User.id == any_(bindparam("member_ids", list(member_ids or []), type_=ARRAY(Integer))))
+        if sender.role not in UNRESTRICTED_ROLES:
+            stmt = stmt.where(models.User.manager_id == sender.id)
+    return db.execute(stmt).all()
+
+
+def notification_text(courses: list, overdue: int) -> str:
+    listed = ", ".join(courses[:MAX_LISTED_COURSES])
+    if len(courses) > MAX_LISTED_COURSES:
+        listed += f" and {len(courses) - MAX_LISTED_COURSES} more"
+    text = f"You have {len(courses)} outstanding course{'s' if len(courses) != 1 else ''}: {listed}."
+    if overdue:
+        text += f" {overdue} {'is' if overdue == 1 else 'are'} overdue."
+    return text
+
+
+def email_text(name: str, sender_name: str, courses: list, overdue: int) -> str:
+    lines = [f"Hi {name},", "", f"{sender_name} has sent you a reminder about your outstanding training:", ""]
+    lines += [f"  - {title}" for title in courses]
+    if overdue:
+        lines += ["", f"{overdue} of these {'is' if overdue == 1 else 'are'} overdue."]
+    lines += ["", "Please log in to River Garden Training to complete them.", ""]
+    return "\n".join(lines)
+
+
+def insert_notifications(db: Session, user_ids: list, messages: list, now: datetime) -> list:
+    """
+    One INSERT ... SELECT FROM unnest(:user_ids, :messages); the statement
+    is the same size whatever the number of recipients. Returns
+    (id, user_id, message) rows.
+    """
+    notifications = models.Notification.__table__
+    rows = select(
+        func.unnest(
+            bindparam("user_ids", user_ids, type_=ARRAY(Integer)),
+            bindparam("messages", messages, type_=ARRAY(Text)),
+        ).table_valued("user_id", "message").render_derived()
+    ).subquery("reminders")
+    stmt = insert(notifications).from_select(
+        ["user_id", "title", "message", "type", "read", "created_at"],
+        select(
+            rows.c.user_id,
+            literal(REMINDER_TITLE),
+            rows.c.message,
+            literal(REMINDER_TYPE),
+            literal(False),
+            literal(now, notifications.c.created_at.type),
+        ),
+    ).returning(notifications.c.id, notifications.c.user_id, notifications.c.message)
+    return db.execute(stmt).all()
+
+
+def send_reminders(db: Session, sender: models.User, member_ids=None, all_overdue: bool = False) -> dict:
+    """Notify (in-app, live stream and email) each recipient; commits the notifications"""
+    recipients = find_recipients(db, sender, member_ids, all_overdue)
+    if not recipients:
+        return {"notified": 0, "emails_queued": 0}
+
+    now = datetime.utcnow()
+    inserted = insert_notifications(
+        db,
+        [r.id for r in recipients],
+        [notification_text(r.courses, r.overdue) for r in recipients],
+        now,
+    )
+    db.commit()
+
+    # Core inserts skip the ORM hooks in events.py, so publish here - one
+    # event for every recipient. Texts differ per user and are left out;
+    # clients fetch them with the feed.
+    event_broker.publish([user_id for _, user_id, _ in inserted], "notification", {
+        "title": REMINDER_TITLE,
+        "type": REMINDER_TYPE,
+        "read": False,
+        "created_at": now.isoformat(),
+    })
+
+    emails_queued = 0
+    if smtp_outbox.enabled:
+        for r in recipients:
+            subject = f"{REMINDER_TITLE}: {len(r.courses)} outstanding course{'s' if len(r.courses) != 1 else ''}"
+            if smtp_outbox.enqueue(r.email, subject, email_text(r.name, sender.name, r.courses, r.overdue)):
+                emails_queued += 1
+        if emails_queued < len(recipients):
+            logger.warning("[REMINDERS] Outbox full: %s of %s emails not queued",
+                           len(recipients) - emails_queued, len(recipients))
+
+    logger.info("[REMINDERS] %s reminded %s users (%s emails queued)", sender.id, len(inserted), emails_queued)
+    return {"notified": len(inserted), "emails_queued": emails_queued}
@@ -0,0 +1,360 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select, true, tuple_
+from sqlalchemy.orm import Session
+
+import models
+
+# ====================================================
+# 📊 ENROLLMENT AGGREGATES
+# ====================================================
+
+COMPLETED = models.EnrollmentStatus.COMPLETED
+IN_PROGRESS = models.EnrollmentStatus.IN_PROGRESS
+OVERDUE = models.EnrollmentStatus.OVERDUE
+NOT_STARTED = models.EnrollmentStatus.NOT_STARTED
+
+
+def count_status(status):
+    """COUNT(*) FILTER (WHERE enrollments.status = :status)"""
+    return func.count().filter(models.Enrollment.status == status)
+
+
+def compliance_rate(completed, total):
+    """completed / total as a percentage rounded to 1dp (0 when total is 0)"""
+    return case(
+        (total > 0, func.round(completed * 100.0 / total, 1)),
+        else_=0.0,
+    )
+
+
+# ====================================================
+# 👑 ADMIN: USERS TRAINING STATUS
+# ====================================================
+
+# Compliance bands accepted by ?compliance_band= (lower bound inclusive)
+COMPLIANCE_BANDS = {
+    "low": (0, 50),
+    "medium": (50, 80),
+    "high": (80, None),
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+# Accepted ?role= values
+ROLES = tuple(role.value for role in models.UserRole)
+
+# Python type of each ?sort= key's values, checked when a cursor is decoded
+SORT_VALUE_TYPES = {
+    "id": int,
+    "name": str,
+    "email": str,
+    "last_login": datetime,
+    "compliance_rate": (int, float),
+    "total_courses": int,
+    "overdue_courses": int,
+}
+
+
+def _enrollment_counts():
+    """One row per user_id with status counts - a single GROUP BY over enrollments"""
+    return (
+        select(
+            models.Enrollment.user_id,
+            func.count().label("total_courses"),
+            count_status(COMPLETED).label("completed_courses"),
+            count_status(IN_PROGRESS).label("in_progress_courses"),
+            count_status(OVERDUE).label("overdue_courses"),
+        )
+        .group_by(models.Enrollment.user_id)
+        .subquery("enrollment_counts")
+    )
+
+
+def training_status_query(branch=None, role=None, compliance_band=None):
+    """
+    Users joined to their enrollment status counts.
+    Returns (statement, sort_columns) - sort_columns maps ?sort= names to
+    non-null expressions usable for keyset pagination.
+    """
+    counts = _enrollment_counts()
+    total = func.coalesce(counts.c.total_courses, 0)
+    completed = func.coalesce(counts.c.completed_courses, 0)
+    rate = compliance_rate(completed, total)
+
+    stmt = (
+        select(
+            models.User.id,
+            models.User.name,
+            models.User.email,
+            models.User.role,
+            models.User.branch,
+            models.User.last_login,
+            models.User.join_date,
+            models.User.avatar,
+            total.label("total_courses"),
+            completed.label("completed_courses"),
+            func.coalesce(counts.c.in_progress_courses, 0).label("in_progress_courses"),
+            func.coalesce(counts.c.overdue_courses, 0).label("overdue_courses"),
+            rate.label("compliance_rate"),
+        )
+        .outerjoin(counts, counts.c.user_id == models.User.id)
+    )
+
+    if branch:
+        stmt = stmt.where(models.User.branch == branch)
+    if role:
+        stmt = stmt.where(models.User.role == role)
+    if compliance_band:
+        low, high = COMPLIANCE_BANDS[compliance_band]
+        stmt = stmt.where(rate >= low)
+        if high is not None:
+            stmt = stmt.where(rate < high)
+
+    sort_columns = {
+        "id": models.User.id,
+        "name": models.User.name,
+        "email": models.User.email,
+        "last_login": func.coalesce(models.User.last_login, EPOCH),
+        "compliance_rate": rate,
+        "total_courses": total,
+        "overdue_courses": func.coalesce(counts.c.overdue_courses, 0),
+    }
+    return stmt, sort_columns
+
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """Opaque keyset cursor for the row after which the next page starts"""
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    elif sort_value is not None and not isinstance(sort_value, (int, float, str)):
+        sort_value = float(sort_value)  # Decimal from ROUND()
+    raw = json.dumps([sort_value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _is_int(value) -> bool:
+    # Postgres integer range; bool is an int subclass but never a valid key
+    return isinstance(value, int) and not isinstance(value, bool) and -2**31 <= value < 2**31
+
+
+def decode_cursor(cursor: str, value_type=None):
+    """
+    Inverse of encode_cursor. With `value_type`, the sort value must be of
+    that type (sort keys are never null). Raises ValueError on a malformed
+    cursor, so it can be answered with a 400 instead of failing in the
+    database.
+    """
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not _is_int(row_id):
+        raise ValueError("Invalid cursor")
+    if value_type is not None:
+        types = value_type if isinstance(value_type, tuple) else (value_type,)
+        if not isinstance(sort_value, types) or (isinstance(sort_value, int) and not _is_int(sort_value)):
+            raise ValueError("Invalid cursor")
+    return sort_value, row_id
+
+
+def apply_keyset(stmt, sort_column, descending: bool, cursor=None, limit=None, value_type=None):
+    """Order by (sort_column, users.id) and start after `cursor` when given"""
+    key = tuple_(sort_column, models.User.id)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor, value_type))
+        stmt = stmt.where(key < after if descending else key > after)
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), models.User.id.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), models.User.id.asc())
+    if limit:
+        stmt = stmt.limit(limit)
+    return stmt.add_columns(sort_column.label("sort_key"))
+
+
+def training_status_row(row) -> dict:
+    """JSON shape served by /api/admin/users-training-status"""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "email": row.email,
+        "role": row.role,
+        "branch": row.branch,
+        "last_login": row.last_login.isoformat() if row.last_login else None,
+        "join_date": row.join_date.isoformat() if row.join_date else None,
+        "total_courses": row.total_courses,
+        "completed_courses": row.completed_courses,
+        "in_progress_courses": row.in_progress_courses,
+        "overdue_courses": row.overdue_courses,
+        "compliance_rate": float(row.compliance_rate),
+        "avatar": row.avatar,
+    }
+
+
+# ====================================================
+# 👑 ADMIN: DASHBOARD STATS
+# ====================================================
+
+def dashboard_stats(db: Session) -> dict:
+    """
+    Every admin dashboard figure from one statement (one round trip).
+    Each table is scanned once: COUNT(*) FILTER per status/login bucket, and
+    the role histogram is aggregated to JSON inside the database.
+    """
+    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+
+    user_stats = select(
+        func.count().label("total_users"),
+        func.count().filter(models.User.last_login > seven_days_ago).label("active_users_7_days"),
+        func.count().filter(models.User.last_login.is_(None)).label("never_logged_in"),
+    ).subquery("user_stats")
+
+    role_counts = (
+        select(models.User.__table__.c.role, func.count().label("n"))
+        .group_by(models.User.__table__.c.role)
+        .subquery("role_counts")
+    )
+    role_stats = select(
+        func.json_object_agg(role_counts.c.role, role_counts.c.n).label("role_distribution")
+    ).subquery("role_stats")
+
+    enrollment_stats = select(
+        func.count().label("total_enrollments"),
+        count_status(COMPLETED).label("completed_enrollments"),
+        count_status(IN_PROGRESS).label("in_progress_enrollments"),
+        count_status(OVERDUE).label("overdue_enrollments"),
+        count_status(NOT_STARTED).label("not_started_enrollments"),
+    ).subquery("enrollment_stats")
+
+    course_stats = select(func.count().label("total_courses")).select_from(models.Course).subquery("course_stats")
+    certificate_stats = (
+        select(func.count().label("total_certificates"))
+        .select_from(models.Certificate)
+        .subquery("certificate_stats")
+    )
+
+    row = db.execute(
+        select(user_stats, role_stats, enrollment_stats, course_stats, certificate_stats).select_from(
+            user_stats
+            .join(role_stats, true())
+            .join(enrollment_stats, true())
+            .join(course_stats, true())
+            .join(certificate_stats, true())
+        )
+    ).one()
+
+    # Roles are stored by enum name ("CARER"); report them by value ("Carer")
+    role_distribution = {}
+    for name, count in (row.role_distribution or {}).items():
+        role = models.UserRole[name].value if name in models.UserRole.__members__ else name
+        role_distribution[role] = count
+
+    total_users = row.total_users
+    total_enrollments = row.total_enrollments
+
+    return {
+        "total_users": total_users,
+        "active_users_7_days": row.active_users_7_days,
+        "never_logged_in": row.never_logged_in,
+        "total_courses": row.total_courses,
+        "total_enrollments": total_enrollments,
+        "completed_enrollments": row.completed_enrollments,
+        "in_progress_enrollments": row.in_progress_enrollments,
+        "overdue_enrollments": row.overdue_enrollments,
+        "not_started_enrollments": row.not_started_enrollments,
+        "overall_compliance_rate": round((row.completed_enrollments / total_enrollments * 100),
+                                         1) if total_enrollments > 0 else 0.0,
+        "total_certificates": row.total_certificates,
+        "role_distribution": role_distribution,
+        "avg_courses_per_user": round(total_enrollments / total_users, 1) if total_users > 0 else 0.0
+    }
+
+
+# ====================================================
+# 📊 MANAGER: TEAM STATS
+# ====================================================
+
+def _team_figures(row) -> dict:
+    return {
+        "total_enrollments": row.total_enrollments,
+        "completed_enrollments": row.completed_enrollments,
+        "overdue_count": row.overdue_enrollments,
+        "compliance_rate": round(row.completed_enrollments / row.total_enrollments * 100,
+                                 1) if row.total_enrollments > 0 else 0.0,
+    }
+
+
+def team_stats(db: Session, manager_id: int, breakdown: bool = False) -> dict:
+    """
+    Team statistics for the users reporting to `manager_id`, from one query
+    over users LEFT JOIN enrollments.
+    With `breakdown`, GROUPING SETS adds per-member and per-course-category
+    rows to the same result set, so it is still a single round trip.
+    """
+    figures = [
+        func.count(func.distinct(models.User.id)).label("team_size"),
+        func.count(models.Enrollment.id).label("total_enrollments"),
+        count_status(COMPLETED).label("completed_enrollments"),
+        count_status(OVERDUE).label("overdue_enrollments"),
+    ]
+    team = (
+        select()
+        .select_from(models.User)
+        .outerjoin(models.Enrollment, models.Enrollment.user_id == models.User.id)
+        .where(models.User.manager_id == manager_id)
+    )
+
+    if not breakdown:
+        rows = [db.execute(team.add_columns(*figures)).one()]
+    else:
+        category = models.Course.category
+        stmt = (
+            team.add_columns(
+                func.grouping(models.User.id).label("not_by_member"),
+                func.grouping(category).label("not_by_category"),
+                models.User.id.label("member_id"),
+                models.User.name.label("member_name"),
+                category.label("category"),
+                *figures,
+            )
+            .outerjoin(models.Course, models.Course.id == models.Enrollment.course_id)
+            .group_by(func.grouping_sets(
+                tuple_(),
+                tuple_(models.User.id, models.User.name),
+                tuple_(category),
+            ))
+        )
+        rows = db.execute(stmt).all()
+
+    overall = next(row for row in rows if not breakdown or (row.not_by_member and row.not_by_category))
+    stats = {
+        "team_size": overall.team_size,
+        "avg_compliance": round(overall.completed_enrollments / overall.total_enrollments * 100)
+        if overall.total_enrollments > 0 else 0,
+        # For MVP: each completed enrollment = 1h
+        "total_hours": overall.completed_enrollments,
+        "overdue_count": overall.overdue_enrollments,
+    }
+
+    if breakdown:
+        stats["members"] = [
+            {"id": row.member_id, "name": row.member_name, **_team_figures(row)}
+            for row in sorted(rows, key=lambda r: r.member_id or 0)
+            if not row.not_by_member
+        ]
+        stats["categories"] = [
+            {
+                "category": row.category.value if hasattr(row.category, 'value') else str(row.category),
+                **_team_figures(row),
+            }
+            for row in rows
+            # Members without enrollments form a NULL-category group - skip it
+            if not row.not_by_category and row.category is not None
+        ]
+
+    return stats
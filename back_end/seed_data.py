@@ -1,11 +1,15 @@
+import logging
+
 from sqlalchemy.orm import Session
 from models import Course, CourseCategory, CourseDifficulty, CourseDeliveryType
 
+logger = logging.getLogger(__name__)
+
 
 def seed_courses(db: Session):
     """Seed courses with role-based assignments"""
     if db.query(Course).count() > 0:
-        print("✅ Courses already exist – skipping seed.")
+        logger.info("Courses already exist – skipping seed.")
         return
 
     courses_data = [
@@ -430,4 +434,4 @@ def seed_courses(db: Session):
         db.add(course)
 
     db.commit()
-    print(f"✅ Seeded {len(courses_data)} courses with verified working images and role assignments!")
+    logger.info("Seeded %s courses with verified working images and role assignments!", len(courses_data))
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+from reportlab.pdfbase import pdfmetrics
+from sqlalchemy import text
+from sqlalchemy.orm import Session, configure_mappers
+
+import models
+import reconciler
+from cache import catalogue_cache
+from database import SessionLocal, engine, pool_stats, replica_router
+from certificate_pdf import render_certificate
+from passwords import pwd_context
+
+logger = logging.getLogger(__name__)
+
+# ====================================================
+# 🚦 STARTUP STATE
+# ====================================================
+
+# Filled in by the lifespan hook; read by the readiness checks
+startup_state = {
+    "started_at": datetime.utcnow().isoformat(),
+    "seeded": False,
+    # Initial role-enrollment sweep, run in the background after seeding
+    "reconcile": {"status": "pending"},
+    "warmed_up": False,
+    "warmup_seconds": None,
+    "warmup_steps": {},
+    "warmup_errors": {},
+}
+
+# Fonts used by the certificate template
+WARMUP_FONTS = ("Helvetica", "Helvetica-Bold")
+
+SAMPLE_CERTIFICATE = {
+    "name": "Warm Up",
+    "course_title": "Warm Up",
+    "certificate_id": "warm-up",
+    "issue_date": "January 01, 2000",
+    "expiry_date": "January 01, 2001",
+    "score": "100.0",
+}
+
+
+# ====================================================
+# 🔥 WARM-UP
+# ====================================================
+
+def _load_fonts():
+    for name in WARMUP_FONTS:
+        pdfmetrics.getFont(name)
+
+
+def _prime_catalogue(db: Session):
+    for role in models.UserRole:
+        catalogue_cache.for_role(db, role.value)
+
+
+def warm_up(db: Session):
+    """
+    Run the one-off work the first requests would otherwise pay for:
+    SQLAlchemy mapper configuration, reportlab font metrics and lazy imports,
+    the bcrypt backend, and the per-role course catalogue.
+    A failing step is recorded and skipped; it does not block startup.
+    """
+    steps = [
+        ("configure_mappers", configure_mappers),
+        ("reportlab_fonts", _load_fonts),
+        ("certificate_render", lambda: render_certificate(SAMPLE_CERTIFICATE)),
+        ("bcrypt_backend", lambda: pwd_context.handler().get_backend()),
+        ("course_catalogue", lambda: _prime_catalogue(db)),
+    ]
+
+    started = time.perf_counter()
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            startup_state["warmup_errors"][name] = str(e)
+            logger.warning("[WARMUP] %s failed: %s", name, e)
+        startup_state["warmup_steps"][name] = round(time.perf_counter() - step_started, 4)
+
+    startup_state["warmup_seconds"] = round(time.perf_counter() - started, 4)
+    startup_state["warmed_up"] = True
+    logger.info("[WARMUP] Completed in %ss: %s", startup_state['warmup_seconds'], startup_state['warmup_steps'])
+
+
+# ====================================================
+# 🔁 INITIAL RECONCILE (background)
+# ====================================================
+
+def _reconcile_all():
+    db = SessionLocal()
+    try:
+        return reconciler.reconcile_all(db)
+    finally:
+        db.close()
+
+
+async def initial_reconcile():
+    """
+    Full role-enrollment sweep after startup, off the lifespan path - a
+    first backfill can take tens of seconds. The outcome is reported by
+    readiness() but does not gate it: until it finishes, only role
+    enrollments missed while the app was down are absent.
+    """
+    startup_state["reconcile"] = {"status": "running", "started_at": datetime.utcnow().isoformat()}
+    try:
+        result = await asyncio.to_thread(_reconcile_all)
+        startup_state["reconcile"] = {"status": "done", **result}
+    except Exception as e:
+        logger.exception("[RECONCILE] Initial sweep failed: %s", e)
+        startup_state["reconcile"] = {"status": "failed", "error": str(e)}
+
+
+# ====================================================
+# 🩺 READINESS
+# ====================================================
+
+# Slowest acceptable pool checkout + SELECT 1 before the worker reports unready
+READINESS_MAX_CHECKOUT_MS = float(os.getenv("READINESS_MAX_CHECKOUT_MS", "500"))
+
+
+def readiness() -> tuple:
+    """
+    (ready, report) for /readyz: pool not exhausted and a pooled connection
+    can be checked out and queried quickly.
+    Seeding and warm-up finish inside the lifespan hook before the worker
+    accepts requests, so they are reported but cannot gate readiness.
+    An exhausted pool is reported without waiting for a connection, so the
+    probe cannot hang for the pool timeout.
+    """
+    checks = {}
+    pool = pool_stats()
+    # Replica trouble only reroutes reads to the primary, and a failed
+    # initial reconcile only delays role enrollments, so both are reported
+    # here but do not make the worker unready
+    report = {"checks": checks, "pool": pool, "replica": replica_router.stats(),
+              "reconcile": startup_state["reconcile"],
+              "warmup": {"seconds": startup_state["warmup_seconds"],
+                         "errors": startup_state["warmup_errors"]}}
+
+    # max_overflow -1 means unbounded; pools without these counters are always probed
+    bounded = "checkedout" in pool and pool.get("max_overflow", -1) >= 0
+    if bounded and pool["checkedout"] >= pool["size"] + pool["max_overflow"]:
+        checks["database"] = False
+        report["database_error"] = "connection pool exhausted"
+    else:
+        started = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                report["checkout_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                connection.execute(text("SELECT 1"))
+            report["round_trip_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            checks["database"] = report["round_trip_ms"] <= READINESS_MAX_CHECKOUT_MS
+            if not checks["database"]:
+                report["database_error"] = f"checkout + query took over {READINESS_MAX_CHECKOUT_MS}ms"
+        except Exception as e:
+            checks["database"] = False
+            report["database_error"] = str(e)
+
+    ready = all(checks.values())
+    report["status"] = "ready" if ready else "not ready"
+    return ready, report
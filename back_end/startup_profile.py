@@ -0,0 +1,112 @@
+"""
+Cold-start profile: import-time breakdown plus lifespan (seed + warm-up) timing.
+
+Usage:
+    python startup_profile.py [--module main] [--top 25] [--skip-lifespan]
+
+Imports the app in a fresh interpreter under `-X importtime` and reports the
+slowest modules (self and cumulative time) and the top-level packages they
+belong to. Unless --skip-lifespan is given, the same interpreter then runs
+the app's lifespan startup and prints the recorded warm-up steps.
+Needs the same environment as the app (DATABASE_URL etc).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+MARKER = "STARTUP_PROFILE_RESULT "
+
+CHILD_SCRIPT = """
+import asyncio, json, time
+started = time.perf_counter()
+import {module} as app_module
+imported = time.perf_counter() - started
+lifespan = None
+if {run_lifespan}:
+    from startup import startup_state
+    async def run():
+        async with app_module.app.router.lifespan_context(app_module.app):
+            pass
+    started = time.perf_counter()
+    asyncio.run(run())
+    lifespan = dict(startup_state, lifespan_seconds=round(time.perf_counter() - started, 4))
+print({marker!r} + json.dumps({{"import_seconds": round(imported, 4), "lifespan": lifespan}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def print_table(title: str, rows: list, headers: tuple):
+    print(f"\n{title}")
+    print("  ".join(f"{h:>12}" if i else f"{h:<48}" for i, h in enumerate(headers)))
+    for row in rows:
+        print("  ".join(f"{v:>12}" if i else f"{v:<48}" for i, v in enumerate(row)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API cold start")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--skip-lifespan", action="store_true")
+    args = parser.parse_args()
+
+    script = CHILD_SCRIPT.format(module=args.module, run_lifespan=not args.skip_lifespan, marker=MARKER)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-4000:])
+        sys.exit(f"❌ Profiling run failed (exit code {result.returncode})")
+
+    modules = parse_importtime(result.stderr)
+    total_us = sum(self_us for _, self_us, _, _ in modules)
+
+    by_package = defaultdict(lambda: [0, 0])
+    for name, self_us, _, _ in modules:
+        package = by_package[name.split(".")[0]]
+        package[0] += self_us
+        package[1] += 1
+
+    print(f"📦 {len(modules)} modules imported, {total_us / 1000:.1f} ms total import time")
+
+    slowest = sorted(modules, key=lambda m: m[1], reverse=True)[:args.top]
+    print_table("Slowest modules (self)", [(n, f"{s / 1000:.1f}", f"{c / 1000:.1f}") for n, s, c, _ in slowest],
+                ("module", "self ms", "cumul. ms"))
+
+    packages = sorted(by_package.items(), key=lambda p: p[1][0], reverse=True)[:args.top]
+    print_table("Top-level packages", [(n, f"{s / 1000:.1f}", str(count)) for n, (s, count) in packages],
+                ("package", "self ms", "modules"))
+
+    for line in result.stdout.splitlines():
+        if line.startswith(MARKER):
+            report = json.loads(line[len(MARKER):])
+            print(f"\n⏱️  import {args.module} (wall, includes module-level DB setup): "
+                  f"{report['import_seconds'] * 1000:.1f} ms")
+            lifespan = report["lifespan"]
+            if lifespan:
+                print(f"⏱️  lifespan startup + shutdown: {lifespan['lifespan_seconds'] * 1000:.1f} ms "
+                      f"(seeded={lifespan['seeded']}, warmed_up={lifespan['warmed_up']})")
+                for step, seconds in lifespan["warmup_steps"].items():
+                    print(f"    warm-up {step:<24} {seconds * 1000:>8.1f} ms")
+                for step, error in lifespan["warmup_errors"].items():
+                    print(f"    ⚠️  {step}: {error}")
+
+
+if __name__ == "__main__":
+    main()
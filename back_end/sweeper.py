@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+import models
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# ====================================================
+# ⏰ OVERDUE SWEEPER CONFIG
+# ====================================================
+
+OVERDUE_SWEEP_ENABLED = os.getenv("OVERDUE_SWEEP_ENABLED", "true").lower() == "true"
+OVERDUE_SWEEP_INTERVAL_SECONDS = float(os.getenv("OVERDUE_SWEEP_INTERVAL_SECONDS", "300"))
+OVERDUE_SWEEP_BATCH_SIZE = int(os.getenv("OVERDUE_SWEEP_BATCH_SIZE", "5000"))
+
+# Statuses that can still become overdue - must match ix_enrollments_open_due_date
+OPEN_STATUSES = models.OPEN_ENROLLMENT_STATUSES
+
+
+class OverdueSweeper:
+    """
+    Periodically flips past-due, non-completed enrollments to OVERDUE.
+    Each batch is one UPDATE ... WHERE id IN (SELECT ... LIMIT n FOR UPDATE
+    SKIP LOCKED) driven by the partial index on due_date, so several workers
+    can sweep at once without blocking each other or user writes.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.history = deque(maxlen=20)
+        self._task = None
+
+    def sweep_once(self) -> dict:
+        """Run batches until no past-due open enrollment is left"""
+        enrollments = models.Enrollment.__table__
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        rows_updated = 0
+        batches = 0
+
+        db = SessionLocal()
+        try:
+            while True:
+                now = datetime.utcnow()
+                due = (
+                    select(enrollments.c.id)
+                    .where(enrollments.c.due_date < now)
+                    .where(enrollments.c.status.in_(OPEN_STATUSES))
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                    .scalar_subquery()
+                )
+                result = db.execute(
+                    update(enrollments)
+                    .where(enrollments.c.id.in_(due))
+                    .values(status=models.EnrollmentStatus.OVERDUE, updated_at=now)
+                )
+                db.commit()
+
+                rows_updated += result.rowcount
+                batches += 1
+                if result.rowcount < self.batch_size:
+                    break
+        finally:
+            db.close()
+
+        sweep = {
+            "started_at": started_at.isoformat(),
+            "rows_updated": rows_updated,
+            "batches": batches,
+            "duration_seconds": round(time.perf_counter() - started, 3),
+        }
+        self.history.append(sweep)
+        logger.info("[SWEEPER] Marked %s enrollments overdue in %ss", rows_updated, sweep['duration_seconds'])
+        return sweep
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep_once)
+            except Exception as e:
+                logger.exception("[SWEEPER] Sweep failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start sweeping on the running event loop (called from lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "batch_size": self.batch_size,
+            "last_sweep": self.history[-1] if self.history else None,
+            "recent_sweeps": list(self.history),
+        }
+
+
+overdue_sweeper = OverdueSweeper(OVERDUE_SWEEP_INTERVAL_SECONDS, OVERDUE_SWEEP_BATCH_SIZE)
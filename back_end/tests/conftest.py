@@ -0,0 +1,105 @@
+"""
+Behaviour tests, run against a real Postgres database.
+
+Point DATABASE_URL at a throwaway database (the tests create users,
+courses and enrollments in it and briefly drop a unique index) and run
+`python -m pytest` from back_end/. Without a Postgres DATABASE_URL the
+tests are not collected - the models rely on ARRAY columns, ON CONFLICT
+and partial/GIN indexes.
+"""
+import os
+import sys
+import threading
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+    collect_ignore_glob = ["test_*.py"]
+
+# Concurrency tests run up to HAMMER_THREADS sessions at once; size the pool
+# so each gets its own connection instead of queueing behind DB_POOL_TIMEOUT
+HAMMER_THREADS = 50
+os.environ.setdefault("DB_POOL_SIZE", "10")
+os.environ.setdefault("DB_MAX_OVERFLOW", str(HAMMER_THREADS))
+
+
+@pytest.fixture(scope="session")
+def engine():
+    import models
+    from database import engine
+
+    models.Base.metadata.create_all(bind=engine)
+    models.remove_duplicates_for_unique_indexes(engine)
+    models.create_missing_indexes(engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_course(db):
+    import models
+
+    def make(assigned_roles=(), expiry_days=365) -> int:
+        course = models.Course(
+            title=f"Test course {uuid.uuid4().hex[:8]}",
+            description="Created by the test suite",
+            category=models.CourseCategory.MANDATORY,
+            difficulty=models.CourseDifficulty.BEGINNER,
+            duration="10 mins",
+            expiry_days=expiry_days,
+            assigned_roles=list(assigned_roles),
+        )
+        db.add(course)
+        db.commit()
+        return course.id
+
+    return make
+
+
+@pytest.fixture
+def make_user(db):
+    import crud
+
+    def make(role="Carer") -> int:
+        email = f"test-{uuid.uuid4().hex}@example.com"
+        return crud.create_user(db, name="Test User", email=email, password_hash="x", role=role).id
+
+    return make
+
+
+@pytest.fixture
+def run_together():
+    return _run_together
+
+
+def _run_together(count: int, fn):
+    """Call fn(i) from `count` threads released at the same moment; returns results in order"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+    errors = []
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = fn(i)
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    return results
@@ -0,0 +1,68 @@
+from sqlalchemy import func, inspect, select, text
+
+import crud
+import models
+
+
+def enrollment_rows(db, course_id):
+    return db.execute(
+        select(models.Enrollment.user_id, func.count())
+        .where(models.Enrollment.course_id == course_id)
+        .group_by(models.Enrollment.user_id)
+    ).all()
+
+
+def test_concurrent_bulk_enroll_creates_one_enrollment_per_user(engine, db, make_course, make_user, run_together):
+    from database import SessionLocal
+
+    course_id = make_course()
+    user_ids = [make_user() for _ in range(5)]
+
+    def enroll(_):
+        session = SessionLocal()
+        try:
+            return crud.bulk_enroll_users(session, course_id, user_ids + [-1])
+        finally:
+            session.close()
+
+    enrolled = run_together(8, enroll)
+
+    # Every user is reported enrolled by exactly one of the racing calls
+    assert sorted(user_id for ids in enrolled for user_id in ids) == sorted(user_ids)
+    assert sorted(enrollment_rows(db, course_id)) == [(user_id, 1) for user_id in sorted(user_ids)]
+
+
+def test_bulk_enroll_skips_existing_enrollments(db, make_course, make_user):
+    course_id = make_course()
+    first, second = make_user(), make_user()
+
+    assert crud.bulk_enroll_users(db, course_id, [first]) == [first]
+    assert crud.bulk_enroll_users(db, course_id, [first, second]) == [second]
+
+
+def test_duplicates_are_removed_before_the_unique_index_is_built(engine, db, make_course, make_user):
+    course_id = make_course()
+    user_id = make_user()
+
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX uq_enrollments_user_course"))
+    try:
+        for status, progress in [("NOT_STARTED", 0), ("COMPLETED", 100), ("IN_PROGRESS", 60)]:
+            db.add(models.Enrollment(
+                user_id=user_id, course_id=course_id,
+                status=models.EnrollmentStatus[status], progress=progress,
+            ))
+        db.commit()
+
+        models.remove_duplicates_for_unique_indexes(engine)
+    finally:
+        models.create_missing_indexes(engine)
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("enrollments")}
+    assert "uq_enrollments_user_course" in indexes
+    kept = db.execute(
+        select(models.Enrollment.status, models.Enrollment.progress)
+        .where(models.Enrollment.user_id == user_id, models.Enrollment.course_id == course_id)
+    ).all()
+    # The completed enrollment wins over later, less advanced ones
+    assert kept == [(models.EnrollmentStatus.COMPLETED, 100)]
@@ -0,0 +1,79 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import models
+import reports
+
+URL = "/api/notifications/me"
+
+
+@pytest.fixture(scope="module")
+def client(engine):
+    import main
+    # One event loop for the module: the async pool's connections belong to it,
+    # and lifespan shutdown disposes of them
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def user(db, make_user):
+    import main
+    user = db.get(models.User, make_user())
+    return user.id, {"Authorization": f"Bearer {main.create_access_token({'sub': user.email})}"}
+
+
+def add_notifications(db, user_id, created_at: list) -> list:
+    notifications = [
+        models.Notification(user_id=user_id, title=f"n{i}", message="test", type="info", created_at=when)
+        for i, when in enumerate(created_at)
+    ]
+    db.add_all(notifications)
+    db.commit()
+    return [n.id for n in notifications]
+
+
+def test_feed_pages_cover_every_notification_once_newest_first(client, db, user):
+    user_id, headers = user
+    now = datetime.utcnow()
+    # Three share a timestamp, so the id tie-break decides their order
+    ids = add_notifications(db, user_id, [now - timedelta(minutes=m) for m in (5, 4, 3, 3, 3, 1, 0)])
+
+    seen, params = [], {"limit": 2}
+    while True:
+        response = client.get(URL, params=params, headers=headers)
+        assert response.status_code == 200
+        seen += [n["id"] for n in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 2, "cursor": cursor}
+
+    newest_first = sorted(zip([now - timedelta(minutes=m) for m in (5, 4, 3, 3, 3, 1, 0)], ids), reverse=True)
+    assert seen == [notification_id for _, notification_id in newest_first]
+
+
+def test_notification_cursor_round_trip():
+    created_at = datetime(2025, 3, 1, 12, 0, 0, 123456)
+
+    assert reports.decode_cursor(reports.encode_cursor(created_at, 99), datetime) == (created_at, 99)
+
+
+@pytest.mark.parametrize("cursor", [
+    "%%%",
+    base64.urlsafe_b64encode(b"{}").decode(),
+    base64.urlsafe_b64encode(json.dumps([12, 1]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps(["2025-03-01", 1]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([None, 1]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([{"dt": "2025-03-01T00:00:00"}, "1"]).encode()).decode(),
+])
+def test_malformed_feed_cursor_is_rejected(client, user, cursor):
+    _, headers = user
+
+    response = client.get(URL, params={"cursor": cursor}, headers=headers)
+
+    assert response.status_code == 400
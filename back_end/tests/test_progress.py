@@ -0,0 +1,71 @@
+from sqlalchemy import func, select
+
+import crud
+import models
+from conftest import HAMMER_THREADS
+
+
+def enroll(db, user_id, course_id):
+    crud.bulk_enroll_users(db, course_id, [user_id])
+
+
+def test_concurrent_completions_issue_one_certificate(engine, db, make_course, make_user, run_together):
+    from database import SessionLocal
+
+    course_id = make_course()
+    user_id = make_user()
+    enroll(db, user_id, course_id)
+
+    def complete(_):
+        session = SessionLocal()
+        try:
+            return crud.record_progress(session, user_id, course_id, 100).status
+        finally:
+            session.close()
+
+    statuses = run_together(HAMMER_THREADS, complete)
+
+    assert set(statuses) == {models.EnrollmentStatus.COMPLETED}
+    certificates = db.scalar(
+        select(func.count()).select_from(models.Certificate)
+        .where(models.Certificate.user_id == user_id, models.Certificate.course_id == course_id)
+    )
+    assert certificates == 1
+
+
+def test_concurrent_progress_keeps_the_highest_value(engine, db, make_course, make_user, run_together):
+    from database import SessionLocal
+
+    course_id = make_course()
+    user_id = make_user()
+    enroll(db, user_id, course_id)
+    values = [10, 80, 30, 60, 20, 70, 40, 50]
+
+    def record(i):
+        session = SessionLocal()
+        try:
+            crud.record_progress(session, user_id, course_id, values[i])
+        finally:
+            session.close()
+
+    run_together(len(values), record)
+
+    enrollment = db.scalars(
+        select(models.Enrollment).where(models.Enrollment.user_id == user_id, models.Enrollment.course_id == course_id)
+    ).one()
+    assert (enrollment.progress, enrollment.status) == (80, models.EnrollmentStatus.IN_PROGRESS)
+
+
+def test_progress_after_completion_changes_nothing(db, make_course, make_user):
+    course_id = make_course()
+    user_id = make_user()
+    enroll(db, user_id, course_id)
+
+    crud.record_progress(db, user_id, course_id, 100)
+    row = crud.record_progress(db, user_id, course_id, 40)
+
+    assert (row.progress, row.status) == (100, models.EnrollmentStatus.COMPLETED)
+
+
+def test_progress_without_enrollment_returns_none(db, make_course, make_user):
+    assert crud.record_progress(db, make_user(), make_course(), 50) is None
@@ -0,0 +1,83 @@
+import asyncio
+
+from sqlalchemy import delete, func, select
+
+import models
+import reconciler
+
+
+def enrolled_course_ids(db, user_id):
+    db.expire_all()
+    return set(db.scalars(select(models.Enrollment.course_id).where(models.Enrollment.user_id == user_id)))
+
+
+def test_new_user_is_enrolled_in_role_courses(db, make_course, make_user):
+    nurse_course = make_course(assigned_roles=["Nurse"])
+    other_course = make_course(assigned_roles=["Driver"])
+
+    enrolled = enrolled_course_ids(db, make_user(role="Nurse"))
+
+    assert nurse_course in enrolled
+    assert other_course not in enrolled
+
+
+def test_role_change_adds_the_new_role_courses(db, make_course, make_user):
+    nurse_course = make_course(assigned_roles=["Nurse"])
+    user_id = make_user(role="Carer")
+    assert nurse_course not in enrolled_course_ids(db, user_id)
+
+    db.get(models.User, user_id).role = "Nurse"
+    db.commit()
+
+    assert nurse_course in enrolled_course_ids(db, user_id)
+
+
+def test_new_course_enrolls_existing_users_of_its_roles(db, make_course, make_user):
+    user_id = make_user(role="Office Staff")
+
+    course_id = make_course(assigned_roles=["Office Staff"])
+
+    assert course_id in enrolled_course_ids(db, user_id)
+
+
+def test_concurrent_reconciles_insert_each_enrollment_once(engine, db, make_course, make_user, run_together):
+    course_ids = [make_course(assigned_roles=["Driver"]) for _ in range(3)]
+    user_id = make_user(role="Driver")
+    db.execute(delete(models.Enrollment).where(models.Enrollment.user_id == user_id))
+    db.commit()
+
+    def reconcile(_):
+        with engine.begin() as connection:
+            return reconciler.reconcile(connection, user_ids=[user_id])
+
+    inserted = run_together(8, reconcile)
+
+    rows = db.execute(
+        select(models.Enrollment.course_id, func.count())
+        .where(models.Enrollment.user_id == user_id, models.Enrollment.course_id.in_(course_ids))
+        .group_by(models.Enrollment.course_id)
+    ).all()
+    assert sorted(rows) == [(course_id, 1) for course_id in sorted(course_ids)]
+    assert sum(inserted) == len(enrolled_course_ids(db, user_id))
+
+
+def test_initial_reconcile_reports_its_outcome(engine, make_user):
+    from startup import initial_reconcile, startup_state
+
+    make_user(role="Supervisor")
+    asyncio.run(initial_reconcile())
+
+    assert startup_state["reconcile"]["status"] == "done"
+    assert startup_state["reconcile"]["enrolled_count"] >= 0
+
+
+def test_failed_initial_reconcile_is_reported_not_raised(engine, monkeypatch):
+    import startup
+
+    def fail():
+        raise RuntimeError("sweep failed")
+
+    monkeypatch.setattr(startup, "_reconcile_all", fail)
+    asyncio.run(startup.initial_reconcile())
+
+    assert startup.startup_state["reconcile"] == {"status": "failed", "error": "sweep failed"}
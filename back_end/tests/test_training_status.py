@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+import models
+import reports
+
+URL = "/api/admin/users-training-status"
+
+
+def raw_cursor(sort_value, row_id) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode()).decode()
+
+
+@pytest.mark.parametrize("sort_value, expected", [
+    (42, 42),
+    ("Ada Lovelace", "Ada Lovelace"),
+    (Decimal("66.7"), 66.7),
+    (datetime(2024, 5, 17, 9, 30, 15, 250), datetime(2024, 5, 17, 9, 30, 15, 250)),
+])
+def test_cursor_round_trip(sort_value, expected):
+    assert reports.decode_cursor(reports.encode_cursor(sort_value, 7)) == (expected, 7)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b"[1, 2, 3]").decode(),
+    raw_cursor({"dt": "yesterday"}, 1),
+    raw_cursor(1, "7"),
+    raw_cursor(1, True),
+    raw_cursor(1, 2 ** 40),
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        reports.decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("sort, sort_value", [
+    ("name", 5),
+    ("last_login", "2024-01-01"),
+    ("total_courses", 1.5),
+    ("total_courses", None),
+    ("compliance_rate", "high"),
+])
+def test_cursor_of_the_wrong_type_raises_value_error(sort, sort_value):
+    with pytest.raises(ValueError):
+        reports.decode_cursor(raw_cursor(sort_value, 1), reports.SORT_VALUE_TYPES[sort])
+
+
+@pytest.fixture
+def client(engine):
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def admin_headers(db, make_user):
+    import main
+    email = db.get(models.User, make_user(role="Admin")).email
+    return {"Authorization": f"Bearer {main.create_access_token({'sub': email})}"}
+
+
+def test_unknown_role_is_rejected(client, admin_headers):
+    response = client.get(URL, params={"role": "Wizard"}, headers=admin_headers)
+
+    assert response.status_code == 400
+    assert "role must be one of" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("sort, cursor", [
+    ("last_login", "%%%"),
+    ("last_login", raw_cursor("not a date", 1)),
+    ("name", raw_cursor(3, 1)),
+    ("id", raw_cursor(1, [1])),
+])
+def test_bad_cursor_is_rejected(client, admin_headers, sort, cursor):
+    response = client.get(URL, params={"sort": sort, "limit": 2, "cursor": cursor}, headers=admin_headers)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("sort, order", [("id", "asc"), ("name", "desc"), ("last_login", "asc"), ("compliance_rate", "desc")])
+def test_following_cursors_visits_every_user_once(client, admin_headers, make_user, sort, order):
+    for _ in range(3):
+        make_user(role="Driver")
+    params = {"role": "Driver", "sort": sort, "order": order}
+    everyone = [row["id"] for row in client.get(URL, params=params, headers=admin_headers).json()]
+
+    seen, cursor = [], None
+    while True:
+        response = client.get(URL, params={**params, "limit": 2, **({"cursor": cursor} if cursor else {})},
+                              headers=admin_headers)
+        assert response.status_code == 200
+        seen += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == everyone
+
+
+def test_stream_honours_cursor_and_limit(client, admin_headers, make_user):
+    for _ in range(4):
+        make_user(role="Driver")
+    params = {"role": "Driver", "sort": "id", "limit": 2}
+    first = client.get(URL, params=params, headers=admin_headers)
+    cursor = first.headers["X-Next-Cursor"]
+    expected = [row["id"] for row in client.get(URL, params={**params, "cursor": cursor}, headers=admin_headers).json()]
+
+    streamed = client.get(URL, params={**params, "cursor": cursor, "stream": True}, headers=admin_headers)
+
+    assert streamed.status_code == 200
+    assert [json.loads(line)["id"] for line in streamed.text.splitlines()] == expected
+    assert len(expected) == 2
+
+
+def test_stream_rejects_a_bad_cursor(client, admin_headers):
+    response = client.get(URL, params={"stream": True, "cursor": "%%%"}, headers=admin_headers)
+
+    assert response.status_code == 400
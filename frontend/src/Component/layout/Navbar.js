@@ -16,18 +16,26 @@ export const Navbar = ({ user, onLogout }) => {
   const isLandingPage = location.pathname === '/' || location.pathname === '/home';
 
   useEffect(() => {
-    if (user) {
-      loadUnreadCount();
-      // Refresh count every 30 seconds
+    if (!user) return;
+
+    loadUnreadCount();
+    if (typeof EventSource === 'undefined') {
+      // No server push available - fall back to polling every 30 seconds
       const interval = setInterval(loadUnreadCount, 30000);
       return () => clearInterval(interval);
     }
+
+    // Server push: re-sync on every (re)connect, then count new notifications as they arrive
+    const stream = notificationAPI.openEventStream({
+      ready: loadUnreadCount,
+      notification: () => setUnreadCount(count => count + 1),
+    });
+    return () => stream.close();
   }, [user]);
 
   const loadUnreadCount = async () => {
     try {
-      const notifications = await notificationAPI.getMyNotifications();
-      const unread = notifications.filter(n => !n.read).length;
+      const unread = await notificationAPI.getUnreadCount();
       setUnreadCount(unread);
     } catch (error) {
       console.error('Error loading notification count:', error);
@@ -235,6 +243,7 @@ export const Navbar = ({ user, onLogout }) => {
       <NotificationPanel
         isOpen={notificationPanelOpen}
         onClose={() => setNotificationPanelOpen(false)}
+        onUnreadCountChange={setUnreadCount}
       />
     </nav>
   );
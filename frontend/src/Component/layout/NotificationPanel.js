@@ -1,13 +1,16 @@
 import React, { useState, useEffect } from 'react';
-import { Bell, X, Check } from 'lucide-react';
+import { Bell, X, Check, CheckCheck } from 'lucide-react';
 import { notificationAPI } from '../../services/api';
 import { Badge } from '../ui/badge';
 import { Button } from '../ui/button';
 import { ScrollArea } from '../ui/scroll-area';
 
-export const NotificationPanel = ({ isOpen, onClose }) => {
+export const NotificationPanel = ({ isOpen, onClose, onUnreadCountChange }) => {
   const [notifications, setNotifications] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [unreadCount, setUnreadCount] = useState(0);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     if (isOpen) {
@@ -15,11 +18,21 @@ export const NotificationPanel = ({ isOpen, onClose }) => {
     }
   }, [isOpen]);
 
+  const updateUnreadCount = (count) => {
+    setUnreadCount(count);
+    if (onUnreadCountChange) onUnreadCountChange(count);
+  };
+
   const loadNotifications = async () => {
     try {
       setLoading(true);
-      const data = await notificationAPI.getMyNotifications();
-      setNotifications(data);
+      const [page, unread] = await Promise.all([
+        notificationAPI.getMyNotifications(),
+        notificationAPI.getUnreadCount(),
+      ]);
+      setNotifications(page.notifications);
+      setNextCursor(page.nextCursor);
+      updateUnreadCount(unread);
     } catch (error) {
       console.error('Error loading notifications:', error);
     } finally {
@@ -27,6 +40,19 @@ export const NotificationPanel = ({ isOpen, onClose }) => {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const page = await notificationAPI.getMyNotifications(nextCursor);
+      setNotifications(prev => [...prev, ...page.notifications]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error loading more notifications:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleMarkAsRead = async (notificationId) => {
     try {
       await notificationAPI.markAsRead(notificationId);
@@ -34,12 +60,22 @@ export const NotificationPanel = ({ isOpen, onClose }) => {
       setNotifications(prev =>
         prev.map(n => n.id === notificationId ? { ...n, read: true } : n)
       );
+      updateUnreadCount(Math.max(0, unreadCount - 1));
     } catch (error) {
       console.error('Error marking notification as read:', error);
     }
   };
 
-  const unreadCount = notifications.filter(n => !n.read).length;
+  const handleMarkAllAsRead = async () => {
+    try {
+      const result = await notificationAPI.markAllAsRead();
+      if (!result) return;
+      setNotifications(prev => prev.map(n => ({ ...n, read: true })));
+      updateUnreadCount(0);
+    } catch (error) {
+      console.error('Error marking all notifications as read:', error);
+    }
+  };
 
   if (!isOpen) return null;
 
@@ -64,9 +100,17 @@ export const NotificationPanel = ({ isOpen, onClose }) => {
               </Badge>
             )}
           </div>
-          <Button variant="ghost" size="icon" onClick={onClose}>
-            <X className="h-5 w-5" />
-          </Button>
+          <div className="flex items-center space-x-1">
+            {unreadCount > 0 && (
+              <Button variant="ghost" size="sm" onClick={handleMarkAllAsRead}>
+                <CheckCheck className="h-4 w-4 mr-1" />
+                Mark all read
+              </Button>
+            )}
+            <Button variant="ghost" size="icon" onClick={onClose}>
+              <X className="h-5 w-5" />
+            </Button>
+          </div>
         </div>
 
         {/* Notifications List */}
@@ -119,6 +163,16 @@ export const NotificationPanel = ({ isOpen, onClose }) => {
                   </div>
                 </div>
               ))}
+              {nextCursor && (
+                <Button
+                  variant="outline"
+                  className="w-full"
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              )}
             </div>
           )}
         </ScrollArea>
@@ -55,9 +55,11 @@ export const courseAPI = {
   // Get all courses
   getAll: async () => {
     try {
+      // Revalidate with If-None-Match; the API answers 304 when unchanged
       const res = await fetch(`${API_BASE}/api/courses`, {
         method: "GET",
         headers: getAuthHeaders(),
+        cache: "no-cache",
       });
       if (!res.ok) throw new Error("Failed to fetch courses");
       return await res.json();
@@ -326,13 +328,13 @@ export const teamAPI = {
     }
   },
 
-  // Send reminders to team
-  sendReminders: async (memberIds = []) => {
+  // Send reminders to team members, or to everyone on the team with an overdue course
+  sendReminders: async (memberIds = [], allOverdue = false) => {
     try {
       const res = await fetch(`${API_BASE}/api/team/send-reminders`, {
         method: "POST",
         headers: getAuthHeaders(),
-        body: JSON.stringify({ member_ids: memberIds }),
+        body: JSON.stringify({ member_ids: memberIds, all_overdue: allOverdue }),
       });
       if (!res.ok) throw new Error("Failed to send reminders");
       return await res.json();
@@ -545,18 +547,98 @@ export const supervisorAPI = {
 // ====================================================
 
 export const notificationAPI = {
-  // Get user notifications
-  getMyNotifications: async () => {
+  // Get one page of user notifications (newest first); pass nextCursor for the next page
+  getMyNotifications: async (cursor = null, limit = 20) => {
     try {
-      const res = await fetch(`${API_BASE}/api/notifications/me`, {
+      const params = new URLSearchParams({ limit });
+      if (cursor) params.set("cursor", cursor);
+      const res = await fetch(`${API_BASE}/api/notifications/me?${params}`, {
         method: "GET",
         headers: getAuthHeaders(),
       });
       if (!res.ok) throw new Error("Failed to fetch notifications");
-      return await res.json();
+      return {
+        notifications: await res.json(),
+        nextCursor: res.headers.get("X-Next-Cursor"),
+      };
     } catch (error) {
       console.error("Error fetching notifications:", error);
-      return [];
+      return { notifications: [], nextCursor: null };
+    }
+  },
+
+  // Get unread notification count (header badge)
+  getUnreadCount: async () => {
+    try {
+      const res = await fetch(`${API_BASE}/api/notifications/me/unread-count`, {
+        method: "GET",
+        headers: getAuthHeaders(),
+      });
+      if (!res.ok) throw new Error("Failed to fetch unread count");
+      const data = await res.json();
+      return data.unread_count;
+    } catch (error) {
+      console.error("Error fetching unread count:", error);
+      return 0;
+    }
+  },
+
+  // Open the server-push channel. EventSource cannot send headers, so each
+  // connection first swaps the token for a single-use ticket; a dropped
+  // stream reconnects with a fresh one. Returns { close }.
+  openEventStream: (listeners) => {
+    let source = null;
+    let retryTimer = null;
+    let closed = false;
+
+    const reconnect = () => {
+      if (!closed) retryTimer = setTimeout(connect, 5000);
+    };
+
+    const connect = async () => {
+      try {
+        const res = await fetch(`${API_BASE}/api/events/ticket`, {
+          method: "POST",
+          headers: getAuthHeaders(),
+        });
+        if (!res.ok) throw new Error("Failed to get event stream ticket");
+        const { ticket } = await res.json();
+        if (closed) return;
+        source = new EventSource(`${API_BASE}/api/events/stream?ticket=${encodeURIComponent(ticket)}`);
+        Object.entries(listeners).forEach(([type, handler]) => source.addEventListener(type, handler));
+        // The ticket is spent, so the browser's own retry would be refused
+        source.onerror = () => {
+          source.close();
+          reconnect();
+        };
+      } catch (error) {
+        console.error("Error opening event stream:", error);
+        reconnect();
+      }
+    };
+
+    connect();
+    return {
+      close: () => {
+        closed = true;
+        clearTimeout(retryTimer);
+        if (source) source.close();
+      },
+    };
+  },
+
+  // Mark all notifications as read
+  markAllAsRead: async () => {
+    try {
+      const res = await fetch(`${API_BASE}/api/notifications/me/mark-all-read`, {
+        method: "POST",
+        headers: getAuthHeaders(),
+      });
+      if (!res.ok) throw new Error("Failed to mark all notifications as read");
+      return await res.json();
+    } catch (error) {
+      console.error("Error marking all notifications as read:", error);
+      return null;
     }
   },
 